@@ -0,0 +1,156 @@
+"""
+Copyright 2022-2026 The Johns Hopkins Applied Physics Laboratory.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.`
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .LeapfrogExecutor import LeapfrogExecutor, _Adjacency
+
+
+def _pack(dense: np.ndarray) -> np.ndarray:
+    """
+    Pack the last axis of a boolean array (a multiple of 64 long) into words.
+    """
+    return np.packbits(dense, axis=-1, bitorder="little").view(np.uint64)
+
+
+def _unpack(words: np.ndarray) -> np.ndarray:
+    """
+    Get the indices of the set bits of a bitset.
+    """
+    return np.flatnonzero(np.unpackbits(words.view(np.uint8), bitorder="little"))
+
+
+# NumPy < 2.0 has no popcount ufunc:
+_HAS_BITWISE_COUNT = hasattr(np, "bitwise_count")
+
+
+def _popcount(words: np.ndarray) -> int:
+    if _HAS_BITWISE_COUNT:
+        return int(np.bitwise_count(words).sum())
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
+
+class BitsetExecutor(LeapfrogExecutor):
+    """
+    A query executor that stores the host graph's adjacency as bitsets.
+
+    Each host node's out- and in-neighbors are packed into arrays of 64-bit
+    words, one bit per host node. The candidates for the next motif node are
+    then the word-wise AND of the neighbor bitsets of the motif nodes already
+    bound to it, AND-NOT the bitsets of its negative edges, and they are
+    counted with a popcount. This suits dense graphs, where the neighbor
+    lists are long and set intersections dominate the search.
+
+    The bitsets of an adjacency take n * ceil(n / 64) * 8 (about n^2 / 8)
+    bytes for n host nodes: 125 MB for 32,000 nodes. One is built for every
+    combination of edge direction and edge constraints that a motif uses,
+    and is kept until `clear_cache` is called, so this is meant for graphs
+    of up to tens of thousands of nodes. Motif nodes are bound in the same
+    order, and with the same constraints, as in LeapfrogExecutor.
+
+    """
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Create a new BitsetExecutor.
+
+        Arguments:
+            graph (networkx.Graph): The host graph
+            snapshot (dotmotif.snapshot.GraphSnapshot): A host graph snapshot,
+                which may be used instead of `graph`
+
+        Returns:
+            None
+
+        """
+        super().__init__(**kwargs)
+        self._width = -(-len(self.ids) // 64) * 64
+        self._bitsets: Dict[int, np.ndarray] = {}
+        self._node_bitsets: Dict[str, np.ndarray] = {}
+        self._loop_bitsets: Dict[int, np.ndarray] = {}
+        self._all = self._to_bitset(np.ones(len(self.ids), dtype=bool))
+
+    def _to_bitset(self, mask: np.ndarray) -> np.ndarray:
+        dense = np.zeros(self._width, dtype=bool)
+        dense[: len(mask)] = mask
+        return _pack(dense)
+
+    def _rows(self, adjacency: _Adjacency) -> np.ndarray:
+        """
+        Get the neighbor bitset of every host node in an adjacency.
+        """
+        if id(adjacency) not in self._bitsets:
+            # Set the bits in place, without an n-by-n boolean matrix:
+            rows = np.zeros((len(self.ids), self._width // 64), dtype=np.uint64)
+            bits = np.left_shift(
+                np.uint64(1), (adjacency.indices & 63).astype(np.uint64)
+            )
+            np.bitwise_or.at(
+                rows, (adjacency.keys // adjacency.n, adjacency.indices >> 6), bits
+            )
+            self._bitsets[id(adjacency)] = rows
+        return self._bitsets[id(adjacency)]
+
+    def clear_cache(self) -> None:
+        """
+        Free the adjacency, node and self-loop bitsets built so far.
+
+        They are rebuilt as they are needed by later searches.
+        """
+        self._bitsets = {}
+        self._node_bitsets = {}
+        self._loop_bitsets = {}
+
+    def _node_bitset(self, constraints: dict) -> np.ndarray:
+        cache_key = repr(constraints)
+        if cache_key not in self._node_bitsets:
+            self._node_bitsets[cache_key] = self._to_bitset(
+                self._node_mask(constraints)
+            )
+        return self._node_bitsets[cache_key]
+
+    def _self_loop_bitset(self, adjacency: _Adjacency) -> np.ndarray:
+        if id(adjacency) not in self._loop_bitsets:
+            self._loop_bitsets[id(adjacency)] = self._to_bitset(
+                self._self_loop_mask(adjacency)
+            )
+        return self._loop_bitsets[id(adjacency)]
+
+    def _candidate_words(self, step: dict, bound: List[Any]) -> np.ndarray:
+        words = self._all.copy()
+        for i, adjacency in step["neighbors"]:
+            words &= self._rows(adjacency)[bound[i]]
+        for i, adjacency in step["negative"]:
+            words &= ~self._rows(adjacency)[bound[i]]
+        if step["node_constraints"]:
+            words &= self._node_bitset(step["node_constraints"])
+        for adjacency, exists in step["self_loops"]:
+            loops = self._self_loop_bitset(adjacency)
+            words &= loops if exists else ~loops
+        # Injectivity:
+        for node in bound:
+            words[node >> 6] &= ~np.uint64(1 << (node & 63))
+        return words
+
+    def _matching_nodes(self, step: dict, bound: List[Any]) -> np.ndarray:
+        return _unpack(self._candidate_words(step, bound))
+
+    def _count_candidates(self, step: dict, bound: List[Any]) -> int:
+        if self._has_pairwise_filters(step):
+            return len(self._candidates(step, bound))
+        return _popcount(self._candidate_words(step, bound))
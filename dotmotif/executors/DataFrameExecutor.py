@@ -0,0 +1,346 @@
+"""
+Copyright 2022-2026 The Johns Hopkins Applied Physics Laboratory.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.`
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from .Executor import Executor
+from .NetworkXExecutor import _OPERATORS
+
+if TYPE_CHECKING:
+    from .. import dotmotif  # type: ignore
+
+_SOURCE = "__source"
+_TARGET = "__target"
+
+_VECTORIZED_OPERATORS = {
+    "=": lambda x, y: x == y,
+    "==": lambda x, y: x == y,
+    ">=": lambda x, y: x >= y,
+    "<=": lambda x, y: x <= y,
+    "<": lambda x, y: x < y,
+    ">": lambda x, y: x > y,
+    "!=": lambda x, y: x != y,
+}
+
+
+def _elementwise(operator: str, x: Any, y: Any) -> bool:
+    try:
+        return bool(_OPERATORS[operator](x, y))
+    except TypeError:
+        return False
+
+
+def _compare(left: pd.Series, operator: str, right: Any) -> np.ndarray:
+    """
+    Compare a column to a value (or to another column) as NetworkXExecutor
+    would, vectorized where the operator and dtypes allow it.
+    """
+    if operator in _VECTORIZED_OPERATORS:
+        try:
+            mask = _VECTORIZED_OPERATORS[operator](left, right)
+            return np.asarray(mask, dtype=bool)
+        except TypeError:
+            # Mixed types (such as missing values in a numeric column):
+            pass
+    if isinstance(right, pd.Series):
+        pairs = zip(left, right)
+    else:
+        pairs = ((x, right) for x in left)
+    return np.fromiter(
+        (_elementwise(operator, x, y) for x, y in pairs), dtype=bool, count=len(left)
+    )
+
+
+def _missing(left: pd.Series) -> pd.Series:
+    return pd.Series([None] * len(left), index=left.index, dtype=object)
+
+
+class DataFrameExecutor(Executor):
+    """
+    A query executor that evaluates motifs as joins of pandas DataFrames.
+
+    Each motif edge becomes a relation of candidate host edges, filtered
+    with its edge constraints and the node constraints of its endpoints.
+    The relations are then hash-joined on their shared motif nodes, smallest
+    first. Node inequality, negative edges and dynamic constraints are
+    applied to the joined rows as vectorized filters and anti-joins. This is
+    usually faster than backtracking search when the motif's constraints
+    select a small part of the host graph.
+
+    Like the NetworkXExecutor, each match maps motif nodes to distinct host
+    nodes.
+
+    """
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Create a new DataFrameExecutor.
+
+        Pass either a networkx `graph`, or an `edges` DataFrame (with
+        `source` and `target` columns of node IDs, and any edge attributes
+        as more columns) and, optionally, a `nodes` DataFrame of node
+        attributes indexed by node ID.
+
+        Arguments:
+            graph (networkx.Graph): The host graph
+            edges (pd.DataFrame): The host graph's edges
+            nodes (pd.DataFrame: None): The host graph's node attributes
+            source (str: "source"): The edge column of source node IDs
+            target (str: "target"): The edge column of target node IDs
+            directed (bool: True): Whether edges are directed. Defaults to
+                the direction of `graph`, if given.
+
+        Returns:
+            None
+
+        """
+        if kwargs.get("graph") is not None:
+            graph: nx.Graph = kwargs["graph"]
+            self.directed: bool = kwargs.get("directed", graph.is_directed())
+            self.edges = pd.DataFrame(
+                [attrs for _, _, attrs in graph.edges(data=True)],
+                index=pd.RangeIndex(graph.number_of_edges()),
+            )
+            self.edges.insert(0, _SOURCE, [u for u, _ in graph.edges()])
+            self.edges.insert(1, _TARGET, [v for _, v in graph.edges()])
+            self.nodes = pd.DataFrame(
+                [attrs for _, attrs in graph.nodes(data=True)],
+                index=list(graph.nodes()),
+            )
+        elif kwargs.get("edges") is not None:
+            self.directed = kwargs.get("directed", True)
+            self.edges = kwargs["edges"].rename(
+                columns={
+                    kwargs.get("source", "source"): _SOURCE,
+                    kwargs.get("target", "target"): _TARGET,
+                }
+            )
+            nodes = kwargs.get("nodes")
+            self.nodes = nodes if nodes is not None else pd.DataFrame()
+        else:
+            raise ValueError(
+                "You must pass a `graph` or an `edges` DataFrame to the "
+                "DataFrameExecutor constructor."
+            )
+
+    def _edge_table(self, directed: bool) -> pd.DataFrame:
+        """
+        The host edges, or for undirected searches, the edges both ways.
+        """
+        if directed:
+            return self.edges
+        reverse = self.edges[self.edges[_SOURCE] != self.edges[_TARGET]].rename(
+            columns={_SOURCE: _TARGET, _TARGET: _SOURCE}
+        )
+        return pd.concat([self.edges, reverse], ignore_index=True)
+
+    def _node_attribute(self, ids: pd.Series, key: str) -> pd.Series:
+        """
+        Look up a node attribute for a column of node IDs.
+        """
+        if key not in self.nodes.columns:
+            return _missing(ids)
+        values = self.nodes[key].reindex(ids.values)
+        return pd.Series(values.values, index=ids.index)
+
+    def _node_mask(self, ids: pd.Series, constraints: dict) -> np.ndarray:
+        mask = np.ones(len(ids), dtype=bool)
+        for key, operators in constraints.items():
+            values = self._node_attribute(ids, key)
+            for operator, targets in operators.items():
+                for target in targets:
+                    mask &= _compare(values, operator, target)
+        return mask
+
+    def _edge_relations(
+        self, motif: "dotmotif.Motif", edges: pd.DataFrame
+    ) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """
+        Filter the host edges down to the candidates for each motif edge.
+
+        The columns of each relation are its two motif nodes, plus the edge
+        attributes that dynamic edge constraints compare, as "u,v,attr".
+        """
+        edge_constraints = motif.list_edge_constraints()
+        node_constraints = motif.list_node_constraints()
+        dynamic_attributes: Dict[Tuple[str, str], Set[str]] = {}
+        for (u, v), constraints in motif.list_dynamic_edge_constraints().items():
+            for key, operators in constraints.items():
+                dynamic_attributes.setdefault((u, v), set()).add(key)
+                for other_u, other_v, other_key in operators.values():
+                    dynamic_attributes.setdefault((other_u, other_v), set()).add(
+                        other_key
+                    )
+
+        relations = {}
+        for u, v, attrs in motif.to_nx().edges(data=True):
+            if not attrs["exists"]:
+                continue
+            mask = np.ones(len(edges), dtype=bool)
+            for key, operators in edge_constraints.get((u, v), {}).items():
+                key = key.strip('"')
+                values = edges[key] if key in edges.columns else _missing(edges)
+                for operator, targets in operators.items():
+                    for target in targets:
+                        mask &= _compare(values, operator, target)
+            for node, column in ((u, _SOURCE), (v, _TARGET)):
+                if node in node_constraints:
+                    mask &= self._node_mask(edges[column], node_constraints[node])
+            if u == v:
+                # A self-loop in the motif matches only host self-loops:
+                mask &= (edges[_SOURCE] == edges[_TARGET]).values
+                relation = pd.DataFrame({u: edges[_SOURCE].values[mask]})
+            else:
+                relation = pd.DataFrame(
+                    {u: edges[_SOURCE].values[mask], v: edges[_TARGET].values[mask]}
+                )
+            keys = sorted(dynamic_attributes.get((u, v), ()))
+            for key in keys:
+                values = edges[key] if key in edges.columns else _missing(edges)
+                relation[f"{u},{v},{key}"] = values.values[mask]
+            if not keys:
+                # Parallel edges in a multigraph match only once:
+                relation = relation.drop_duplicates()
+            relations[(u, v)] = relation
+        return relations
+
+    @staticmethod
+    def _join_order(
+        relations: Dict[Tuple[str, str], pd.DataFrame],
+    ) -> List[Tuple[str, str]]:
+        """
+        Order the relations to join: smallest first, then always the
+        smallest relation that shares a node with those joined so far.
+        """
+        remaining = dict(relations)
+        order: List[Tuple[str, str]] = []
+        bound: Set[str] = set()
+        while remaining:
+            connected = [e for e in remaining if bound & set(e)] or list(remaining)
+            edge = min(connected, key=lambda e: (len(remaining[e]), e))
+            order.append(edge)
+            bound.update(edge)
+            del remaining[edge]
+        return order
+
+    def _find(self, motif: "dotmotif.Motif") -> pd.DataFrame:
+        directed = self.directed and not motif.ignore_direction
+        edges = self._edge_table(directed)
+        relations = self._edge_relations(motif, edges)
+        order = self._join_order(relations)
+
+        dynamic_node_constraints = [
+            (node, key, operator, other, other_key)
+            for node, constraints in motif.list_dynamic_node_constraints().items()
+            for key, operators in constraints.items()
+            for operator, others in operators.items()
+            for other, other_key in others
+        ]
+        dynamic_edge_constraints = [
+            ((u, v), key, operator, (other_u, other_v), other_key)
+            for (u, v), constraints in motif.list_dynamic_edge_constraints().items()
+            for key, operators in constraints.items()
+            for operator, (other_u, other_v, other_key) in operators.items()
+        ]
+        negative_edges = [
+            (u, v)
+            for u, v, attrs in motif.to_nx().edges(data=True)
+            if not attrs["exists"]
+        ]
+        automorphisms = (
+            motif.list_automorphisms() if motif.exclude_automorphisms else []
+        )
+        host_edges = pd.MultiIndex.from_arrays([edges[_SOURCE], edges[_TARGET]])
+
+        result: Optional[pd.DataFrame] = None
+        nodes: List[str] = []
+        joined: Set[Tuple[str, str]] = set()
+        for edge in order:
+            relation = relations[edge]
+            shared = [n for n in dict.fromkeys(edge) if n in nodes]
+            if result is None:
+                result = relation
+            elif shared:
+                result = result.merge(relation, on=shared, how="inner")
+            else:
+                result = result.merge(relation, how="cross")
+            new = [n for n in dict.fromkeys(edge) if n not in nodes]
+            joined.add(edge)
+
+            # Filter as soon as a predicate's motif nodes are all bound:
+            mask = np.ones(len(result), dtype=bool)
+            for i, n in enumerate(new):
+                for m in nodes + new[:i]:
+                    mask &= (result[n] != result[m]).values
+            nodes.extend(new)
+            for node, key, operator, other, other_key in dynamic_node_constraints:
+                if {node, other} <= set(nodes) and {node, other} & set(new):
+                    mask &= _compare(
+                        self._node_attribute(result[node], key),
+                        operator,
+                        self._node_attribute(result[other], other_key),
+                    )
+            for this, key, operator, that, other_key in dynamic_edge_constraints:
+                if {this, that} <= joined and edge in (this, that):
+                    mask &= _compare(
+                        result[f"{this[0]},{this[1]},{key}"],
+                        operator,
+                        result[f"{that[0]},{that[1]},{other_key}"],
+                    )
+            for a, b in automorphisms:
+                if {a, b} <= set(nodes) and {a, b} & set(new):
+                    mask &= _compare(result[a], "<=", result[b])
+            for u, v in negative_edges:
+                if {u, v} <= set(nodes) and {u, v} & set(new):
+                    # An anti-join against the host edges:
+                    pairs = pd.MultiIndex.from_arrays([result[u], result[v]])
+                    mask &= ~pairs.isin(host_edges)
+            result = result[mask]
+
+        if result is None:
+            return pd.DataFrame()
+        return result[nodes].drop_duplicates().reset_index(drop=True)
+
+    def count(self, motif: "dotmotif.Motif", limit: Optional[int] = None) -> int:
+        """
+        Count the occurrences of a motif in the host graph.
+
+        See DataFrameExecutor#find for more documentation.
+        """
+        return len(self.find(motif, limit))
+
+    def find(
+        self, motif: "dotmotif.Motif", limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find a motif in the host graph.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to search for
+            limit (int: None): The maximum number of matches to return
+
+        Returns:
+            List[dict]: One mapping from motif node to host node per match
+
+        """
+        results = self._find(motif)
+        if limit is not None:
+            results = results.head(limit)
+        return results.to_dict("records")
@@ -4,6 +4,24 @@ if TYPE_CHECKING:
     from .. import dotmotif
 
 
+class QueryTimeoutError(TimeoutError):
+    """
+    Raised when a database query does not finish within its timeout.
+
+    Any results that had already arrived are kept in `partial`.
+    """
+
+    def __init__(self, message: str, partial=None) -> None:
+        super().__init__(message)
+        self.partial = partial
+
+
+class QueryCancelledError(RuntimeError):
+    """
+    Raised when waiting on the result of a database query that was cancelled.
+    """
+
+
 class Executor:
     ...
 
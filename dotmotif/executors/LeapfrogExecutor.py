@@ -0,0 +1,495 @@
+"""
+Copyright 2022-2026 The Johns Hopkins Applied Physics Laboratory.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.`
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from .DataFrameExecutor import _compare
+from .Executor import Executor
+
+if TYPE_CHECKING:
+    from .. import dotmotif  # type: ignore
+    from ..snapshot import GraphSnapshot
+
+
+class _Adjacency:
+    """
+    Sorted, deduplicated adjacency (CSR) over a set of host edges.
+
+    Every edge is also kept as a single sorted integer key `u * n + v`, so
+    that membership and attribute lookups for many (u, v) pairs at once are
+    one binary search.
+
+    """
+
+    def __init__(
+        self, sources: np.ndarray, targets: np.ndarray, edge_ids: np.ndarray, n: int
+    ) -> None:
+        keys = sources.astype(np.int64) * n + targets
+        self.keys, first = np.unique(keys, return_index=True)
+        # For parallel edges, attribute lookups read the first edge:
+        self.edge_ids = edge_ids[first]
+        self.n = n
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.keys // n, minlength=n), out=self.indptr[1:])
+        self.indices = self.keys % n
+
+    def neighbors(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i] : self.indptr[i + 1]]
+
+    def positions(self, sources, targets) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the (u, v) pairs among the edges, as (found, position) arrays.
+        """
+        keys = np.asarray(sources, dtype=np.int64) * self.n + targets
+        positions = np.searchsorted(self.keys, keys)
+        clipped = np.minimum(positions, len(self.keys) - 1)
+        found = (positions < len(self.keys)) & (self.keys[clipped] == keys)
+        return found, clipped
+
+
+def _leapfrog_intersect(arrays: List[np.ndarray]) -> np.ndarray:
+    """
+    Intersect sorted arrays of node indices.
+
+    Starting from the smallest array, each candidate is sought in the next
+    array by binary search, and the survivors in the one after, as in the
+    leapfrog step of Leapfrog Triejoin. The cost is bounded by the smallest
+    array, not the largest, which is what keeps the join worst-case optimal.
+    The seeks for all candidates are done at once, with `np.searchsorted`.
+
+    """
+    arrays = sorted(arrays, key=len)
+    candidates = arrays[0]
+    for other in arrays[1:]:
+        if not len(candidates) or not len(other):
+            return candidates[:0]
+        positions = np.minimum(np.searchsorted(other, candidates), len(other) - 1)
+        candidates = candidates[other[positions] == candidates]
+    return candidates
+
+
+class LeapfrogExecutor(Executor):
+    """
+    A query executor that uses a worst-case optimal join (Leapfrog Triejoin).
+
+    Rather than joining one motif edge at a time, which for cyclic motifs
+    such as triangles and cliques can produce far more partial matches than
+    final ones, this binds one motif node at a time. The candidates for each
+    motif node are the intersection of the sorted neighbor lists of all
+    motif nodes that are already bound to it by an edge. Node constraints,
+    negative edges and automorphism constraints are applied as filters on
+    the candidates, and edge constraints by searching only the host edges
+    that satisfy them.
+
+    Like the NetworkXExecutor, each match maps motif nodes to distinct host
+    nodes.
+
+    """
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Create a new LeapfrogExecutor.
+
+        Arguments:
+            graph (networkx.Graph): The host graph
+            snapshot (dotmotif.snapshot.GraphSnapshot): A host graph snapshot,
+                which may be used instead of `graph`
+
+        Returns:
+            None
+
+        """
+        if kwargs.get("graph") is not None:
+            graph: nx.Graph = kwargs["graph"]
+            self.ids: List[Hashable] = list(graph.nodes())
+            index = {node: i for i, node in enumerate(self.ids)}
+            edges = list(graph.edges(data=True))
+            self.directed: bool = graph.is_directed()
+            self._sources = np.fromiter(
+                (index[u] for u, _, _ in edges), dtype=np.int64, count=len(edges)
+            )
+            self._targets = np.fromiter(
+                (index[v] for _, v, _ in edges), dtype=np.int64, count=len(edges)
+            )
+            node_records = [attrs for _, attrs in graph.nodes(data=True)]
+            edge_records = [attrs for _, _, attrs in edges]
+            self._node_attribute = lambda key: np.array(
+                [r.get(key) for r in node_records], dtype=object
+            )
+            self._edge_attribute = lambda key: np.array(
+                [r.get(key) for r in edge_records], dtype=object
+            )
+        elif kwargs.get("snapshot") is not None:
+            snapshot: "GraphSnapshot" = kwargs["snapshot"]
+            self.ids = snapshot.ids
+            self.directed = snapshot.directed
+            self._sources = np.asarray(snapshot.edge_sources, dtype=np.int64)
+            self._targets = np.asarray(snapshot.edge_targets, dtype=np.int64)
+            node_names = snapshot.node_attribute_names()
+            edge_names = snapshot.edge_attribute_names()
+            self._node_attribute = lambda key: (
+                snapshot.node_attribute(key)
+                if key in node_names
+                else np.full(len(self.ids), None, dtype=object)
+            )
+            self._edge_attribute = lambda key: (
+                snapshot.edge_attribute(key)
+                if key in edge_names
+                else np.full(len(self._sources), None, dtype=object)
+            )
+        else:
+            raise ValueError(
+                "You must pass a `graph` or a `snapshot` to the LeapfrogExecutor "
+                "constructor."
+            )
+        self._adjacency: Dict[Any, _Adjacency] = {}
+        self._node_attributes: Dict[str, pd.Series] = {}
+        self._edge_attributes: Dict[str, pd.Series] = {}
+        self._node_masks: Dict[str, np.ndarray] = {}
+        self._loop_masks: Dict[int, np.ndarray] = {}
+        self._ranks: Optional[np.ndarray] = None
+
+    def _node_values(self, key: str) -> pd.Series:
+        if key not in self._node_attributes:
+            self._node_attributes[key] = pd.Series(self._node_attribute(key))
+        return self._node_attributes[key]
+
+    def _edge_values(self, key: str) -> pd.Series:
+        if key not in self._edge_attributes:
+            self._edge_attributes[key] = pd.Series(self._edge_attribute(key))
+        return self._edge_attributes[key]
+
+    def _edges(
+        self, directed: bool, reverse: bool = False, constraints: dict = None
+    ) -> _Adjacency:
+        """
+        Get the adjacency of the host edges that satisfy some edge constraints.
+
+        Adjacencies are built once for each combination of arguments.
+        """
+        cache_key = (directed, reverse, repr(constraints or {}))
+        if cache_key in self._adjacency:
+            return self._adjacency[cache_key]
+        sources, targets = self._sources, self._targets
+        edge_ids = np.arange(len(sources))
+        if constraints:
+            mask = np.ones(len(sources), dtype=bool)
+            for key, operators in constraints.items():
+                values = self._edge_values(key.strip('"'))
+                for operator, targets_ in operators.items():
+                    for value in targets_:
+                        mask &= _compare(values, operator, value)
+            sources, targets, edge_ids = sources[mask], targets[mask], edge_ids[mask]
+        if not directed:
+            sources, targets = (
+                np.concatenate([sources, targets]),
+                np.concatenate([targets, sources]),
+            )
+            edge_ids = np.concatenate([edge_ids, edge_ids])
+        if reverse:
+            sources, targets = targets, sources
+        adjacency = _Adjacency(sources, targets, edge_ids, len(self.ids))
+        self._adjacency[cache_key] = adjacency
+        return adjacency
+
+    @staticmethod
+    def _variable_order(motif: "dotmotif.Motif") -> List[str]:
+        """
+        Order the motif nodes to bind: start from the most constrained node,
+        then always bind the node with the most edges to those already bound.
+        """
+        motif_graph = motif.to_nx()
+        positive = nx.Graph(
+            [(u, v) for u, v, a in motif_graph.edges(data=True) if a["exists"]]
+        )
+        positive.add_nodes_from(motif_graph.nodes())
+        node_constraints = motif.list_node_constraints()
+
+        order: List[str] = []
+        remaining = set(positive.nodes())
+        while remaining:
+            node = max(
+                sorted(remaining),
+                key=lambda n: (
+                    sum(1 for m in positive.neighbors(n) if m in order),
+                    len(node_constraints.get(n, {})),
+                    positive.degree(n),
+                ),
+            )
+            order.append(node)
+            remaining.remove(node)
+        return order
+
+    def _plan(self, motif: "dotmotif.Motif") -> List[dict]:
+        """
+        For each motif node in binding order, collect the adjacencies to
+        intersect and the filters to apply once it is bound.
+        """
+        directed = self.directed and not motif.ignore_direction
+        order = self._variable_order(motif)
+        depth = {node: i for i, node in enumerate(order)}
+        edge_constraints = motif.list_edge_constraints()
+        node_constraints = motif.list_node_constraints()
+
+        steps = [
+            {
+                "node": node,
+                "neighbors": [],
+                "negative": [],
+                "node_constraints": node_constraints.get(node, {}),
+                "self_loops": [],
+                "dynamic_nodes": [],
+                "dynamic_edges": [],
+                "automorphisms": [],
+            }
+            for node in order
+        ]
+        for u, v, attrs in motif.to_nx().edges(data=True):
+            if u == v:
+                # A self-loop only filters the host nodes that u can bind to:
+                exists = attrs["exists"]
+                constraints = edge_constraints.get((u, v)) if exists else None
+                adjacency = self._edges(directed, constraints=constraints)
+                steps[depth[u]]["self_loops"].append((adjacency, exists))
+                continue
+            # Whichever end is bound later gets its candidates from the other:
+            later, earlier = (v, u) if depth[v] > depth[u] else (u, v)
+            reverse = later == u
+            if attrs["exists"]:
+                adjacency = self._edges(directed, reverse, edge_constraints.get((u, v)))
+                steps[depth[later]]["neighbors"].append((depth[earlier], adjacency))
+            else:
+                adjacency = self._edges(directed, reverse)
+                steps[depth[later]]["negative"].append((depth[earlier], adjacency))
+
+        for node, constraints in motif.list_dynamic_node_constraints().items():
+            for key, operators in constraints.items():
+                for operator, others in operators.items():
+                    for other, other_key in others:
+                        later = max(depth[node], depth[other])
+                        steps[later]["dynamic_nodes"].append(
+                            (depth[node], key, operator, depth[other], other_key)
+                        )
+
+        for (u, v), constraints in motif.list_dynamic_edge_constraints().items():
+            for key, operators in constraints.items():
+                for operator, (other_u, other_v, other_key) in operators.items():
+                    later = max(depth[n] for n in (u, v, other_u, other_v))
+                    steps[later]["dynamic_edges"].append(
+                        (
+                            (depth[u], depth[v], key),
+                            operator,
+                            (depth[other_u], depth[other_v], other_key),
+                            self._edges(directed),
+                        )
+                    )
+
+        if motif.exclude_automorphisms:
+            for a, b in motif.list_automorphisms():
+                steps[max(depth[a], depth[b])]["automorphisms"].append(
+                    (depth[a], depth[b])
+                )
+        return steps
+
+    def _node_mask(self, constraints: dict) -> np.ndarray:
+        """
+        Get which host nodes satisfy a motif node's static constraints.
+        """
+        cache_key = repr(constraints)
+        if cache_key not in self._node_masks:
+            mask = np.ones(len(self.ids), dtype=bool)
+            for key, operators in constraints.items():
+                values = self._node_values(key)
+                for operator, targets in operators.items():
+                    for value in targets:
+                        mask &= _compare(values, operator, value)
+            self._node_masks[cache_key] = mask
+        return self._node_masks[cache_key]
+
+    def _self_loop_mask(self, adjacency: _Adjacency) -> np.ndarray:
+        """
+        Get which host nodes have a self-loop among the edges of an adjacency.
+        """
+        if id(adjacency) not in self._loop_masks:
+            nodes = np.arange(len(self.ids))
+            self._loop_masks[id(adjacency)], _ = adjacency.positions(nodes, nodes)
+        return self._loop_masks[id(adjacency)]
+
+    def _candidates(self, step: dict, bound: List[Any]) -> np.ndarray:
+        """
+        Get the host nodes that the motif node of `step` can be bound to.
+
+        `bound` holds the host node indices bound to the motif nodes before
+        it. The result is filtered for everything that can be checked now.
+        """
+        candidates = self._matching_nodes(step, bound)
+        if len(candidates) and self._has_pairwise_filters(step):
+            candidates = candidates[self._pairwise_mask(step, bound, candidates)]
+        return candidates
+
+    def _count_candidates(self, step: dict, bound: List[Any]) -> int:
+        return len(self._candidates(step, bound))
+
+    @staticmethod
+    def _has_pairwise_filters(step: dict) -> bool:
+        return bool(
+            step["dynamic_nodes"] or step["dynamic_edges"] or step["automorphisms"]
+        )
+
+    def _matching_nodes(self, step: dict, bound: List[Any]) -> np.ndarray:
+        """
+        Intersect the neighbors of the bound nodes, and drop candidates that
+        are already bound, are joined by a negative edge, or fail a static
+        node constraint.
+        """
+        if step["neighbors"]:
+            candidates = _leapfrog_intersect(
+                [adjacency.neighbors(bound[i]) for i, adjacency in step["neighbors"]]
+            )
+        else:
+            candidates = np.arange(len(self.ids))
+        if not len(candidates):
+            return candidates
+
+        # Injectivity:
+        candidates = candidates[~np.isin(candidates, bound)]
+        for i, adjacency in step["negative"]:
+            candidates = candidates[
+                ~np.isin(candidates, adjacency.neighbors(bound[i]), assume_unique=True)
+            ]
+        if step["node_constraints"]:
+            candidates = candidates[
+                self._node_mask(step["node_constraints"])[candidates]
+            ]
+        for adjacency, exists in step["self_loops"]:
+            has_loop = self._self_loop_mask(adjacency)[candidates]
+            candidates = candidates[has_loop if exists else ~has_loop]
+        return candidates
+
+    def _pairwise_mask(
+        self, step: dict, bound: List[Any], candidates: np.ndarray
+    ) -> np.ndarray:
+        """
+        Check the dynamic and automorphism constraints of each candidate.
+        """
+        mask = np.ones(len(candidates), dtype=bool)
+
+        def _at(i: int) -> np.ndarray:
+            # The host node bound at depth i, for each candidate:
+            return np.broadcast_to(candidates if i == len(bound) else bound[i], n)
+
+        def _values(values: pd.Series, positions: np.ndarray) -> pd.Series:
+            return values.iloc[positions].reset_index(drop=True)
+
+        n = len(candidates)
+        for i, key, operator, j, other_key in step["dynamic_nodes"]:
+            mask &= _compare(
+                _values(self._node_values(key), _at(i)),
+                operator,
+                _values(self._node_values(other_key), _at(j)),
+            )
+
+        for this, operator, that, adjacency in step["dynamic_edges"]:
+            sides = []
+            for u, v, key in (this, that):
+                _, positions = adjacency.positions(_at(u), _at(v))
+                edge_ids = adjacency.edge_ids[positions]
+                sides.append(_values(self._edge_values(key), edge_ids))
+            mask &= _compare(sides[0], operator, sides[1])
+
+        for a, b in step["automorphisms"]:
+            ranks = pd.Series(self._id_ranks())
+            mask &= _compare(_values(ranks, _at(a)), "<=", _values(ranks, _at(b)))
+        return mask
+
+    def _id_ranks(self) -> np.ndarray:
+        """
+        The rank of each node's original ID, for automorphism constraints.
+        """
+        if self._ranks is None:
+            order = sorted(range(len(self.ids)), key=lambda i: self.ids[i])
+            self._ranks = np.empty(len(self.ids), dtype=np.int64)
+            self._ranks[order] = np.arange(len(self.ids))
+        return self._ranks
+
+    def _search(self, motif: "dotmotif.Motif", limit: Optional[int], count_only: bool):
+        steps = self._plan(motif)
+        results: List[Dict[str, Hashable]] = []
+        total = 0
+        bound: List[Any] = []
+
+        def _extend() -> bool:
+            nonlocal total
+            step = steps[len(bound)]
+            if len(bound) == len(steps) - 1 and count_only and limit is None:
+                total += self._count_candidates(step, bound)
+                return False
+            candidates = self._candidates(step, bound)
+            for candidate in candidates:
+                bound.append(int(candidate))
+                if len(bound) == len(steps):
+                    total += 1
+                    if not count_only:
+                        results.append(
+                            {s["node"]: self.ids[i] for s, i in zip(steps, bound)}
+                        )
+                    done = limit is not None and total >= limit
+                else:
+                    done = _extend()
+                bound.pop()
+                if done:
+                    return True
+            return False
+
+        if steps:
+            _extend()
+        return total if count_only else results
+
+    def count(self, motif: "dotmotif.Motif", limit: Optional[int] = None) -> int:
+        """
+        Count the occurrences of a motif in the host graph.
+
+        Matches are counted without being enumerated, where possible.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to count
+            limit (int: None): Stop counting at this many matches
+
+        Returns:
+            int: The number of matches
+
+        """
+        return self._search(motif, limit, count_only=True)
+
+    def find(
+        self, motif: "dotmotif.Motif", limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find a motif in the host graph.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to search for
+            limit (int: None): The maximum number of matches to return
+
+        Returns:
+            List[dict]: One mapping from motif node to host node per match
+
+        """
+        return self._search(motif, limit, count_only=False)
@@ -14,10 +14,19 @@ See the License for the specific language governing permissions and
 limitations under the License.`
 """
 
-from itertools import product
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from itertools import islice, product
+import re
+import uuid
+
+import networkx as nx
+import numpy as np
+import pandas as pd
 
 try:
     from py2neo import Graph
+    from py2neo.integration import Table
 except ImportError:
     raise ImportError(
         "The Neo4jExecutor requires the `py2neo` package. "
@@ -25,12 +34,12 @@ except ImportError:
     )
 
 # Types only:
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set, Tuple
 
 if TYPE_CHECKING:
     from .. import dotmotif
 
-from .Executor import Executor
+from .Executor import Executor, QueryCancelledError, QueryTimeoutError
 
 
 def _remapped_operator(op):
@@ -106,6 +115,223 @@ _DEFAULT_ENTITY_LABELS = {
 }
 
 
+# Operators that a node property index can serve with a seek:
+_INDEXABLE_OPERATORS = ("=", "==", "in", "<", "<=", ">", ">=")
+
+
+def _escaped_name(name: str) -> str:
+    """
+    Escape a label, property or index name with backticks.
+    """
+    return "`{}`".format(name.replace("`", "``"))
+
+
+def _index_name(label: str, attribute_name: str) -> str:
+    """
+    Derive a unique index name from a node label and attribute.
+    """
+    return "dotmotif_{}_{}".format(
+        re.sub(r"\W", "_", label or "node"),
+        re.sub(r"\W", "_", attribute_name),
+    )
+
+
+def _most_constrained_node(motif: "dotmotif.Motif") -> str:
+    """
+    Pick the motif node with the most constraints (ties go to higher degree).
+
+    This is a cheap proxy for the most selective node, which is the best
+    place to start (or partition) a search.
+    """
+    motif_graph = motif.to_nx()
+    node_constraints = motif.list_node_constraints()
+
+    def _constraint_count(n):
+        return sum(
+            len(values)
+            for operators in node_constraints.get(n, {}).values()
+            for values in operators.values()
+        )
+
+    return max(
+        motif_graph.nodes(),
+        key=lambda n: (_constraint_count(n), motif_graph.degree(n)),
+    )
+
+
+# Plan operators that are usually the reason a motif search is slow:
+_PLAN_WARNINGS = {
+    "AllNodesScan": "reads every node in the database",
+    "NodeByLabelScan": "reads every node with this label; "
+    "an index on a constrained property may avoid this",
+    "CartesianProduct": "combines every row of one part of the pattern "
+    "with every row of another",
+}
+
+
+def _table(cursor):
+    return cursor.to_table()
+
+
+def _evaluate(cursor):
+    return cursor.evaluate()
+
+
+def _plan_tree(plan: dict) -> dict:
+    """
+    Convert a plan from the Bolt result metadata into a plain dict tree.
+    """
+    args = plan.get("args", {})
+    return {
+        # Neo4j 5 suffixes operator names with the runtime, as in "Filter@neo4j":
+        "operator": plan.get("operatorType", "").split("@")[0],
+        "identifiers": list(plan.get("identifiers", [])),
+        "details": args.get("Details"),
+        "estimated_rows": args.get("EstimatedRows"),
+        "rows": plan.get("rows", args.get("Rows")),
+        "db_hits": plan.get("dbHits", args.get("DbHits")),
+        "children": [_plan_tree(child) for child in plan.get("children", [])],
+    }
+
+
+class _CypherQuery:
+    """
+    A Cypher query under construction.
+
+    MATCH patterns, WHERE predicates and query parameters are kept apart so
+    that the same motif can be rendered as a find, a count, and so on.
+
+    If `parameterize` is set, constraint values are emitted as `$parameter`
+    placeholders (collected in `parameters`) rather than written into the
+    query text, so that Neo4j can reuse a cached plan when only the values
+    change. Property names are then written as backtick-escaped property
+    lookups rather than as quoted map keys.
+
+    """
+
+    def __init__(self, parameterize: bool = False, parameter_prefix: str = "p"):
+        self.parameterize = parameterize
+        self.parameter_prefix = parameter_prefix
+        self.parameters: Dict[str, Any] = {}
+        self.matches: List[str] = []
+        self.conditions: List[str] = []
+        # Static predicates on each motif node, as (key, operator, predicate):
+        self.node_conditions: Dict[str, List[Tuple[str, str, str]]] = {}
+        # The pattern and static predicates of each positive motif edge:
+        self.node_label = ""
+        self.edge_patterns: Dict[Tuple[str, str], str] = {}
+        self.edge_conditions: Dict[Tuple[str, str], List[str]] = {}
+        # The node bound by a leading (hinted) MATCH clause, if any:
+        self.start: Optional[str] = None
+
+    def value(self, value: Any) -> str:
+        """
+        Render a constraint value, either inline or as a $parameter.
+        """
+        if not self.parameterize:
+            return "{}".format(f'"{value}"' if isinstance(value, str) else value)
+        name = f"{self.parameter_prefix}{len(self.parameters)}"
+        self.parameters[name] = value
+        return f"${name}"
+
+    def property(self, variable: str, key: str) -> str:
+        """
+        Render a property lookup on a node or relationship variable.
+        """
+        if not self.parameterize:
+            return "{}[{}]".format(variable, _quoted_if_necessary(key))
+        return "{}.`{}`".format(variable, key.replace("`", "``"))
+
+    def comparison(self, left: str, operator: str, right: str) -> str:
+        return (
+            "NOT ({} {} {})" if _operator_negation_infix(operator) else "{} {} {}"
+        ).format(left, _remapped_operator(operator), right)
+
+
+# The errors raised by servers that do not know a statement or procedure:
+_UNSUPPORTED_STATEMENT_CODES = {
+    "Neo.ClientError.Statement.SyntaxError",
+    "Neo.ClientError.Procedure.ProcedureNotFound",
+}
+
+
+class QueryHandle:
+    """
+    A Cypher query running in the background.
+
+    The query text is tagged with a unique comment (`token`), so that the
+    query's transaction can be found and terminated on the server. Records
+    that have arrived so far are kept in `records`, unless a `consume`
+    function reads the cursor instead.
+
+    """
+
+    def __init__(
+        self,
+        executor: "Neo4jExecutor",
+        cypher: str,
+        parameters: dict = None,
+        consume=None,
+    ) -> None:
+        self.token = "dotmotif:" + uuid.uuid4().hex
+        self.records: List[Any] = []
+        self.cancelled = False
+        self._executor = executor
+        self._consume = consume
+        pool = ThreadPoolExecutor(max_workers=1)
+        self._future = pool.submit(
+            self._run, "/* {} */ {}".format(self.token, cypher), parameters
+        )
+        pool.shutdown(wait=False)
+
+    def _run(self, cypher: str, parameters: Optional[dict]):
+        cursor = self._executor.G.run(cypher, parameters)
+        if self._consume is not None:
+            return self._consume(cursor)
+        for record in cursor:
+            self.records.append(record)
+        return self.records
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancel(self) -> bool:
+        """
+        Terminate the query's transaction on the server.
+
+        Returns:
+            bool: False if the query had already finished
+
+        """
+        if self._future.done():
+            return False
+        self.cancelled = True
+        self._executor._terminate(self.token)
+        return True
+
+    def result(self, timeout: Optional[float] = None):
+        """
+        Wait for the query's result.
+
+        If the query does not finish within `timeout` seconds, it is
+        terminated on the server and a QueryTimeoutError is raised, with any
+        records that had already arrived in its `partial` attribute.
+        """
+        try:
+            return self._future.result(timeout)
+        except FutureTimeoutError:
+            self.cancel()
+            raise QueryTimeoutError(
+                f"The query did not finish within {timeout} seconds, "
+                "and was terminated on the server.",
+                partial=list(self.records),
+            ) from None
+        except Exception as e:
+            if self.cancelled:
+                raise QueryCancelledError("The query was cancelled.") from e
+            raise
+
+
 class Neo4jExecutor(Executor):
     """
     A Neo4j executor that runs Cypher queries against a running Neo4j database.
@@ -141,6 +367,22 @@ class Neo4jExecutor(Executor):
             password (str): The password to use to attach to an existing server.
             entity_labels (dict: _DEFAULT_ENTITY_LABELS): The set of labels to
                 expect for nodes and edges.
+            planner_hints (bool: False): Whether to start searches from the
+                most selective motif node with a `USING INDEX` (or, if it has
+                no indexed constraints, `USING SCAN`) planner hint.
+            unique_relationships (bool: False): Whether the database holds at
+                most one relationship of each type from one node to another
+                (as graphs imported with the NetworkXIngester do). This lets
+                `count` skip deduplicating matches, and count the matches of
+                leaf motif nodes instead of enumerating them.
+            optimize_patterns (bool: False): Whether to write motifs as one
+                MATCH of connected paths, with inline property filters and
+                `NOT EXISTS {}` negative edges, instead of one MATCH clause
+                per edge. See `Neo4jExecutor._build_optimized_query`.
+            timeout (float: None): The default timeout, in seconds, for
+                queries that return a complete result (`run`, `find`, `count`
+                and friends). Queries that run over time are terminated on
+                the server and raise a QueryTimeoutError.
 
         """
         db_bolt_uri: str = kwargs.get("db_bolt_uri", None)
@@ -148,6 +390,12 @@ class Neo4jExecutor(Executor):
         password: Optional[str] = kwargs.get("password", None)
         graph: Graph = kwargs.get("graph", None)
         self._entity_labels = kwargs.get("entity_labels", _DEFAULT_ENTITY_LABELS)
+        self._planner_hints: bool = kwargs.get("planner_hints", False)
+        self._unique_relationships: bool = kwargs.get("unique_relationships", False)
+        self._optimize_patterns: bool = kwargs.get("optimize_patterns", False)
+        self._timeout: Optional[float] = kwargs.get("timeout", None)
+        self._indexes: Optional[Set[Tuple[str, str]]] = None
+        self._version: Optional[Tuple[int, ...]] = None
 
         if db_bolt_uri and username and password:
             # Authentication information was provided. Use this to log in and
@@ -169,20 +417,281 @@ class Neo4jExecutor(Executor):
         except Exception as e:
             raise ValueError(f"Could not connect to graph {db_bolt_uri}.") from e
 
-    def create_index(self, attribute_name: str):
+    def create_index(self, attribute_name: str, index_name: Optional[str] = None):
         """
         Create a new index on the given node attribute.
 
         Note that edge attributes are NOT supported.
+
+        Arguments:
+            attribute_name (str): The node attribute to index
+            index_name (str: None): The name of the index. Defaults to a name
+                derived from the node label and attribute, so that indexes on
+                different attributes do not collide.
+
         """
+        label = self._entity_labels["node"]
+        index_name = index_name or _index_name(label, attribute_name)
         self.run(
             f"""
-        CREATE INDEX index_name IF NOT EXISTS FOR (n:{self._entity_labels["node"]})
-        ON (n.{attribute_name})
+        CREATE INDEX {_escaped_name(index_name)} IF NOT EXISTS
+        FOR (n:{_escaped_name(label)})
+        ON (n.{_escaped_name(attribute_name)})
+        """
+        )
+        self._indexes = None
+
+    def existing_indexes(self, refresh: bool = False) -> Set[Tuple[str, str]]:
+        """
+        Get the single-property node indexes in the database.
+
+        The result is cached; pass `refresh=True` to query the server again.
+
+        Returns:
+            Set[Tuple[str, str]]: A set of (label, property) pairs
+
+        """
+        if self._indexes is None or refresh:
+            try:
+                rows = self.G.run(
+                    "SHOW INDEXES YIELD labelsOrTypes, properties, entityType "
+                    "WHERE entityType = 'NODE' "
+                    "RETURN labelsOrTypes, properties"
+                ).to_table()
+            except Exception:
+                # Servers older than Neo4j 4.2 do not support SHOW INDEXES:
+                rows = self.G.run(
+                    "CALL db.indexes() YIELD labelsOrTypes, properties "
+                    "RETURN labelsOrTypes, properties"
+                ).to_table()
+            self._indexes = {
+                (labels[0], properties[0])
+                for labels, properties in rows
+                if labels and properties and len(properties) == 1
+            }
+        return self._indexes
+
+    def recommend_indexes(self, motif: "dotmotif.Motif") -> List[str]:
+        """
+        List the node attributes that a motif constrains with an operator
+        that a property index can serve (equality, IN, and ranges).
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to inspect
+
+        Returns:
+            List[str]: The node attributes that would benefit from an index
+
+        """
+        return sorted(
+            {
+                key
+                for constraints in motif.list_node_constraints().values()
+                for key, operators in constraints.items()
+                if any(op in _INDEXABLE_OPERATORS for op in operators)
+            }
+        )
+
+    def ensure_indexes(
+        self, motif: "dotmotif.Motif", create: bool = False
+    ) -> List[str]:
+        """
+        Find (and optionally create) the indexes a motif search is missing.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to inspect
+            create (bool: False): Whether to create the missing indexes. This
+                requires an account with schema-write privileges.
+
+        Returns:
+            List[str]: The node attributes that were missing an index
+
+        """
+        label = self._entity_labels["node"]
+        existing = self.existing_indexes()
+        missing = [
+            key for key in self.recommend_indexes(motif) if (label, key) not in existing
+        ]
+        if create:
+            for key in missing:
+                self.create_index(key)
+        return missing
+
+    def load_graph(
+        self,
+        graph: nx.Graph,
+        batch_size: int = 10_000,
+        workers: int = 1,
+        id_property: str = "neuronId",
+        edge_type: Optional[str] = None,
+        retries: int = 2,
+    ) -> Dict[str, int]:
+        """
+        Write a networkx graph into the (running) database.
+
+        A uniqueness constraint on the node ID property is created first, so
+        that edges can look up their endpoints with an index seek. Then the
+        nodes, and after them the edges, are sent in batches of `batch_size`
+        rows, each batch as one `UNWIND ... CREATE` transaction. With more
+        than one worker, batches are written concurrently; a batch that
+        fails (for example, on a lock deadlock between two edge batches) is
+        retried up to `retries` times.
+
+        This requires an account with write (and schema) privileges. For an
+        offline bulk import, see `NetworkXIngester` instead.
+
+        Arguments:
+            graph (nx.Graph): The graph to load. Node and edge attributes
+                are stored as properties.
+            batch_size (int: 10000): The number of rows per transaction
+            workers (int: 1): The number of concurrent writer sessions
+            id_property (str: "neuronId"): The node property to store the
+                networkx node ID in
+            edge_type (str: None): The relationship type to create. Defaults
+                to the executor's default edge label.
+            retries (int: 2): The number of times to retry a failed batch
+
+        Returns:
+            Dict[str, int]: The number of nodes and relationships created
+
+        """
+        label = _escaped_name(self._entity_labels["node"])
+        edge_type = _escaped_name(
+            edge_type
+            or self._entity_labels["edge"][self._entity_labels["edge"]["DEFAULT"]]
+        )
+        key = _escaped_name(id_property)
+
+        constraint_name = _escaped_name(
+            _index_name(self._entity_labels["node"], id_property)
+        )
+        try:
+            self.G.run(
+                f"CREATE CONSTRAINT {constraint_name} IF NOT EXISTS "
+                f"FOR (n:{label}) REQUIRE n.{key} IS UNIQUE"
+            )
+        except Exception:
+            # Servers older than Neo4j 4.4 use the ON ... ASSERT syntax:
+            self.G.run(
+                f"CREATE CONSTRAINT {constraint_name} IF NOT EXISTS "
+                f"ON (n:{label}) ASSERT n.{key} IS UNIQUE"
+            )
+        self._indexes = None
+
+        def _write(cypher: str, rows: Iterator[dict]) -> int:
+            def _write_batch(batch: List[dict]) -> int:
+                for attempt in range(retries + 1):
+                    try:
+                        self.G.run(cypher, {"rows": batch})
+                        return len(batch)
+                    except Exception as e:
+                        if attempt == retries:
+                            raise RuntimeError(
+                                f"A batch of {len(batch)} rows failed "
+                                f"after {retries + 1} attempts."
+                            ) from e
+
+            batches = iter(lambda: list(islice(rows, batch_size)), [])
+            if workers == 1:
+                return sum(_write_batch(batch) for batch in batches)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return sum(pool.map(_write_batch, batches))
+
+        nodes = _write(
+            f"UNWIND $rows AS row CREATE (n:{label} {{{key}: row.id}}) "
+            "SET n += row.properties",
+            ({"id": n, "properties": a} for n, a in graph.nodes(data=True)),
+        )
+        relationships = _write(
+            f"UNWIND $rows AS row "
+            f"MATCH (u:{label} {{{key}: row.u}}) "
+            f"MATCH (v:{label} {{{key}: row.v}}) "
+            f"CREATE (u)-[r:{edge_type}]->(v) SET r += row.properties",
+            ({"u": u, "v": v, "properties": a} for u, v, a in graph.edges(data=True)),
+        )
+        return {"nodes": nodes, "relationships": relationships}
+
+    def _hinted_start(self, motif: "dotmotif.Motif", query: _CypherQuery) -> None:
+        """
+        Start the query from its most selective node, with a planner hint.
+
+        The chosen node is bound in a leading MATCH clause together with its
+        own predicates. If one of those predicates is on an indexed property,
+        the clause gets a `USING INDEX` hint so that the search begins with
+        an index seek; otherwise it gets `USING SCAN`.
         """
+        label = self._entity_labels["node"]
+        if not label:
+            # Index and scan hints both require a node label.
+            return
+        existing = self.existing_indexes()
+
+        def _indexed(n: str) -> List[Tuple[str, str]]:
+            return [
+                (key, operator)
+                for key, operator, _ in query.node_conditions.get(n, [])
+                if operator in _INDEXABLE_OPERATORS and (label, key) in existing
+            ]
+
+        def _selectivity(n: str) -> tuple:
+            indexed = _indexed(n)
+            return (
+                any(op in ("=", "==") for _, op in indexed),
+                len(indexed) > 0,
+                len(query.node_conditions.get(n, [])),
+                motif.to_nx().degree(n),
+            )
+
+        start = max(motif.to_nx().nodes(), key=_selectivity)
+        indexed = sorted(_indexed(start), key=lambda c: c[1] not in ("=", "=="))
+        if indexed:
+            hint = "USING INDEX {}:{}({})".format(
+                start, _escaped_name(label), _escaped_name(indexed[0][0])
+            )
+        else:
+            hint = "USING SCAN {}:{}".format(start, _escaped_name(label))
+
+        predicates = [p for _, _, p in query.node_conditions.get(start, [])]
+        for predicate in predicates:
+            if predicate in query.conditions:
+                # (Optimized patterns write equality constraints inline.)
+                query.conditions.remove(predicate)
+        query.node_conditions.pop(start, None)
+        query.start = start
+        query.matches.insert(
+            0,
+            "MATCH ({}:{}) {}".format(start, _escaped_name(label), hint)
+            + (" WHERE " + " AND ".join(predicates) if predicates else ""),
         )
 
-    def run(self, cypher: str, cursor=True):
+    def _parameterized_query(
+        self, motif: "dotmotif.Motif", parameter_prefix: str = "p", hints: bool = True
+    ) -> _CypherQuery:
+        """
+        Build a parameterized query for this executor's database.
+
+        Planner hints (if enabled) can be turned off with `hints=False` for
+        queries that choose their own starting node.
+        """
+        query = self._build_query(
+            motif,
+            self._entity_labels,
+            parameterize=True,
+            parameter_prefix=parameter_prefix,
+            optimize=self._optimize_patterns,
+            unique_relationships=self._unique_relationships,
+        )
+        if hints and self._planner_hints:
+            self._hinted_start(motif, query)
+        return query
+
+    def run(
+        self,
+        cypher: str,
+        cursor=True,
+        parameters: dict = None,
+        timeout: Optional[float] = None,
+    ):
         """
         Run an arbitrary cypher command.
 
@@ -190,59 +699,980 @@ class Neo4jExecutor(Executor):
 
         Arguments:
             cypher (str): The command to run
+            cursor (bool: True): Whether to return a cursor instead of a table
+            parameters (dict: None): Query parameters to send with the query
+            timeout (float: None): A timeout in seconds (defaults to the
+                executor's timeout). With a timeout, the results are read in
+                full before returning, so a list of records is returned
+                instead of a cursor.
 
         Returns:
             The result of the cypher query (py2neo.Table)
 
         """
-        if not cursor:
-            return self.G.run(cypher).to_table()
-        return self.G.run(cypher)
+        return self._execute(cypher, parameters, timeout, None if cursor else _table)
+
+    def submit(self, cypher: str, parameters: dict = None, consume=None) -> QueryHandle:
+        """
+        Start a cypher command in the background.
+
+        The returned handle can be waited on with `result(timeout)`, or used
+        to terminate the query on the server with `cancel()`, for example
+        from another thread.
+
+        Arguments:
+            cypher (str): The command to run
+            parameters (dict: None): Query parameters to send with the query
+            consume (callable: None): A function that reads the result from
+                the py2neo cursor. By default, all records are collected.
+
+        Returns:
+            QueryHandle: A handle on the running query
+
+        """
+        return QueryHandle(self, cypher, parameters, consume)
+
+    def _execute(
+        self,
+        cypher: str,
+        parameters: Optional[dict],
+        timeout: Optional[float],
+        consume=None,
+    ):
+        """
+        Run a query, under a timeout if one is given or set on the executor.
+        """
+        timeout = self._timeout if timeout is None else timeout
+        if timeout is None:
+            cursor = self.G.run(cypher, parameters)
+            return cursor if consume is None else consume(cursor)
+        return self.submit(cypher, parameters, consume).result(timeout)
+
+    def _terminate(self, token: str) -> int:
+        """
+        Terminate the running transactions whose query contains `token`.
+        """
+        try:
+            ids = [
+                row[0]
+                for row in self.G.run(
+                    "SHOW TRANSACTIONS YIELD transactionId, currentQuery "
+                    "WHERE currentQuery CONTAINS $token RETURN transactionId",
+                    {"token": token},
+                ).to_table()
+            ]
+            if ids:
+                self.G.run("TERMINATE TRANSACTIONS $ids", {"ids": ids})
+            return len(ids)
+        except Exception as e:
+            # Servers older than Neo4j 4.4 can only kill individual queries.
+            # Anything else (such as a missing privilege) must not be hidden,
+            # since the query would keep running on the server:
+            if getattr(e, "code", None) not in _UNSUPPORTED_STATEMENT_CODES:
+                raise
+            return len(
+                self.G.run(
+                    "CALL dbms.listQueries() YIELD queryId, query "
+                    "WHERE query CONTAINS $token "
+                    "CALL dbms.killQuery(queryId) YIELD queryId AS killed "
+                    "RETURN killed",
+                    {"token": token},
+                ).to_table()
+            )
 
-    def count(self, motif: "dotmotif.Motif", limit=None) -> int:
+    def count(
+        self, motif: "dotmotif.Motif", limit=None, timeout: Optional[float] = None
+    ) -> int:
         """
         Count a motif in a larger graph.
 
+        If a `limit` is given, the search itself stops after that many
+        matches, so the result is at most `limit`. If the executor was created
+        with `unique_relationships=True`, matches are counted without being
+        deduplicated, and leaf motif nodes (nodes with one neighbor and no
+        constraints that involve other nodes) are counted per row with a
+        `COUNT {}` subquery rather than expanded into rows.
+
         Arguments:
             motif (dotmotif.Motif)
+            limit (int: None): The maximum count to return
+            timeout (float: None): A timeout in seconds (defaults to the
+                executor's timeout)
 
         """
-        qry = self.motif_to_cypher(
-            motif, count_only=True, static_entity_labels=self._entity_labels
-        )
+        qry, parameters = self._motif_query(motif, True, limit)
+        return int(self._execute(qry, parameters, timeout, _evaluate))
+
+    def count_many(
+        self,
+        motifs: List["dotmotif.Motif"],
+        limit: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> List[int]:
+        """
+        Count several motifs in a single query.
+
+        Each motif's count runs in its own `CALL {}` subquery, and the
+        subqueries are combined with `UNION ALL`, tagged with the motif's
+        position. This saves a network round trip and a planning step per
+        motif, and the motifs run back-to-back in one transaction.
+
+        Arguments:
+            motifs (List[dotmotif.Motif]): The motifs to count
+            limit (int: None): The maximum count to return for each motif
+            timeout (float: None): A timeout in seconds for the whole query
+
+        Returns:
+            List[int]: The count of each motif, in the order given
+
+        """
+        if not motifs:
+            return []
+        parts = []
+        parameters: Dict[str, Any] = {}
+        for i, motif in enumerate(motifs):
+            query = self._parameterized_query(motif, parameter_prefix=f"m{i}_p")
+            parts.append(
+                "CALL {{ {} }} RETURN {} AS motif, count".format(
+                    self._render_count(query, motif, limit), i
+                )
+            )
+            parameters.update(query.parameters)
+        counts = {
+            motif: count
+            for motif, count in self._execute(
+                "\nUNION ALL\n".join(parts), parameters, timeout, list
+            )
+        }
+        return [int(counts.get(i, 0)) for i in range(len(motifs))]
+
+    def find_many(
+        self,
+        motifs: List["dotmotif.Motif"],
+        limit: Optional[int] = None,
+        id_property: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> List[pd.DataFrame]:
+        """
+        Find several motifs in a single query.
+
+        The motifs' queries are combined with `UNION ALL`. Because each motif
+        has its own set of nodes, every match is returned as a motif tag and
+        a list of node IDs, which are split back into one table per motif.
+
+        Arguments:
+            motifs (List[dotmotif.Motif]): The motifs to search for
+            limit (int: None): A limit on the number of matches per motif
+            id_property (str: None): The node property to return as each
+                node's ID. Defaults to the internal Neo4j node ID.
+            timeout (float: None): A timeout in seconds for the whole query
+
+        Returns:
+            List[pd.DataFrame]: One table of matches per motif, in the order
+                given, with one column of node IDs per motif node
+
+        """
+        if not motifs:
+            return []
+        parts = []
+        parameters: Dict[str, Any] = {}
+        columns = []
+        for i, motif in enumerate(motifs):
+            query = self._parameterized_query(motif, parameter_prefix=f"m{i}_p")
+            columns.append([str(n) for n in motif.to_nx().nodes()])
+            ids = ", ".join(self._node_id(query, n, id_property) for n in columns[i])
+            qry = self._render_query(
+                query, motif, projection=[f"{i} AS motif", f"[{ids}] AS ids"]
+            )
+            if limit and not motif.limit:
+                qry += " LIMIT $limit"
+                parameters["limit"] = limit
+            parts.append(qry)
+            parameters.update(query.parameters)
+
+        matches: List[List[list]] = [[] for _ in motifs]
+        for motif, ids in self._execute(
+            "\nUNION ALL\n".join(parts), parameters, timeout, list
+        ):
+            matches[motif].append(ids)
+        return [
+            pd.DataFrame(rows, columns=motif_columns)
+            for rows, motif_columns in zip(matches, columns)
+        ]
+
+    def _server_version(self) -> Tuple[int, ...]:
+        """
+        Get the (major, minor) version of the Neo4j server, or () if unknown.
+        """
+        if self._version is None:
+            try:
+                version = self.G.run(
+                    "CALL dbms.components() YIELD name, versions "
+                    "WHERE name = 'Neo4j Kernel' RETURN versions[0]"
+                ).evaluate()
+                self._version = tuple(int(v) for v in re.findall(r"\d+", version)[:2])
+            except Exception:
+                self._version = ()
+        return self._version
+
+    def _distinct_matches(self, motif: "dotmotif.Motif") -> bool:
+        """
+        Whether every row of a motif's MATCH is already a distinct node tuple.
+
+        Each row binds one relationship per motif edge, so two rows can only
+        share their nodes if more than one relationship can join the same
+        nodes: in a multigraph, or in either direction when direction is
+        ignored.
+        """
+        return self._unique_relationships and not motif.ignore_direction
+
+    @staticmethod
+    def _countable_leaves(
+        motif: "dotmotif.Motif", query: _CypherQuery, exclude: Set[str] = frozenset()
+    ) -> Dict[str, Tuple[str, str]]:
+        """
+        Find the motif nodes whose matches can be counted, not enumerated.
+
+        A leaf sits on exactly one positive motif edge and is not mentioned
+        by any predicate other than its own static constraints and those of
+        its edge, so its matches only depend on its one neighbor (its parent).
+        Parents are never leaves themselves.
+
+        Returns:
+            Dict[str, Tuple[str, str]]: The motif edge of each leaf
+
+        """
+        if motif.enforce_inequality:
+            # Every node is compared with every other node.
+            return {}
+        motif_graph = motif.to_nx()
+        referenced = set(exclude) | {query.start}
+        for u, v, a in motif_graph.edges(data=True):
+            if not a["exists"]:
+                referenced.update((u, v))
+        for n, constraints in motif.list_dynamic_node_constraints().items():
+            referenced.add(n)
+            for operators in constraints.values():
+                for values in operators.values():
+                    referenced.update(that for that, _ in values)
+        for (u, v), constraints in motif.list_dynamic_edge_constraints().items():
+            referenced.update((u, v))
+            for operators in constraints.values():
+                for that_u, that_v, _ in operators.values():
+                    referenced.update((that_u, that_v))
+        for a, b in motif.list_automorphisms():
+            referenced.update((a, b))
+
+        leaves: Dict[str, Tuple[str, str]] = {}
+        for n in motif_graph.nodes():
+            edges = [edge for edge in query.edge_patterns if n in edge]
+            if n in referenced or len(edges) != 1 or edges[0][0] == edges[0][1]:
+                continue
+            u, v = edges[0]
+            if (v if u == n else u) not in leaves:
+                leaves[n] = (u, v)
+        return leaves
+
+    def _render_count(
+        self,
+        query: _CypherQuery,
+        motif: "dotmotif.Motif",
+        limit: Optional[int] = None,
+        exclude: Set[str] = frozenset(),
+    ) -> str:
+        """
+        Assemble a built query into a count statement.
+
+        With a limit, the matches are found (and deduplicated if necessary)
+        in a `CALL {}` subquery that stops at the limit. Without one, matches
+        are only deduplicated if `_distinct_matches` cannot rule duplicates
+        out; if it can, leaf nodes are counted per row of the remaining
+        pattern, with `COUNT {}` on Neo4j 5.3+ and a pattern comprehension on
+        older servers. Nodes in `exclude` are never counted as leaves.
+        """
+        delim = "\n" if motif.pretty_print else " "
+        nodes = list(motif.to_nx().nodes())
+        distinct = self._distinct_matches(motif)
+        limit = limit or motif.limit
+
         if limit:
-            qry += f" LIMIT {limit}"
-        return int(self.G.run(qry).to_ndarray())
+            return delim.join(
+                [
+                    "CALL {",
+                    *self._render_match(query, delim),
+                    ("RETURN " if distinct else "RETURN DISTINCT ") + ",".join(nodes),
+                    "LIMIT " + query.value(limit),
+                    "}",
+                    "RETURN count(*) AS count",
+                ]
+            )
+        if not distinct:
+            return delim.join(
+                [
+                    *self._render_match(query, delim),
+                    "WITH DISTINCT " + ",".join(nodes),
+                    "RETURN count(*) AS count",
+                ]
+            )
+        count = self._count_expression(query, motif, exclude)
+        return delim.join(
+            [*self._render_match(query, delim), f"RETURN {count} AS count"]
+        )
+
+    def _count_expression(
+        self,
+        query: _CypherQuery,
+        motif: "dotmotif.Motif",
+        exclude: Set[str] = frozenset(),
+    ) -> str:
+        """
+        Take the countable leaves out of a query, and return the aggregate
+        that counts the matches of the rest of the query and the leaves.
 
-    def find(self, motif: "dotmotif.Motif", limit=None, cursor=True):
+        This assumes that `_distinct_matches` holds for the motif.
+        """
+        leaves = self._countable_leaves(motif, query, exclude)
+        factors = []
+        parents = set()
+        for leaf, (u, v) in leaves.items():
+            parent = v if u == leaf else u
+            parents.add(parent)
+            pattern = query.edge_patterns.pop((u, v))
+            query.matches.remove("MATCH " + pattern)
+            # The parent is already bound, so it needs no label in the subquery:
+            pattern = pattern.replace(
+                "({}{})".format(parent, query.node_label), "({})".format(parent), 1
+            )
+            predicates = [p for _, _, p in query.node_conditions.pop(leaf, [])]
+            predicates += query.edge_conditions.pop((u, v), [])
+            for predicate in predicates:
+                query.conditions.remove(predicate)
+            where = (" WHERE " + " AND ".join(predicates)) if predicates else ""
+            if self._server_version() >= (5, 3):
+                factors.append("COUNT {{ {}{} }}".format(pattern, where))
+            else:
+                factors.append("size([{}{} | 1])".format(pattern, where))
+
+        bound = {n for edge in query.edge_patterns for n in edge} | {query.start}
+        for parent in sorted(parents - bound):
+            query.matches.append("MATCH ({}{})".format(parent, query.node_label))
+
+        return "sum({})".format(" * ".join(factors)) if factors else "count(*)"
+
+    def count_by(
+        self,
+        motif: "dotmotif.Motif",
+        keys: List[str],
+        timeout: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """
+        Count the matches of a motif per combination of node attributes.
+
+        The grouping and counting happen in the database, so only the table
+        of counts is sent back. Leaf nodes that are not grouped on are
+        counted rather than enumerated, as in `count`.
+
+            E.count_by(motif, ["A.type", "B.type"])
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to count
+            keys (List[str]): The attributes to group by, each written as
+                `<motif node>.<attribute>`
+            timeout (float: None): A timeout in seconds
+
+        Returns:
+            pd.DataFrame: One column per key and a `count` column, with one
+                row per combination of values, in descending order of count
+
+        """
+        nodes = list(motif.to_nx().nodes())
+        query = self._parameterized_query(motif)
+        groups = []
+        for key in keys:
+            node, _, attribute = key.partition(".")
+            if node not in nodes or not attribute:
+                raise ValueError(
+                    f"Group-by key {key} must be of the form <motif node>.<attribute>."
+                )
+            groups.append(
+                "{} AS {}".format(query.property(node, attribute), _escaped_name(key))
+            )
+
+        delim = "\n" if motif.pretty_print else " "
+        if self._distinct_matches(motif):
+            count = self._count_expression(
+                query, motif, exclude={key.partition(".")[0] for key in keys}
+            )
+            clauses = self._render_match(query, delim)
+        else:
+            count = "count(*)"
+            clauses = [
+                *self._render_match(query, delim),
+                "WITH DISTINCT " + ",".join(nodes),
+            ]
+        clauses.append("RETURN " + ", ".join([*groups, f"{count} AS count"]))
+        clauses.append("ORDER BY count DESC")
+        rows = self._execute(delim.join(clauses), query.parameters, timeout, list)
+        return pd.DataFrame([tuple(row) for row in rows], columns=[*keys, "count"])
+
+    def find(
+        self,
+        motif: "dotmotif.Motif",
+        limit=None,
+        cursor=True,
+        timeout: Optional[float] = None,
+    ):
         """
         Find a motif in a larger graph.
 
+        Constraint values are sent as query parameters, so repeated searches
+        for the same motif with different values reuse Neo4j's cached plan.
+
         Arguments:
             motif (dotmotif.Motif)
+            timeout (float: None): A timeout in seconds (defaults to the
+                executor's timeout). With a timeout, the matches are read in
+                full before returning, so a list of records (or, with
+                `cursor=False`, a table) is returned instead of a cursor. If
+                the timeout expires, the matches found so far are in the
+                QueryTimeoutError's `partial`.
 
         """
-        qry = self.motif_to_cypher(motif, static_entity_labels=self._entity_labels)
+        qry, parameters = self._motif_query(motif, False, limit)
+        result = self._execute(qry, parameters, timeout)
+        if cursor:
+            return result
+        if isinstance(result, list):
+            # Under a timeout, records are read one at a time (so that they
+            # can be kept as partial results), and tabulated afterwards:
+            return Table(result, keys=[str(n) for n in motif.to_nx().nodes()])
+        return result.to_table()
+
+    def _motif_query(
+        self, motif: "dotmotif.Motif", count_only: bool, limit: Optional[int]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the query (and parameters) that `count` or `find` would run.
+        """
+        query = self._parameterized_query(motif)
+        if count_only:
+            return self._render_count(query, motif, limit), query.parameters
+        qry, parameters = self._render_query(query, motif), query.parameters
         if limit:
-            qry += f" LIMIT {limit}"
-        if not cursor:
-            return self.G.run(qry).to_table()
-        return self.G.run(qry)
+            qry += " LIMIT $limit"
+            parameters["limit"] = limit
+        return qry, parameters
+
+    def explain(
+        self,
+        motif: "dotmotif.Motif",
+        count_only: bool = False,
+        limit=None,
+        timeout: Optional[float] = None,
+    ) -> dict:
+        """
+        Get the plan the database would use to find (or count) a motif.
+
+        The query is planned but not run. Each operator in the returned tree
+        is a dict with its `operator` name, the `identifiers` it binds, its
+        `details` (e.g. the label or index it reads), `estimated_rows`, and
+        its `children`. Use `plan_warnings` to list the operators that
+        usually make a motif search slow.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to plan
+            count_only (bool: False): Plan the `count` query instead of `find`
+            limit (int: None): The limit to pass to `find` or `count`
+            timeout (float: None): A timeout in seconds
+
+        Returns:
+            dict: The root operator of the plan tree
+
+        """
+        qry, parameters = self._motif_query(motif, count_only, limit)
+        return self._execute("EXPLAIN " + qry, parameters, timeout, self._query_plan)
+
+    def profile(
+        self,
+        motif: "dotmotif.Motif",
+        count_only: bool = False,
+        limit=None,
+        timeout: Optional[float] = None,
+    ) -> dict:
+        """
+        Run a motif query with profiling, and get its executed plan.
+
+        This returns the same tree as `explain`, but every operator also has
+        the actual number of `rows` it produced and the `db_hits` it cost.
+        Note that the query is really run, and its results are discarded.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to profile
+            count_only (bool: False): Profile the `count` query instead of `find`
+            limit (int: None): The limit to pass to `find` or `count`
+            timeout (float: None): A timeout in seconds
+
+        Returns:
+            dict: The root operator of the plan tree
+
+        """
+        qry, parameters = self._motif_query(motif, count_only, limit)
+        return self._execute("PROFILE " + qry, parameters, timeout, self._profile_plan)
+
+    @staticmethod
+    def _profile_plan(cursor) -> dict:
+        for _ in cursor:
+            # The profile is only complete once all results are consumed.
+            pass
+        return Neo4jExecutor._query_plan(cursor)
+
+    @staticmethod
+    def _query_plan(cursor) -> dict:
+        plan = cursor.plan()
+        if plan is None:
+            raise RuntimeError("The database did not return a query plan.")
+        return _plan_tree(plan)
+
+    @staticmethod
+    def plan_warnings(plan: dict) -> List[str]:
+        """
+        List the operators in a plan tree that usually make a search slow.
+
+        These are full scans of all nodes or of a label (which often mean a
+        constrained property is missing an index; see `ensure_indexes`) and
+        cartesian products of disconnected parts of the pattern.
+
+        Arguments:
+            plan (dict): A plan tree from `explain` or `profile`
+
+        Returns:
+            List[str]: One description per offending operator
+
+        """
+        warnings = []
+        operators = [plan]
+        while operators:
+            operator = operators.pop(0)
+            if operator["operator"] in _PLAN_WARNINGS:
+                warnings.append(
+                    "{} ({}): {}".format(
+                        operator["operator"],
+                        operator["details"] or ", ".join(operator["identifiers"]),
+                        _PLAN_WARNINGS[operator["operator"]],
+                    )
+                )
+            operators.extend(operator["children"])
+        return warnings
+
+    def find_batches(
+        self,
+        motif: "dotmotif.Motif",
+        batch_size: int = 10_000,
+        limit: Optional[int] = None,
+        id_property: Optional[str] = None,
+        format: str = "pandas",
+    ) -> Iterator[Any]:
+        """
+        Find a motif, streaming the results back in fixed-size batches.
+
+        Rather than building a py2neo record (and a full node object) for
+        every match, only one ID per motif node is returned from the server,
+        and each batch is decoded straight into one column per motif node.
+        Results are read from the cursor as they arrive, so memory use stays
+        flat however large the result set is.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to search for
+            batch_size (int: 10000): The number of matches per batch
+            limit (int: None): A limit on the total number of matches
+            id_property (str: None): The node property to return as each
+                node's ID. Defaults to the internal Neo4j node ID.
+            format (str: "pandas"): One of "pandas" (a pd.DataFrame per
+                batch), "numpy" (a dict of column name to np.ndarray), or
+                "arrow" (a pyarrow.Table per batch)
+
+        Returns:
+            Iterator: Batches of matches, with one column per motif node
+
+        """
+        query = self._parameterized_query(motif)
+        columns = [str(n) for n in motif.to_nx().nodes()]
+        projection = [
+            "{} AS {}".format(self._node_id(query, n, id_property), n) for n in columns
+        ]
+        qry = self._render_query(query, motif, projection=projection)
+        parameters = query.parameters
+        if limit:
+            qry += " LIMIT $limit"
+            parameters["limit"] = limit
+        yield from self._stream_batches(qry, parameters, columns, batch_size, format)
+
+    def find_anchored(
+        self,
+        motif: "dotmotif.Motif",
+        anchor: str,
+        ids: List[Any],
+        batch_size: int = 10_000,
+        id_property: Optional[str] = None,
+        format: str = "pandas",
+    ) -> Iterator[Any]:
+        """
+        Find the matches of a motif that map one motif node to given hosts.
+
+        Rather than running one query per host node, the host IDs are sent
+        as a single list parameter, and the query starts with `UNWIND` over
+        that list and an ID lookup of the `anchor` node, so the database
+        only searches the neighborhoods of the given nodes.
+
+        Results are streamed back like the batches from `find_batches`, with
+        an extra `anchor` column that holds the host ID each match was
+        found from.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to search for
+            anchor (str): The motif node to pin to the given host nodes
+            ids (List): The host node IDs (or `id_property` values)
+            batch_size (int: 10000): The number of matches per batch
+            id_property (str: None): The node property to look the anchors
+                up by, and to return as each node's ID. Defaults to the
+                internal Neo4j node ID.
+            format (str: "pandas"): One of "pandas", "numpy", or "arrow"
+
+        Returns:
+            Iterator: Batches of matches, with an `anchor` column and one
+                column per motif node
+
+        """
+        if anchor not in motif.to_nx().nodes():
+            raise ValueError(f"Anchor {anchor} is not a node in the motif.")
+        query = self._parameterized_query(motif, hints=False)
+        label = self._entity_labels["node"]
+        query.matches.insert(
+            0,
+            "MATCH ({}{}) WHERE {} = __anchor".format(
+                anchor,
+                (":" + label) if label else "",
+                self._node_id(query, anchor, id_property),
+            ),
+        )
+        columns = [str(n) for n in motif.to_nx().nodes()]
+        projection = ["__anchor AS anchor"] + [
+            "{} AS {}".format(self._node_id(query, n, id_property), n) for n in columns
+        ]
+        delim = "\n" if motif.pretty_print else " "
+        qry = "UNWIND $anchors AS __anchor" + delim
+        qry += self._render_query(query, motif, projection=projection)
+        parameters = {**query.parameters, "anchors": list(ids)}
+        yield from self._stream_batches(
+            qry, parameters, ["anchor", *columns], batch_size, format
+        )
+
+    def _stream_batches(
+        self,
+        qry: str,
+        parameters: dict,
+        columns: List[str],
+        batch_size: int,
+        format: str,
+    ) -> Iterator[Any]:
+        """
+        Run a query and decode its rows into columnar batches as they arrive.
+        """
+        if format not in ("pandas", "numpy", "arrow"):
+            raise ValueError("format must be one of 'pandas', 'numpy', or 'arrow'.")
+        if format == "arrow":
+            try:
+                import pyarrow as pa
+            except ImportError:
+                raise ImportError(
+                    "Arrow batches require the `pyarrow` package. "
+                    "You can install it with `pip install pyarrow`."
+                )
+
+        cursor = iter(self.G.run(qry, parameters))
+        while True:
+            records = list(islice(cursor, batch_size))
+            if not records:
+                return
+            arrays = {
+                column: np.asarray(values)
+                for column, values in zip(columns, zip(*records))
+            }
+            if format == "numpy":
+                yield arrays
+            elif format == "arrow":
+                yield pa.table(arrays)
+            else:
+                yield pd.DataFrame(arrays, columns=columns)
+
+    @staticmethod
+    def _node_id(query: _CypherQuery, node: str, id_property: Optional[str]) -> str:
+        """
+        Render the expression used as a node's ID in columnar results.
+        """
+        if id_property is not None:
+            return query.property(node, id_property)
+        return "id({})".format(node)
+
+    def _shard_ranges(self, shards: int, id_property: Optional[str]) -> List[tuple]:
+        """
+        Split the range of node IDs in the database into `shards` ranges.
+        """
+        query = _CypherQuery(parameterize=True)
+        label = self._entity_labels["node"]
+        node_id = self._node_id(query, "n", id_property)
+        low, high = self.G.run(
+            "MATCH (n{}) RETURN min({}), max({})".format(
+                (":" + label) if label else "", node_id, node_id
+            )
+        ).to_table()[0]
+        if low is None:
+            return [(0, 0)] * shards
+        bounds = np.linspace(low, high + 1, shards + 1).astype(np.int64)
+        return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    def _run_sharded(
+        self,
+        motif: "dotmotif.Motif",
+        count_only: bool,
+        shards: int,
+        workers: Optional[int],
+        anchor: Optional[str],
+        partition: str,
+        retries: int,
+        id_property: Optional[str],
+        limit: Optional[int],
+    ) -> List[Any]:
+        """
+        Run one motif query per shard over a pool of connections.
+
+        Every match has exactly one anchor node, and the shards partition the
+        anchor's IDs, so the shards' results are disjoint and can simply be
+        concatenated (or summed) on the client.
+        """
+        if partition not in ("hash", "range"):
+            raise ValueError("partition must be one of 'hash' or 'range'.")
+        anchor = anchor or _most_constrained_node(motif)
+        if anchor not in motif.to_nx().nodes():
+            raise ValueError(f"Anchor {anchor} is not a node in the motif.")
+
+        query = self._parameterized_query(motif)
+        anchor_id = self._node_id(query, anchor, id_property)
+        if partition == "hash":
+            query.conditions.append(
+                "{} % $shard_count = $shard_index".format(anchor_id)
+            )
+            shard_parameters = [
+                {"shard_count": shards, "shard_index": i} for i in range(shards)
+            ]
+        else:
+            query.conditions.append(
+                "{} >= $shard_start AND {} < $shard_stop".format(anchor_id, anchor_id)
+            )
+            shard_parameters = [
+                {"shard_start": start, "shard_stop": stop}
+                for start, stop in self._shard_ranges(shards, id_property)
+            ]
+
+        columns = [str(n) for n in motif.to_nx().nodes()]
+        if count_only:
+            qry = self._render_count(query, motif, exclude={anchor})
+        else:
+            qry = self._render_query(
+                query,
+                motif,
+                projection=[
+                    "{} AS {}".format(self._node_id(query, n, id_property), n)
+                    for n in columns
+                ],
+            )
+            # The motif's own limit is already rendered into the query:
+            if limit and not motif.limit:
+                qry += " LIMIT $limit"
+                query.parameters["limit"] = limit
+
+        def _run_shard(parameters: dict):
+            for attempt in range(retries + 1):
+                try:
+                    cursor = self.G.run(qry, {**query.parameters, **parameters})
+                    if count_only:
+                        return int(cursor.evaluate())
+                    return pd.DataFrame(
+                        [tuple(record) for record in cursor], columns=columns
+                    )
+                except Exception as e:
+                    if attempt == retries:
+                        raise RuntimeError(
+                            f"Shard {parameters} failed after {retries + 1} attempts."
+                        ) from e
+
+        with ThreadPoolExecutor(max_workers=workers or shards) as pool:
+            return list(pool.map(_run_shard, shard_parameters))
+
+    def count_sharded(
+        self,
+        motif: "dotmotif.Motif",
+        shards: int = 8,
+        workers: Optional[int] = None,
+        anchor: Optional[str] = None,
+        partition: str = "hash",
+        retries: int = 2,
+        id_property: Optional[str] = None,
+    ) -> int:
+        """
+        Count a motif by splitting the query into concurrent shards.
+
+        The query is split by the ID of one `anchor` motif node (by default,
+        the most constrained node), either by hash (`id % shards`) or into
+        ranges of IDs. The shards run concurrently over py2neo's connection
+        pool, so a single large count can use many database cores. Shards
+        that fail are retried up to `retries` times.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to count
+            shards (int: 8): The number of shards to split the query into
+            workers (int: None): Maximum concurrent shards (default: shards)
+            anchor (str: None): The motif node to partition on
+            partition (str: "hash"): "hash" or "range"
+            retries (int: 2): The number of times to retry a failed shard
+            id_property (str: None): An integer node property to partition
+                on instead of the internal Neo4j node ID
+
+        Returns:
+            int: The count of this motif in the host graph
+
+        """
+        total = sum(
+            self._run_sharded(
+                motif,
+                True,
+                shards,
+                workers,
+                anchor,
+                partition,
+                retries,
+                id_property,
+                None,
+            )
+        )
+        # Each shard stops at the motif's limit, so the sum can exceed it:
+        return min(total, motif.limit) if motif.limit else total
+
+    def find_sharded(
+        self,
+        motif: "dotmotif.Motif",
+        shards: int = 8,
+        workers: Optional[int] = None,
+        anchor: Optional[str] = None,
+        partition: str = "hash",
+        retries: int = 2,
+        id_property: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Find a motif by splitting the query into concurrent shards.
+
+        See `count_sharded` for how the query is split. The results are
+        returned as one column of node IDs per motif node, like the batches
+        from `find_batches`.
+
+        Returns:
+            pd.DataFrame: The merged results of all shards
+
+        """
+        results = self._run_sharded(
+            motif,
+            False,
+            shards,
+            workers,
+            anchor,
+            partition,
+            retries,
+            id_property,
+            limit,
+        )
+        merged = pd.concat(results, ignore_index=True)
+        limit = min(filter(None, [limit, motif.limit]), default=None)
+        return merged.head(limit) if limit else merged
 
     @staticmethod
     def motif_to_cypher(
         motif: "dotmotif.Motif",
         count_only: bool = False,
         static_entity_labels: dict = None,
+        optimize: bool = False,
     ) -> str:
         """
         Output a query suitable for Cypher-compatible engines (e.g. Neo4j).
 
+        Constraint values are written directly into the query. To send them
+        as query parameters instead, use `motif_to_parameterized_cypher`.
+
+        Arguments:
+            optimize (bool: False): Whether to write the motif as a single
+                MATCH of connected paths (see `_build_optimized_query`)
+                rather than as one MATCH clause per edge
+
         Returns:
             str: A Cypher query
 
+        """
+        query = Neo4jExecutor._build_query(
+            motif, static_entity_labels, optimize=optimize
+        )
+        return Neo4jExecutor._render_query(query, motif, count_only)
+
+    @staticmethod
+    def motif_to_parameterized_cypher(
+        motif: "dotmotif.Motif",
+        count_only: bool = False,
+        static_entity_labels: dict = None,
+        optimize: bool = False,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Output a Cypher query with `$parameter` placeholders for all values.
+
+        Because the query text only depends on the motif's structure and not
+        on its constraint values, Neo4j can reuse its cached query plan when
+        the same motif is run again with different thresholds.
+
+        Returns:
+            str: A Cypher query
+            dict: The parameters to send along with the query
+
+        """
+        query = Neo4jExecutor._build_query(
+            motif, static_entity_labels, parameterize=True, optimize=optimize
+        )
+        return (
+            Neo4jExecutor._render_query(query, motif, count_only),
+            query.parameters,
+        )
+
+    @staticmethod
+    def _build_query(
+        motif: "dotmotif.Motif",
+        static_entity_labels: dict = None,
+        parameterize: bool = False,
+        parameter_prefix: str = "p",
+        optimize: bool = False,
+        unique_relationships: bool = False,
+    ) -> _CypherQuery:
+        """
+        Build the MATCH and WHERE clauses for a motif.
         """
         static_entity_labels = static_entity_labels or _DEFAULT_ENTITY_LABELS
+        if optimize:
+            return Neo4jExecutor._build_optimized_query(
+                motif,
+                static_entity_labels,
+                parameterize,
+                parameter_prefix,
+                unique_relationships,
+            )
+        query = _CypherQuery(
+            parameterize=parameterize, parameter_prefix=parameter_prefix
+        )
         # Edges and negative edges
         es = []
         es_neg = []
@@ -252,6 +1682,10 @@ class Neo4jExecutor(Executor):
         # ID that is assigned to it so that it can hold constraints later on.
         edge_mapping = {}
 
+        query.node_label = (
+            (":" + static_entity_labels["node"]) if static_entity_labels["node"] else ""
+        )
+
         for u, v, a in motif_graph.edges(data=True):
             action = static_entity_labels["edge"][
                 a.get("action", static_entity_labels["edge"]["DEFAULT"])
@@ -259,29 +1693,17 @@ class Neo4jExecutor(Executor):
             edge_id = "{}_{}".format(u, v)
             edge_mapping[(u, v)] = edge_id
             if a["exists"]:
-                es.append(
-                    (
-                        "MATCH ({}"
-                        + (
-                            (":" + static_entity_labels["node"])
-                            if static_entity_labels["node"]
-                            else ""
-                        )
-                        + ")-[{}{}]-{}({}"
-                        + (
-                            (":" + static_entity_labels["node"])
-                            if static_entity_labels["node"]
-                            else ""
-                        )
-                        + ")"
-                    ).format(
-                        u,
-                        edge_id,
-                        ((":" + action) if action else ""),
-                        "" if motif.ignore_direction else ">",
-                        v,
-                    )
+                pattern = "({}{})-[{}{}]-{}({}{})".format(
+                    u,
+                    query.node_label,
+                    edge_id,
+                    ((":" + action) if action else ""),
+                    "" if motif.ignore_direction else ">",
+                    v,
+                    query.node_label,
                 )
+                query.edge_patterns[(u, v)] = pattern
+                es.append("MATCH " + pattern)
             else:
                 es_neg.append(
                     (
@@ -301,13 +1723,8 @@ class Neo4jExecutor(Executor):
                     ).format(u, action, "" if motif.ignore_direction else ">", v)
                 )
 
-        delim = "\n" if motif.pretty_print else " "
-
-        conditions = []
-        if es_neg:
-            conditions = es_neg  # f"{delim} AND ".join(es_neg)
-
-        q_match = delim.join([delim.join(es)])
+        query.matches.extend(es)
+        query.conditions.extend(es_neg)
 
         # Edge constraints:
         cypher_edge_constraints = []
@@ -315,18 +1732,13 @@ class Neo4jExecutor(Executor):
             for key, constraints in a.items():
                 for operator, values in constraints.items():
                     for value in values:
-                        cypher_edge_constraints.append(
-                            (
-                                "NOT ({}[{}] {} {})"
-                                if _operator_negation_infix(operator)
-                                else "{}[{}] {} {}"
-                            ).format(
-                                edge_mapping[(u, v)],
-                                _quoted_if_necessary(key),
-                                _remapped_operator(operator),
-                                f'"{value}"' if isinstance(value, str) else value,
-                            )
+                        predicate = query.comparison(
+                            query.property(edge_mapping[(u, v)], key),
+                            operator,
+                            query.value(value),
                         )
+                        cypher_edge_constraints.append(predicate)
+                        query.edge_conditions.setdefault((u, v), []).append(predicate)
 
         # Node constraints:
         cypher_node_constraints = []
@@ -334,17 +1746,14 @@ class Neo4jExecutor(Executor):
             for key, constraints in a.items():
                 for operator, values in constraints.items():
                     for value in values:
-                        cypher_node_constraints.append(
-                            (
-                                "NOT ({}[{}] {} {})"
-                                if _operator_negation_infix(operator)
-                                else "{}[{}] {} {}"
-                            ).format(
-                                n,
-                                _quoted_if_necessary(key),
-                                _remapped_operator(operator),
-                                f'"{value}"' if isinstance(value, str) else value,
-                            )
+                        predicate = query.comparison(
+                            query.property(n, key),
+                            operator,
+                            query.value(value),
+                        )
+                        cypher_node_constraints.append(predicate)
+                        query.node_conditions.setdefault(n, []).append(
+                            (key, operator, predicate)
                         )
 
         # Dynamic node constraints:
@@ -353,16 +1762,10 @@ class Neo4jExecutor(Executor):
                 for operator, values in constraints.items():
                     for value in values:
                         cypher_node_constraints.append(
-                            (
-                                "NOT ({}[{}] {} {}[{}])"
-                                if _operator_negation_infix(operator)
-                                else "{}[{}] {} {}[{}]"
-                            ).format(
-                                n,
-                                _quoted_if_necessary(key),
-                                _remapped_operator(operator),
-                                value[0],
-                                _quoted_if_necessary(value[1]),
+                            query.comparison(
+                                query.property(n, key),
+                                operator,
+                                query.property(value[0], value[1]),
                             )
                         )
 
@@ -375,40 +1778,18 @@ class Neo4jExecutor(Executor):
                     this_edge_name = edge_mapping[(u, v)]
                     that_edge_name = edge_mapping[(that_u, that_v)]
                     cypher_edge_constraints.append(
-                        (
-                            "NOT ({}[{}] {} {}[{}])"
-                            if _operator_negation_infix(op)
-                            else "{}[{}] {} {}[{}]"
-                        ).format(
-                            this_edge_name,
-                            _quoted_if_necessary(this_attr),
-                            _remapped_operator(op),
-                            that_edge_name,
-                            _quoted_if_necessary(that_attr),
+                        query.comparison(
+                            query.property(this_edge_name, this_attr),
+                            op,
+                            query.property(that_edge_name, that_attr),
                         )
                     )
 
-        conditions.extend([*cypher_node_constraints, *cypher_edge_constraints])
-
-        if count_only:
-            q_return = (
-                "WITH DISTINCT "
-                + ",".join(list(motif_graph.nodes()))
-                + " AS __DOTMOTIF_DISTINCT "
-                + delim
-                + "RETURN COUNT(*)"
-            )
-        else:
-            q_return = "RETURN DISTINCT " + ",".join(list(motif_graph.nodes()))
-
-        if motif.limit:
-            q_limit = " LIMIT {}".format(motif.limit)
-        else:
-            q_limit = ""
+        query.conditions.extend([*cypher_node_constraints, *cypher_edge_constraints])
 
         if motif.enforce_inequality:
             _nodes = [str(a) for a in motif_graph.nodes()]
-            conditions.extend(
+            query.conditions.extend(
                 sorted(
                     list(
                         {
@@ -421,12 +1802,246 @@ class Neo4jExecutor(Executor):
             )
 
         automs = motif.list_automorphisms()
-        conditions.extend(["id({}) < id({})".format(a, b) for a, b in automs])
+        query.conditions.extend(["id({}) < id({})".format(a, b) for a, b in automs])
+        return query
+
+    @staticmethod
+    def _build_optimized_query(
+        motif: "dotmotif.Motif",
+        static_entity_labels: dict,
+        parameterize: bool = False,
+        parameter_prefix: str = "p",
+        unique_relationships: bool = False,
+    ) -> _CypherQuery:
+        """
+        Build a single MATCH of connected path patterns for a motif.
+
+        Edges are chained into as few paths as possible, starting from the
+        most constrained node, and every later path starts from a node that
+        is already bound, so the planner sees one connected pattern and can
+        join on it with expand-into rather than with cartesian products.
+        Labels are only written the first time a node appears, equality
+        constraints are written inline as property maps, and negative edges
+        become `NOT EXISTS {}` subqueries on the bound nodes.
+
+        Because all edges share one MATCH, no two motif edges can bind the
+        same relationship. This only differs from the per-edge clauses of
+        `_build_query` if motif nodes are allowed to coincide.
+
+        Inequality (if `motif.enforce_inequality` is set) is still written
+        as pairwise `A <> B` predicates, since that is the only form the
+        planner can check as soon as both nodes are bound, but pairs that
+        are already distinct are skipped: pairs ordered by an automorphism
+        predicate, pairs with different required values for one property,
+        and (with `unique_relationships`) two nodes that are reached from
+        the same node by motif edges of the same type and direction.
+        """
+        query = _CypherQuery(
+            parameterize=parameterize, parameter_prefix=parameter_prefix
+        )
+        query.node_label = (
+            (":" + static_entity_labels["node"]) if static_entity_labels["node"] else ""
+        )
+        motif_graph = motif.to_nx()
+        arrow = "" if motif.ignore_direction else ">"
+
+        # Property maps of the equality constraints written inline:
+        inline_properties: Dict[str, Dict[str, str]] = {}
+
+        def _split_constraints(variable: str, constraints: dict) -> list:
+            # One equality constraint per key goes inline, the rest in WHERE:
+            inline = inline_properties.setdefault(variable, {})
+            split = []
+            for key, operators in constraints.items():
+                for operator, values in operators.items():
+                    for value in values:
+                        value = query.value(value)
+                        predicate = query.comparison(
+                            query.property(variable, key), operator, value
+                        )
+                        if operator in ("=", "==") and key not in inline:
+                            inline[key] = value
+                        else:
+                            query.conditions.append(predicate)
+                        split.append((key, operator, predicate))
+            return split
+
+        def _property_map(variable: str) -> str:
+            inline = inline_properties.get(variable)
+            if not inline:
+                return ""
+            return " {{{}}}".format(
+                ", ".join(
+                    "{}: {}".format(_escaped_name(key), value)
+                    for key, value in inline.items()
+                )
+            )
+
+        node_constraints = motif.list_node_constraints()
+        for n, constraints in node_constraints.items():
+            query.node_conditions[n] = _split_constraints(n, constraints)
+
+        edges = []
+        negative = []
+        edge_constraints = motif.list_edge_constraints()
+        for u, v, a in motif_graph.edges(data=True):
+            action = static_entity_labels["edge"][
+                a.get("action", static_entity_labels["edge"]["DEFAULT"])
+            ]
+            if a["exists"]:
+                edge_id = "{}_{}".format(u, v)
+                _split_constraints(edge_id, edge_constraints.get((u, v), {}))
+                edges.append((u, v, edge_id, action))
+            else:
+                negative.append(
+                    "NOT EXISTS {{ MATCH ({})-[{}]-{}({}) }}".format(
+                        u, (":" + action) if action else "", arrow, v
+                    )
+                )
+
+        start = _most_constrained_node(motif)
+        order = [start] + [n for n in motif_graph.nodes() if n != start]
+        bound: Set[str] = set()
+
+        def _node(n: str) -> str:
+            if n in bound:
+                return "({})".format(n)
+            bound.add(n)
+            return "({}{}{})".format(n, query.node_label, _property_map(n))
+
+        def _incident(n: str) -> list:
+            return [e for e in remaining if n in (e[0], e[1])]
+
+        paths = []
+        remaining = list(edges)
+        while remaining:
+            current = next(
+                (n for n in order if n in bound and _incident(n)), None
+            ) or next(n for n in order if _incident(n))
+            path = _node(current)
+            while _incident(current):
+                u, v, edge_id, action = _incident(current)[0]
+                remaining.remove((u, v, edge_id, action))
+                relationship = "[{}{}{}]".format(
+                    edge_id, (":" + action) if action else "", _property_map(edge_id)
+                )
+                if u == current:
+                    path += "-{}-{}{}".format(relationship, arrow, _node(v))
+                    current = v
+                else:
+                    path += "<-{}-{}".format(relationship, _node(u))
+                    current = u
+            paths.append(path)
+        # Nodes that only appear in negative edges:
+        paths.extend(_node(n) for n in order if n not in bound)
+        query.matches.append("MATCH " + ", ".join(paths))
+
+        for n, a in motif.list_dynamic_node_constraints().items():
+            for key, constraints in a.items():
+                for operator, values in constraints.items():
+                    for value in values:
+                        query.conditions.append(
+                            query.comparison(
+                                query.property(n, key),
+                                operator,
+                                query.property(value[0], value[1]),
+                            )
+                        )
+        for (u, v), constraints in motif.list_dynamic_edge_constraints().items():
+            for this_attr, ops in constraints.items():
+                for op, (that_u, that_v, that_attr) in ops.items():
+                    query.conditions.append(
+                        query.comparison(
+                            query.property("{}_{}".format(u, v), this_attr),
+                            op,
+                            query.property("{}_{}".format(that_u, that_v), that_attr),
+                        )
+                    )
+        query.conditions.extend(negative)
+
+        automs = motif.list_automorphisms()
+        if motif.enforce_inequality:
+            distinct = {frozenset(pair) for pair in automs}
+            required = {
+                n: {
+                    key: set(operators.get("=", []) + operators.get("==", []))
+                    for key, operators in constraints.items()
+                }
+                for n, constraints in node_constraints.items()
+            }
+            for a_node, b_node in product(motif_graph.nodes(), repeat=2):
+                shared = set(required.get(a_node, {})) & set(required.get(b_node, {}))
+                if any(
+                    required[a_node][key]
+                    and required[b_node][key]
+                    and not required[a_node][key] & required[b_node][key]
+                    for key in shared
+                ):
+                    distinct.add(frozenset((a_node, b_node)))
+            if unique_relationships and not motif.ignore_direction:
+                # Each relationship of a type joins a distinct ordered pair:
+                for e1, e2 in product(edges, repeat=2):
+                    if e1 != e2 and e1[3] == e2[3]:
+                        if e1[0] == e2[0]:
+                            distinct.add(frozenset((e1[1], e2[1])))
+                        if e1[1] == e2[1]:
+                            distinct.add(frozenset((e1[0], e2[0])))
+            nodes = sorted(str(n) for n in motif_graph.nodes())
+            query.conditions.extend(
+                "{} <> {}".format(a_node, b_node)
+                for i, a_node in enumerate(nodes)
+                for b_node in nodes[i + 1 :]
+                if frozenset((a_node, b_node)) not in distinct
+            )
+        query.conditions.extend(["id({}) < id({})".format(a, b) for a, b in automs])
+        return query
+
+    @staticmethod
+    def _render_match(query: _CypherQuery, delim: str = " ") -> List[str]:
+        """
+        Render a built query's MATCH clauses and WHERE clause.
+        """
+        clauses = [delim.join(query.matches)]
+        if query.conditions:
+            clauses.append("WHERE " + " AND ".join(query.conditions))
+        return clauses
+
+    @staticmethod
+    def _render_query(
+        query: _CypherQuery,
+        motif: "dotmotif.Motif",
+        count_only: bool = False,
+        projection: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Assemble a built query into a find (or count) statement.
+
+        If a `projection` is given, a find returns those expressions instead
+        of the motif's node variables.
+        """
+        delim = "\n" if motif.pretty_print else " "
+        motif_graph = motif.to_nx()
+
+        if count_only:
+            q_return = (
+                "WITH DISTINCT "
+                + ",".join(list(motif_graph.nodes()))
+                + " AS __DOTMOTIF_DISTINCT "
+                + delim
+                + "RETURN COUNT(*)"
+            )
+        elif projection:
+            q_return = "RETURN DISTINCT " + ", ".join(projection)
+        else:
+            q_return = "RETURN DISTINCT " + ",".join(list(motif_graph.nodes()))
+
+        if motif.limit:
+            q_limit = " LIMIT {}".format(query.value(motif.limit))
+        else:
+            q_limit = ""
 
-        query = [q_match]
-        if conditions:
-            query.append("WHERE " + " AND ".join(conditions))
-        query.append(q_return)
+        cypher = Neo4jExecutor._render_match(query, delim)
+        cypher.append(q_return)
         if q_limit:
-            query.append(q_limit)
-        return "{}".format(delim.join(query))
+            cypher.append(q_limit)
+        return "{}".format(delim.join(cypher))
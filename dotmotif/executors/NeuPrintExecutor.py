@@ -1,9 +1,18 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+import re
+import shutil
+
+import numpy as np
 import pandas as pd
 from neuprint import Client
 from neuprint import fetch_all_rois
 
 from .. import Motif
-from .Neo4jExecutor import Neo4jExecutor
+from .Neo4jExecutor import Neo4jExecutor, _most_constrained_node
 
 _LOOKUP = {
     "INHIBITS": "ConnectsTo",
@@ -20,6 +29,119 @@ _DEFAULT_ENTITY_LABELS = {
     "edge": _LOOKUP,
 }
 
+# The neuron properties that `enrich` adds by default:
+_DEFAULT_ENRICH_PROPERTIES = ("type", "instance", "size")
+
+_DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "dotmotif")
+
+
+def _cache_key(*parts: str) -> str:
+    return re.sub(r"[^\w.-]", "_", "-".join(parts))
+
+
+def _unsupported(name: str):
+    """
+    Make a method that raises, for Neo4jExecutor methods that need a py2neo graph.
+    """
+
+    def _method(self, *args, **kwargs):
+        raise NotImplementedError(f"{name} is not supported by neuPrint.")
+
+    _method.__name__ = name
+    _method.__doc__ = "Not supported by neuPrint: raises NotImplementedError."
+    return _method
+
+
+def _body_id(value: Any) -> Any:
+    """
+    Get the bodyId of a neuron in a result cell (a node map, or a bodyId).
+    """
+    return value.get("bodyId") if isinstance(value, dict) else value
+
+
+def _is_timeout(error: Exception) -> bool:
+    """
+    Whether a failed neuPrint request looks like it ran out of time.
+    """
+    if isinstance(error, TimeoutError):
+        return True
+    message = str(error).lower()
+    return "timeout" in message or "timed out" in message
+
+
+def _uses_json_attributes(motif: Motif) -> bool:
+    """
+    Whether a motif has an edge constraint on a "<roi>.<attribute>" key.
+    """
+    return any(
+        "." in key.strip('"')
+        for constraints in motif.list_edge_constraints().values()
+        for key in constraints
+    )
+
+
+def _implies_synapses(operator: str, value) -> bool:
+    """
+    Whether a constraint on a synapse count can only hold if the count is > 0.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return (operator == ">" and value >= 0) or (
+        operator in (">=", "==", "=") and value > 0
+    )
+
+
+def _roi_constraints(query, motif: Motif, rois: list, indexed_rois: list) -> None:
+    """
+    Rewrite "<roi>.<pre|post>" edge constraints into neuPrint's data model.
+
+    A connection's per-ROI synapse counts are only stored in its `roiInfo`
+    JSON string, so each such constraint becomes a predicate on the parsed
+    JSON. But neuPrint also stores a boolean property per ROI on every
+    neuron that has synapses there, and those properties are indexed. So if
+    a constraint requires presynaptic (postsynaptic) sites in an indexed ROI,
+    the presynaptic (postsynaptic) neuron is also required to have that ROI
+    property, which lets the server skip most relationships without parsing
+    their JSON at all.
+
+    """
+    prefilters = []
+    for (u, v), a in motif.list_edge_constraints().items():
+        edge = "{}_{}".format(u, v)
+        for key, constraints in a.items():
+            roi, _, kind = key.strip('"').rpartition(".")
+            if roi not in rois:
+                continue
+            neuron = {"pre": u, "post": v}.get(kind)
+            for operator, values in constraints.items():
+                for value in values:
+                    predicate = query.comparison(
+                        query.property(edge, key), operator, query.value(value)
+                    )
+                    parsed = query.comparison(
+                        "apoc.convert.fromJsonMap({}.roiInfo)[{}].{}".format(
+                            edge, query.value(roi), kind
+                        ),
+                        operator,
+                        query.value(value),
+                    )
+                    query.conditions = [
+                        "({})".format(parsed) if c == predicate else c
+                        for c in query.conditions
+                    ]
+                    if (
+                        neuron
+                        and roi in indexed_rois
+                        and _implies_synapses(operator, value)
+                    ):
+                        # Backtick-escaped, so that the planner can use the index:
+                        prefilter = "{}.`{}` = true".format(
+                            neuron, roi.replace("`", "``")
+                        )
+                        if prefilter not in prefilters:
+                            prefilters.append(prefilter)
+    query.conditions[:0] = prefilters
+
 
 class NeuPrintExecutor(Neo4jExecutor):
     """
@@ -31,14 +153,45 @@ class NeuPrintExecutor(Neo4jExecutor):
     queries to the neuPrint server over the HTTP API.
 
     Note that the neuPrint default timeout is quite short, and slower motif
-    queries may not run in time.
+    queries may not run in time. `find_sharded` and `count_sharded` split a
+    query into many smaller ones, and split those further if they time out.
+
+    The Neo4jExecutor methods that need a direct connection to the database
+    (such as `explain`, `find_batches` or `load_graph`) are not available,
+    and raise NotImplementedError.
 
     """
 
-    def __init__(self, host: str, dataset: str, token: str) -> None:
+    submit = _unsupported("submit")
+    load_graph = _unsupported("load_graph")
+    existing_indexes = _unsupported("existing_indexes")
+    ensure_indexes = _unsupported("ensure_indexes")
+    count_many = _unsupported("count_many")
+    find_many = _unsupported("find_many")
+    count_by = _unsupported("count_by")
+    explain = _unsupported("explain")
+    profile = _unsupported("profile")
+    find_batches = _unsupported("find_batches")
+    find_anchored = _unsupported("find_anchored")
+
+    def __init__(
+        self,
+        host: str = None,
+        dataset: str = None,
+        token: str = None,
+        cache_dir: Optional[str] = _DEFAULT_CACHE_DIR,
+        cache_results: bool = False,
+        client: Client = None,
+    ) -> None:
         """
         Create a new NeuPrintExecutor that points to a deployed neuPrint DB.
 
+        The dataset's list of ROIs is only fetched when a motif first uses
+        an ROI constraint, and is then cached on disk (per host and dataset)
+        in `cache_dir`. With `cache_results`, the results of every query are
+        cached there too, keyed by the host, dataset and final Cypher, so that
+        rerunning a notebook does not send the same queries again.
+
         Arguments:
             host (str): The host of the neuPrint server (for example,
                 'neuprint.janelia.org')
@@ -46,17 +199,99 @@ class NeuPrintExecutor(Neo4jExecutor):
                 'hemibrain:v1.1`)
             token (str): The user's neuPrint access token. To retrieve this
                 token, go to https://[host]/account.
+            cache_dir (str: ~/.cache/dotmotif): The directory for cached ROI
+                lists and results. Pass None to disable caching on disk.
+            cache_results (bool: False): Whether to cache query results
+            client (neuprint.Client: None): An existing client to use instead
+                of connecting with host, dataset and token
 
         Returns:
             None
 
         """
         self._created_container = False
+        if client is not None:
+            self.client = client
+            host, dataset = client.server, client.dataset
+        else:
+            self.client = Client(host, dataset=dataset, token=token)
         self.host = host
         self.dataset = dataset
         self.token = token
-        self.client = Client(host, dataset=self.dataset, token=self.token)
-        self.rois = fetch_all_rois()
+        self.cache_dir = cache_dir
+        self.cache_results = cache_results
+        self._rois: Optional[List[str]] = None
+        self._results: dict = {}
+        self._neurons: Dict[Any, dict] = {}
+
+    @property
+    def rois(self) -> List[str]:
+        """
+        The names of the dataset's ROIs, fetched on first use.
+        """
+        if self._rois is None:
+            path = self._cache_path("rois")
+            if path and os.path.exists(path):
+                with open(path, "r") as f:
+                    self._rois = json.load(f)
+            else:
+                self._rois = list(fetch_all_rois(client=self.client))
+                if path:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, "w") as f:
+                        json.dump(self._rois, f)
+        return self._rois
+
+    def _cache_path(self, kind: str, key: str = None) -> Optional[str]:
+        """
+        Get the path of this host and dataset's ROI list, or of one result.
+
+        Results live in a directory per host and dataset, so that
+        `clear_cache` can remove them without touching other datasets'.
+        """
+        if self.cache_dir is None:
+            return None
+        path = os.path.join(
+            self.cache_dir,
+            "neuprint",
+            kind,
+            _cache_key(self.client.server, self.dataset),
+        )
+        return f"{path}.json" if key is None else os.path.join(path, f"{key}.pkl")
+
+    def clear_cache(self) -> None:
+        """
+        Forget this host and dataset's cached ROI list and query results.
+        """
+        if self.cache_dir is not None:
+            if os.path.exists(self._cache_path("rois")):
+                os.remove(self._cache_path("rois"))
+            shutil.rmtree(
+                os.path.dirname(self._cache_path("results", "")), ignore_errors=True
+            )
+        self._rois = None
+        self._results = {}
+        self._neurons = {}
+
+    def _fetch(self, cypher: str) -> pd.DataFrame:
+        """
+        Send a query to neuPrint, or read its result from the result cache.
+        """
+        if not self.cache_results:
+            return self.client.fetch_custom(cypher)
+        key = hashlib.sha256(
+            f"{self.client.server}\n{self.dataset}\n{cypher}".encode()
+        ).hexdigest()
+        if key not in self._results:
+            path = self._cache_path("results", key)
+            if path and os.path.exists(path):
+                self._results[key] = pd.read_pickle(path)
+            else:
+                self._results[key] = self.client.fetch_custom(cypher)
+                if path:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    self._results[key].to_pickle(path)
+        return self._results[key].copy()
 
     def run(self, cypher: str) -> pd.DataFrame:
         """
@@ -71,7 +306,23 @@ class NeuPrintExecutor(Neo4jExecutor):
             The result of the cypher query
 
         """
-        return self.client.fetch_custom(cypher)
+        return self._fetch(cypher)
+
+    def _cypher(
+        self, motif: Motif, count_only: bool = False, conditions: List[str] = None
+    ) -> str:
+        """
+        Build the neuPrint query for a motif, fetching ROI names only if needed.
+        """
+        rois = self.rois if _uses_json_attributes(motif) else None
+        return self.motif_to_cypher(
+            motif,
+            count_only=count_only,
+            static_entity_labels=_DEFAULT_ENTITY_LABELS,
+            json_attributes=rois,
+            conditions=conditions,
+            roi_properties=rois,
+        )
 
     def count(self, motif: Motif, limit=None) -> int:
         """
@@ -84,37 +335,317 @@ class NeuPrintExecutor(Neo4jExecutor):
             int: The count of this motif in the host graph
 
         """
-        qry = self.motif_to_cypher(
-            motif,
-            count_only=True,
-            static_entity_labels=_DEFAULT_ENTITY_LABELS,
-            json_attributes=self.rois,
-        )
+        qry = self._cypher(motif, count_only=True)
         if limit:
             qry += f" LIMIT {limit}"
-        res = self.client.fetch_custom(qry)
-        print(res)
-        return int(res.to_numpy())
+        res = self._fetch(qry)
+        return int(res.iloc[0, 0])
 
-    def find(self, motif: Motif, limit=None) -> pd.DataFrame:
+    def find(
+        self, motif: Motif, limit=None, enrich: Sequence[str] = None
+    ) -> pd.DataFrame:
         """
         Find a motif in a larger graph.
 
         Arguments:
             motif (dotmotif.Motif): The motif to search for
+            limit (int: None): The maximum number of results to return
+            enrich (List[str]: None): Neuron properties (such as "type") to
+                add as columns for every motif node. See `enrich`.
 
         Returns:
             pd.DataFrame: The results of the search
 
         """
-        qry = self.motif_to_cypher(
-            motif,
-            static_entity_labels=_DEFAULT_ENTITY_LABELS,
-            json_attributes=self.rois,
-        )
+        qry = self._cypher(motif)
         if limit:
             qry += f" LIMIT {limit}"
-        return self.client.fetch_custom(qry)
+        results = self._fetch(qry)
+        return self.enrich(results, enrich) if enrich else results
+
+    def neuron_properties(
+        self,
+        body_ids: Sequence[int],
+        properties: Sequence[str] = _DEFAULT_ENRICH_PROPERTIES,
+        batch_size: int = 10_000,
+    ) -> pd.DataFrame:
+        """
+        Get the properties of many neurons, in a few batched queries.
+
+        Properties are remembered for the life of the executor, so only
+        neurons (or properties) that have not been fetched before are
+        queried. Neurons that do not have a property get a missing value.
+
+        Arguments:
+            body_ids (List[int]): The neurons to look up
+            properties (List[str]: ("type", "instance", "size")): The
+                properties to fetch
+            batch_size (int: 10_000): The number of neurons per query
+
+        Returns:
+            pd.DataFrame: One row per distinct bodyId, indexed by bodyId
+
+        """
+        body_ids = [b for b in dict.fromkeys(body_ids) if b is not None]
+        missing = [
+            body_id
+            for body_id in body_ids
+            if not all(p in self._neurons.get(body_id, {}) for p in properties)
+        ]
+        columns = ", ".join(
+            "n.`{0}` AS `{0}`".format(p.replace("`", "``")) for p in properties
+        )
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start : start + batch_size]
+            rows = self._fetch(
+                "MATCH (n:Neuron) WHERE n.bodyId IN [{}] "
+                "RETURN n.bodyId AS bodyId, {}".format(
+                    ", ".join(str(int(body_id)) for body_id in batch), columns
+                )
+            )
+            for body_id in batch:
+                self._neurons.setdefault(body_id, {}).update(dict.fromkeys(properties))
+            for row in rows.to_dict("records"):
+                body_id = row.pop("bodyId")
+                self._neurons.setdefault(body_id, {}).update(row)
+        return pd.DataFrame(
+            [[self._neurons[body_id][p] for p in properties] for body_id in body_ids],
+            index=pd.Index(body_ids, name="bodyId"),
+            columns=list(properties),
+        )
+
+    def enrich(
+        self,
+        results: pd.DataFrame,
+        properties: Sequence[str] = _DEFAULT_ENRICH_PROPERTIES,
+        nodes: Sequence[str] = None,
+        batch_size: int = 10_000,
+    ) -> pd.DataFrame:
+        """
+        Add neuron properties to a table of motif matches, as new columns.
+
+        The distinct bodyIds of all motif nodes are collected from the
+        results and looked up together (see `neuron_properties`), rather
+        than with one query per neuron. For motif node `A` and property
+        `type`, the new column is `A.type`.
+
+        Arguments:
+            results (pd.DataFrame): The results of `find` or `find_sharded`
+            properties (List[str]: ("type", "instance", "size")): The
+                properties to add
+            nodes (List[str]: None): The motif node columns to enrich. By
+                default, every column that holds neurons.
+            batch_size (int: 10_000): The number of neurons per query
+
+        Returns:
+            pd.DataFrame: A copy of the results with the new columns
+
+        """
+        if nodes is None:
+            nodes = [
+                column
+                for column in results.columns
+                if len(results) and isinstance(results[column].iloc[0], dict)
+            ]
+        ids = {node: results[node].map(_body_id) for node in nodes}
+        lookup = self.neuron_properties(
+            [body_id for column in ids.values() for body_id in column],
+            properties,
+            batch_size,
+        )
+        enriched = results.copy()
+        for node, column in ids.items():
+            for p in properties:
+                enriched[f"{node}.{p}"] = column.map(lookup[p]).values
+        return enriched
+
+    def _body_id_ranges(self, shards: int) -> List[Tuple[int, int]]:
+        """
+        Split the range of neuron bodyIds in the dataset into `shards` ranges.
+        """
+        low, high = self._fetch(
+            "MATCH (n:Neuron) RETURN min(n.bodyId), max(n.bodyId)"
+        ).iloc[0]
+        bounds = np.linspace(low, high + 1, shards + 1).astype(np.int64)
+        return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    def _run_sharded(
+        self,
+        motif: Motif,
+        count_only: bool,
+        shards: int,
+        workers: Optional[int],
+        anchor: Optional[str],
+        partition: str,
+        retries: int,
+        id_property: Optional[str],
+        limit: Optional[int],
+        max_splits: int = 4,
+    ) -> List[pd.DataFrame]:
+        """
+        Run one motif query per shard of the anchor's bodyIds, concurrently.
+
+        A shard that times out is split in two (for hash shards, `bodyId % n
+        = i` becomes `% 2n = i` and `% 2n = i + n`; range shards are halved)
+        up to `max_splits` times. Shards that fail for other reasons are
+        retried up to `retries` times.
+        """
+        if partition not in ("hash", "range"):
+            raise ValueError("partition must be one of 'hash' or 'range'.")
+        anchor = anchor or _most_constrained_node(motif)
+        if anchor not in motif.to_nx().nodes():
+            raise ValueError(f"Anchor {anchor} is not a node in the motif.")
+        id_property = id_property or "bodyId"
+
+        def _predicate(shard: Tuple[int, int]) -> str:
+            if partition == "hash":
+                return "{}.{} % {} = {}".format(anchor, id_property, *shard)
+            return "{0}.{1} >= {2} AND {0}.{1} < {3}".format(
+                anchor, id_property, *shard
+            )
+
+        def _split(shard: Tuple[int, int]) -> List[Tuple[int, int]]:
+            if partition == "hash":
+                count, index = shard
+                return [(2 * count, index), (2 * count, index + count)]
+            start, stop = shard
+            middle = (start + stop) // 2
+            return [(start, middle), (middle, stop)] if stop - start > 1 else []
+
+        def _run_shard(shard: Tuple[int, int]) -> pd.DataFrame:
+            qry = self._cypher(motif, count_only, [_predicate(shard)])
+            # The motif's own LIMIT, if any, is already part of the query:
+            if limit and not count_only and not motif.limit:
+                qry += f" LIMIT {limit}"
+            for attempt in range(retries + 1):
+                try:
+                    return self._fetch(qry)
+                except Exception as e:
+                    # A query that timed out will time out again; split it.
+                    if _is_timeout(e) or attempt == retries:
+                        raise
+
+        if partition == "hash":
+            initial = [(shards, i) for i in range(shards)]
+        else:
+            initial = self._body_id_ranges(shards)
+
+        results = []
+        with ThreadPoolExecutor(max_workers=workers or shards) as pool:
+            pending = {pool.submit(_run_shard, shard): (shard, 0) for shard in initial}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard, splits = pending.pop(future)
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        children = _split(shard) if splits < max_splits else []
+                        if not _is_timeout(e) or not children:
+                            raise RuntimeError(
+                                f"Shard {_predicate(shard)} failed "
+                                f"after {splits} splits."
+                            ) from e
+                        for child in children:
+                            pending[pool.submit(_run_shard, child)] = (
+                                child,
+                                splits + 1,
+                            )
+        return results
+
+    def count_sharded(
+        self,
+        motif: Motif,
+        shards: int = 8,
+        workers: Optional[int] = None,
+        anchor: Optional[str] = None,
+        partition: str = "hash",
+        retries: int = 2,
+        id_property: Optional[str] = None,
+        max_splits: int = 4,
+    ) -> int:
+        """
+        Count a motif by splitting the query into concurrent sub-queries.
+
+        The query is split on the bodyId of one `anchor` motif node (by
+        default, the most constrained node), either by hash (`bodyId %
+        shards`) or into ranges of bodyIds. At most `workers` sub-queries run
+        at once. A sub-query that hits the neuPrint timeout is split in two
+        and run again, up to `max_splits` times.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to count
+            shards (int: 8): The number of sub-queries to start with
+            workers (int: None): Maximum concurrent sub-queries (default:
+                shards)
+            anchor (str: None): The motif node to partition on
+            partition (str: "hash"): "hash" or "range"
+            retries (int: 2): The number of times to retry a sub-query that
+                failed for a reason other than a timeout
+            id_property (str: "bodyId"): The integer property to partition on
+            max_splits (int: 4): How many times a timed-out sub-query may be
+                split further
+
+        Returns:
+            int: The count of this motif in the host graph
+
+        """
+        results = self._run_sharded(
+            motif,
+            True,
+            shards,
+            workers,
+            anchor,
+            partition,
+            retries,
+            id_property,
+            None,
+            max_splits,
+        )
+        total = sum(int(result.iloc[0, 0]) for result in results)
+        # Each shard stops at the motif's limit, so the sum can exceed it:
+        return min(total, motif.limit) if motif.limit else total
+
+    def find_sharded(
+        self,
+        motif: Motif,
+        shards: int = 8,
+        workers: Optional[int] = None,
+        anchor: Optional[str] = None,
+        partition: str = "hash",
+        retries: int = 2,
+        id_property: Optional[str] = None,
+        limit: Optional[int] = None,
+        max_splits: int = 4,
+        enrich: Sequence[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Find a motif by splitting the query into concurrent sub-queries.
+
+        See `count_sharded` for how the query is split. The results of all
+        sub-queries are merged into one DataFrame. Neuron properties listed
+        in `enrich` are added as columns, as in `find`.
+
+        Returns:
+            pd.DataFrame: The results of the search
+
+        """
+        results = self._run_sharded(
+            motif,
+            False,
+            shards,
+            workers,
+            anchor,
+            partition,
+            retries,
+            id_property,
+            limit,
+            max_splits,
+        )
+        merged = pd.concat(results, ignore_index=True)
+        limit = min(filter(None, [limit, motif.limit]), default=None)
+        merged = merged.head(limit) if limit else merged
+        return self.enrich(merged, enrich) if enrich else merged
 
     @staticmethod
     def motif_to_cypher(
@@ -122,34 +653,33 @@ class NeuPrintExecutor(Neo4jExecutor):
         count_only: bool = False,
         static_entity_labels: dict = None,
         json_attributes: list = None,
+        conditions: List[str] = None,
+        roi_properties: list = None,
     ) -> str:
         """
         Convert a motif to neuprint-flavored Cypher.
 
-        This is currently a thin passthrough for Neo4jExecutor.motif_to_cypher.
+        Edge constraints on "<roi>.<pre|post>" keys, for the ROIs listed in
+        `json_attributes`, are rewritten to read the connection's `roiInfo`.
+        Where those ROIs are also in `roi_properties` (the neuron ROI
+        properties that neuPrint indexes), the query first checks the
+        neurons' ROI properties.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to convert
+            count_only (bool: False): Whether to return only the count
+            static_entity_labels (dict: None): Node and edge labels to use
+            json_attributes (list: None): ROIs stored in `roiInfo`
+            conditions (List[str]: None): Extra WHERE predicates
+            roi_properties (list: None): ROIs with indexed neuron properties
+
+        Returns:
+            str: The Cypher query
 
         """
         static_entity_labels = static_entity_labels or _DEFAULT_ENTITY_LABELS
-        cypher = Neo4jExecutor.motif_to_cypher(motif, count_only, static_entity_labels)
-
-        # Replace the JSON attributes with the neuprint-specific ones
+        query = Neo4jExecutor._build_query(motif, static_entity_labels)
         if json_attributes:
-            for (u, v), a in motif.list_edge_constraints().items():
-                for key, constraints in a.items():
-                    key = key.strip('"')  # remove quotes if any
-                    if "." in key:
-                        attribute, sub_attribute = key.split(".")
-                        if attribute in json_attributes:
-                            for operator, values in constraints.items():
-                                for value in values:
-                                    this_edge = """{}_{}["{}"] {} {}""".format(
-                                        u, v, key, operator, str(value)
-                                    )
-                                    that_edge = """(apoc.convert.fromJsonMap({}_{}.roiInfo)["{}"].{} {} {})""".format(
-                                        u, v, attribute, sub_attribute, operator, str(value)
-                                    )
-                                    cypher = cypher.replace(this_edge, that_edge)
-                        else:
-                            print("Unknown JSON edge constraint: {}".format(key))
-
-        return cypher
+            _roi_constraints(query, motif, json_attributes, roi_properties or [])
+        query.conditions.extend(conditions or [])
+        return Neo4jExecutor._render_query(query, motif, count_only)
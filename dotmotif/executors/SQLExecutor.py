@@ -0,0 +1,464 @@
+"""
+Copyright 2022-2026 The Johns Hopkins Applied Physics Laboratory.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.`
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+import sqlite3
+
+import networkx as nx
+
+from .Executor import Executor
+
+if TYPE_CHECKING:
+    from .. import dotmotif  # type: ignore
+
+
+def _require_duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError(
+            "Reading DuckDB files requires the `duckdb` package. "
+            "You can install it with `pip install duckdb`."
+        )
+    return duckdb
+
+
+def _identifier(name: str) -> str:
+    """
+    Quote a table or column name for SQL.
+    """
+    return '"{}"'.format(str(name).replace('"', '""'))
+
+
+def _sql_value(value: Any) -> Any:
+    """
+    Convert an attribute value to something that SQLite can store.
+    """
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return value
+    return str(value)
+
+
+class _SQLQuery:
+    """
+    A SQL query under construction.
+
+    The FROM clause, WHERE predicates and `?` parameters are kept apart, so
+    that the same motif can be rendered as a find or as a count.
+
+    """
+
+    def __init__(self) -> None:
+        self.tables: List[str] = []
+        self.conditions: List[str] = []
+        self.parameters: List[Any] = []
+        self.columns: Dict[str, str] = {}
+
+    def value(self, value: Any) -> str:
+        self.parameters.append(_sql_value(value))
+        return "?"
+
+    def comparison(self, left: str, operator: str, right: Any) -> str:
+        """
+        Compare a column to a static value, as NetworkXExecutor would.
+        """
+        if operator in ("in", "!in"):
+            if isinstance(right, str):
+                # As in Python, `x in "string"` tests for a substring:
+                found = "instr({}, {})".format(self.value(right), left)
+                return f"{found} > 0" if operator == "in" else f"{found} = 0"
+            values = ", ".join(self.value(v) for v in right)
+            if operator == "in":
+                return f"{left} IN ({values})"
+            return f"({left} IS NULL OR {left} NOT IN ({values}))"
+        if operator in ("contains", "!contains"):
+            found = "instr({}, {})".format(left, self.value(right))
+            return f"{found} > 0" if operator == "contains" else f"{found} = 0"
+        return self.column_comparison(left, operator, self.value(right))
+
+    @staticmethod
+    def column_comparison(left: str, operator: str, right: str) -> str:
+        if operator == "!=":
+            # A missing value is "not equal" to anything, as in NetworkX:
+            return f"({left} IS NULL OR {left} <> {right})"
+        return "{} {} {}".format(left, "=" if operator == "==" else operator, right)
+
+
+class SQLExecutor(Executor):
+    """
+    A query executor that searches edge and node tables in a SQL database.
+
+    The host graph is read from an `edges` table, with one row per edge from
+    a `pre` to a `post` node ID (and any edge attributes as more columns),
+    and optionally a `nodes` table with an `id` column and node attributes.
+    A motif is compiled into one query that self-joins the edge table once
+    per motif edge, so the search runs entirely inside SQLite (or DuckDB),
+    in-process, with no graph server.
+
+    Like the NetworkXExecutor, each match maps motif nodes to distinct host
+    nodes.
+
+    """
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Create a new SQLExecutor.
+
+        Pass one of `connection` (an open sqlite3 or duckdb connection),
+        `path` (a SQLite or, with the `.duckdb` extension, DuckDB database
+        file) or `graph` (a networkx graph, which is copied into an
+        in-memory SQLite database).
+
+        Arguments:
+            connection: An open DB-API connection
+            path (str): The path of a database file
+            graph (networkx.Graph): A host graph to load into memory
+            edge_table (str: "edges"): The name of the edge table
+            node_table (str: "nodes"): The name of the node table
+            source_column (str: "pre"): The edge column of source node IDs
+            target_column (str: "post"): The edge column of target node IDs
+            id_column (str: "id"): The node column of node IDs
+            directed (bool: True): Whether edges are directed. Defaults to
+                the direction of `graph`, if given.
+            create_indexes (bool: True): Whether to index the edge table on
+                (source, target) and (target, source), and the node table on
+                its ID, if those indexes do not exist yet
+
+        Returns:
+            None
+
+        """
+        self.edge_table: str = kwargs.get("edge_table", "edges")
+        self.node_table: str = kwargs.get("node_table", "nodes")
+        self.source_column: str = kwargs.get("source_column", "pre")
+        self.target_column: str = kwargs.get("target_column", "post")
+        self.id_column: str = kwargs.get("id_column", "id")
+        self.directed: bool = kwargs.get("directed", True)
+
+        if kwargs.get("connection") is not None:
+            self.connection = kwargs["connection"]
+        elif kwargs.get("path") is not None:
+            path: str = kwargs["path"]
+            if path.endswith(".duckdb"):
+                self.connection = _require_duckdb().connect(path)
+            else:
+                self.connection = sqlite3.connect(path, check_same_thread=False)
+        elif kwargs.get("graph") is not None:
+            graph: nx.Graph = kwargs["graph"]
+            self.directed = kwargs.get("directed", graph.is_directed())
+            self.connection = sqlite3.connect(":memory:", check_same_thread=False)
+            self.load_graph(graph)
+        else:
+            raise ValueError(
+                "You must pass a `connection`, `path` or `graph` to the "
+                "SQLExecutor constructor."
+            )
+
+        self._edge_columns = self._columns(self.edge_table)
+        if self._edge_columns is None:
+            raise ValueError(f"There is no edge table named {self.edge_table}.")
+        self._node_columns = self._columns(self.node_table)
+        if kwargs.get("create_indexes", True):
+            self.create_indexes()
+
+    def _columns(self, table: str) -> Optional[List[str]]:
+        """
+        Get the column names of a table, or None if it does not exist.
+        """
+        try:
+            cursor = self.connection.execute(
+                "SELECT * FROM {} LIMIT 0".format(_identifier(table))
+            )
+        except Exception:
+            return None
+        return [column[0] for column in cursor.description]
+
+    def load_graph(self, graph: nx.Graph) -> None:
+        """
+        Write a networkx graph into the edge and node tables.
+
+        Attribute values that are not numbers, strings or bytes are stored
+        as strings.
+
+        Arguments:
+            graph (networkx.Graph): The graph to write
+
+        """
+        node_keys = list(
+            dict.fromkeys(k for _, attrs in graph.nodes(data=True) for k in attrs)
+        )
+        edge_keys = list(
+            dict.fromkeys(k for _, _, attrs in graph.edges(data=True) for k in attrs)
+        )
+        tables = [
+            (
+                self.node_table,
+                [self.id_column, *node_keys],
+                (
+                    [node, *(_sql_value(attrs.get(k)) for k in node_keys)]
+                    for node, attrs in graph.nodes(data=True)
+                ),
+            ),
+            (
+                self.edge_table,
+                [self.source_column, self.target_column, *edge_keys],
+                (
+                    [u, v, *(_sql_value(attrs.get(k)) for k in edge_keys)]
+                    for u, v, attrs in graph.edges(data=True)
+                ),
+            ),
+        ]
+        for table, columns, rows in tables:
+            self.connection.execute(
+                "CREATE TABLE {} ({})".format(
+                    _identifier(table), ", ".join(_identifier(c) for c in columns)
+                )
+            )
+            self.connection.executemany(
+                "INSERT INTO {} VALUES ({})".format(
+                    _identifier(table), ", ".join("?" for _ in columns)
+                ),
+                rows,
+            )
+        self.connection.commit()
+
+    def create_indexes(self) -> None:
+        """
+        Create the indexes that motif queries join on, if they do not exist.
+        """
+        indexes = [
+            (self.edge_table, (self.source_column, self.target_column)),
+            (self.edge_table, (self.target_column, self.source_column)),
+        ]
+        if self._node_columns is not None:
+            indexes.append((self.node_table, (self.id_column,)))
+        for table, columns in indexes:
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS {} ON {} ({})".format(
+                    _identifier("dotmotif_" + "_".join([table, *columns])),
+                    _identifier(table),
+                    ", ".join(_identifier(c) for c in columns),
+                )
+            )
+
+    def _edge_source(self, directed: bool) -> str:
+        """
+        The edge table, or for undirected searches, the edges in both directions.
+        """
+        edges = _identifier(self.edge_table)
+        if directed:
+            return edges
+        source, target = (
+            _identifier(self.source_column),
+            _identifier(self.target_column),
+        )
+        others = [_identifier(c) for c in self._edge_columns]
+        reversed_columns = ", ".join(
+            target if c == source else source if c == target else c for c in others
+        )
+        return (
+            "(SELECT * FROM {0} UNION ALL SELECT {1} FROM {0} WHERE {2} <> {3})".format(
+                edges, reversed_columns, source, target
+            )
+        )
+
+    def _build_query(self, motif: "dotmotif.Motif") -> _SQLQuery:
+        """
+        Compile a motif into the FROM clause and WHERE predicates of a query.
+        """
+        directed = self.directed and not motif.ignore_direction
+        edge_source = self._edge_source(directed)
+        source = _identifier(self.source_column)
+        target = _identifier(self.target_column)
+        query = _SQLQuery()
+
+        motif_graph = motif.to_nx()
+        edge_aliases: Dict[Tuple[str, str], str] = {}
+        for u, v, attrs in motif_graph.edges(data=True):
+            if not attrs["exists"]:
+                continue
+            alias = "e{}".format(len(edge_aliases))
+            edge_aliases[(u, v)] = alias
+            query.tables.append(f"{edge_source} AS {alias}")
+            for node, column in ((u, source), (v, target)):
+                expression = f"{alias}.{column}"
+                if node in query.columns:
+                    query.conditions.append(f"{query.columns[node]} = {expression}")
+                else:
+                    query.columns[node] = expression
+
+        # Node attributes are read from the node table, joined only if needed:
+        node_aliases: Dict[str, str] = {}
+
+        def _node_property(node: str, key: str) -> str:
+            if self._node_columns is None:
+                raise ValueError(
+                    f"This motif has node constraints, but there is no node "
+                    f"table named {self.node_table}."
+                )
+            if node not in node_aliases:
+                alias = "n{}".format(len(node_aliases))
+                node_aliases[node] = alias
+                query.tables.append(f"{_identifier(self.node_table)} AS {alias}")
+                query.conditions.append(
+                    "{}.{} = {}".format(
+                        alias, _identifier(self.id_column), query.columns[node]
+                    )
+                )
+            if key not in self._node_columns:
+                return "NULL"
+            return "{}.{}".format(node_aliases[node], _identifier(key))
+
+        def _edge_property(u: str, v: str, key: str) -> str:
+            key = key.strip('"')
+            if key not in self._edge_columns:
+                return "NULL"
+            return "{}.{}".format(edge_aliases[(u, v)], _identifier(key))
+
+        for (u, v), constraints in motif.list_edge_constraints().items():
+            for key, operators in constraints.items():
+                for operator, values in operators.items():
+                    for value in values:
+                        query.conditions.append(
+                            query.comparison(_edge_property(u, v, key), operator, value)
+                        )
+
+        for node, constraints in motif.list_node_constraints().items():
+            for key, operators in constraints.items():
+                for operator, values in operators.items():
+                    for value in values:
+                        query.conditions.append(
+                            query.comparison(_node_property(node, key), operator, value)
+                        )
+
+        # {thisNode: {thisKey: {operator: [(thatNode, thatKey)]}}}
+        for node, constraints in motif.list_dynamic_node_constraints().items():
+            for key, operators in constraints.items():
+                for operator, others in operators.items():
+                    for other, other_key in others:
+                        query.conditions.append(
+                            query.column_comparison(
+                                _node_property(node, key),
+                                operator,
+                                _node_property(other, other_key),
+                            )
+                        )
+
+        # {(u, v): {thisAttr: {operator: (thatU, thatV, thatAttr)}}}
+        for (u, v), constraints in motif.list_dynamic_edge_constraints().items():
+            for key, operators in constraints.items():
+                for operator, (other_u, other_v, other_key) in operators.items():
+                    query.conditions.append(
+                        query.column_comparison(
+                            _edge_property(u, v, key),
+                            operator,
+                            _edge_property(other_u, other_v, other_key),
+                        )
+                    )
+
+        for u, v, attrs in motif_graph.edges(data=True):
+            if attrs["exists"]:
+                continue
+            query.conditions.append(
+                "NOT EXISTS (SELECT 1 FROM {} AS x WHERE x.{} = {} AND x.{} = {})".format(
+                    edge_source,
+                    source,
+                    query.columns[u],
+                    target,
+                    query.columns[v],
+                )
+            )
+
+        nodes = list(query.columns)
+        query.conditions.extend(
+            "{} <> {}".format(query.columns[a], query.columns[b])
+            for i, a in enumerate(nodes)
+            for b in nodes[i + 1 :]
+        )
+        if motif.exclude_automorphisms:
+            query.conditions.extend(
+                "{} <= {}".format(query.columns[a], query.columns[b])
+                for a, b in motif.list_automorphisms()
+            )
+        return query
+
+    def motif_to_sql(
+        self, motif: "dotmotif.Motif", count_only: bool = False
+    ) -> Tuple[str, List[Any]]:
+        """
+        Convert a motif to a SQL query over the edge and node tables.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to convert
+            count_only (bool: False): Whether to return only the count
+
+        Returns:
+            str: The SQL query
+            List[Any]: The values of its `?` parameters
+
+        """
+        query = self._build_query(motif)
+        sql = "SELECT DISTINCT {} FROM {}".format(
+            ", ".join(
+                "{} AS {}".format(column, _identifier(node))
+                for node, column in query.columns.items()
+            ),
+            ", ".join(query.tables),
+        )
+        if query.conditions:
+            sql += " WHERE " + " AND ".join(query.conditions)
+        if count_only:
+            sql = f"SELECT COUNT(*) FROM ({sql})"
+        return sql, query.parameters
+
+    def count(self, motif: "dotmotif.Motif", limit: Optional[int] = None) -> int:
+        """
+        Count the occurrences of a motif in the host graph.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to count
+            limit (int: None): Stop counting at this many matches
+
+        Returns:
+            int: The number of matches
+
+        """
+        if limit is not None:
+            return len(self.find(motif, limit))
+        sql, parameters = self.motif_to_sql(motif, count_only=True)
+        return self.connection.execute(sql, parameters).fetchone()[0]
+
+    def find(
+        self, motif: "dotmotif.Motif", limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find a motif in the host graph.
+
+        Arguments:
+            motif (dotmotif.Motif): The motif to search for
+            limit (int: None): The maximum number of matches to return
+
+        Returns:
+            List[dict]: One mapping from motif node to host node per match
+
+        """
+        sql, parameters = self.motif_to_sql(motif)
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters = [*parameters, limit]
+        cursor = self.connection.execute(sql, parameters)
+        nodes = [column[0] for column in cursor.description]
+        return [dict(zip(nodes, row)) for row in cursor.fetchall()]
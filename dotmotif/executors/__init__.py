@@ -14,8 +14,22 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-from .Executor import Executor
+from .Executor import Executor, QueryCancelledError, QueryTimeoutError
 from .NetworkXExecutor import NetworkXExecutor
 from .GrandIsoExecutor import GrandIsoExecutor
+from .SQLExecutor import SQLExecutor
+from .DataFrameExecutor import DataFrameExecutor
+from .LeapfrogExecutor import LeapfrogExecutor
+from .BitsetExecutor import BitsetExecutor
 
-__all__ = ["Executor", "NetworkXExecutor", "GrandIsoExecutor"]
+__all__ = [
+    "Executor",
+    "NetworkXExecutor",
+    "GrandIsoExecutor",
+    "SQLExecutor",
+    "DataFrameExecutor",
+    "LeapfrogExecutor",
+    "BitsetExecutor",
+    "QueryCancelledError",
+    "QueryTimeoutError",
+]
@@ -0,0 +1,80 @@
+"""
+Shared fixtures for the tests of the local executors.
+
+The local executors (SQL, DataFrame, Leapfrog and Bitset) are all checked
+against NetworkXExecutor on the same motifs, with `ExecutorTestCase`.
+"""
+
+import networkx as nx
+
+from dotmotif import Motif
+from dotmotif.executors import NetworkXExecutor
+
+MOTIFS = [
+    "A -> B",
+    "A -> B\nB -> C\nC -> A",
+    # Bi-fan:
+    "A -> C\nA -> D\nB -> C\nB -> D",
+    # Reciprocal 4-clique:
+    "A -> B\nB -> A\nA -> C\nC -> A\nB -> C\nC -> B\nC -> D\nD -> C",
+    "A -> B\nB -> C\nA !> C",
+    "A -> B\nB -> C\nA !> C\nC !> A",
+    'A -> B [weight > 4]\nB -> C [weight != 3]\nA.type = "KC"',
+    "A -> B\nA -> C\nA.size > B.size\nB.type != C.type",
+    'A -> B\nC -> B\nA.type in "MBON_DN"\nC.size >= 3\nC.type contains "K"',
+    "A -> B as AB\nB -> C as BC\nAB.weight > BC.weight",
+    # Disconnected:
+    "A -> B\nC -> D\nA.size = 6\nC.size = 5",
+]
+
+
+def host(graph: nx.DiGraph = None) -> nx.DiGraph:
+    """
+    Add `size` and `type` node attributes and `weight` edge attributes.
+
+    By default, the host is a random directed graph of 30 nodes and 120 edges.
+    """
+    if graph is None:
+        graph = nx.gnm_random_graph(30, 120, seed=7, directed=True)
+    for n in graph.nodes():
+        graph.nodes[n]["size"] = n % 7
+        graph.nodes[n]["type"] = "KC" if n % 3 else "MBON"
+    for i, (u, v) in enumerate(graph.edges()):
+        graph.edges[u, v]["weight"] = i % 11
+    return graph
+
+
+def matches(results) -> list:
+    """
+    Sort a list of match dictionaries, so that two lists can be compared.
+    """
+    return sorted(tuple(sorted(r.items())) for r in results)
+
+
+class ExecutorTestCase:
+    """
+    Tests that an executor finds the same matches as NetworkXExecutor.
+
+    Mix this into a unittest.TestCase whose setUp sets `self.graph` and
+    `self.executor`.
+    """
+
+    motifs = MOTIFS
+
+    def test_matches_networkx(self):
+        for text in self.motifs:
+            motif = Motif(text)
+            expected = NetworkXExecutor(graph=self.graph).find(motif)
+            self.assertEqual(
+                matches(self.executor.find(motif)), matches(expected), text
+            )
+            self.assertEqual(self.executor.count(motif), len(expected), text)
+
+    def test_automorphisms_and_undirected_motifs(self):
+        motif = Motif("A -> B\nA -> C", exclude_automorphisms=True)
+        expected = NetworkXExecutor(graph=self.graph).find(motif)
+        self.assertEqual(matches(self.executor.find(motif)), matches(expected))
+
+        motif = Motif("A -> B\nB -> C\nA !> C", ignore_direction=True)
+        expected = NetworkXExecutor(graph=self.graph.to_undirected()).find(motif)
+        self.assertEqual(matches(self.executor.find(motif)), matches(expected))
@@ -0,0 +1,368 @@
+"""
+Record and replay the queries that database executors send to a server.
+
+A recording transport wraps a real neuPrint client or py2neo graph, passes
+every query through, and saves the query and its complete result to a
+`QueryArchive` on disk. A replay transport answers the same queries from the
+archive, with no server at all, either as fast as possible or with the
+latency measured when the query was recorded:
+
+    client = RecordingClient(Client(host, dataset, token), "hemibrain.archive")
+    NeuPrintExecutor(client=client).count(motif)
+
+    client = ReplayClient("hemibrain.archive", latency=0)
+    NeuPrintExecutor(client=client).count(motif)
+
+`RecordingGraph` and `ReplayGraph` do the same for `Neo4jExecutor(graph=...)`.
+
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import hashlib
+import json
+import os
+import pickle
+import re
+import time
+
+import pandas as pd
+from py2neo import Graph
+from py2neo.cypher import Record
+from py2neo.data import Node, Relationship
+from py2neo.integration import Table
+
+_ARCHIVE_FORMAT = "dotmotif-query-archive"
+_ARCHIVE_VERSION = 1
+
+# Neo4jExecutor tags background queries with a unique comment (see QueryHandle):
+_QUERY_TOKEN = re.compile(r"^/\* dotmotif:[0-9a-f]+ \*/ ")
+
+_RELATIONSHIP = "__dotmotif_relationship__"
+
+
+class QueryArchive:
+    """
+    A directory of recorded queries and their results.
+
+    Each query is stored in its own pickle file, named by a hash of the
+    query text and its parameters.
+
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open (or create) a query archive.
+
+        Arguments:
+            path (str): The archive directory
+
+        """
+        self.path = path
+        manifest = os.path.join(path, "manifest.json")
+        if os.path.exists(manifest):
+            with open(manifest, "r") as f:
+                if json.load(f).get("format") != _ARCHIVE_FORMAT:
+                    raise ValueError(f"{path} is not a dotmotif query archive.")
+        else:
+            os.makedirs(path, exist_ok=True)
+            with open(manifest, "w") as f:
+                json.dump({"format": _ARCHIVE_FORMAT, "version": _ARCHIVE_VERSION}, f)
+
+    @staticmethod
+    def key(cypher: str, parameters: Optional[dict] = None) -> str:
+        """
+        Get the archive key of a query.
+        """
+        cypher = _QUERY_TOKEN.sub("", cypher)
+        text = json.dumps([cypher, parameters or {}], sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.pkl")
+
+    def __contains__(self, query: Union[str, Tuple[str, Optional[dict]]]) -> bool:
+        """
+        Whether a query is in the archive, given as its text alone or as a
+        (text, parameters) pair.
+        """
+        cypher, parameters = (query, None) if isinstance(query, str) else query
+        return os.path.exists(self._entry_path(self.key(cypher, parameters)))
+
+    def __len__(self) -> int:
+        return sum(1 for name in os.listdir(self.path) if name.endswith(".pkl"))
+
+    def save(
+        self,
+        cypher: str,
+        parameters: Optional[dict],
+        result: Any,
+        elapsed: float,
+    ) -> None:
+        """
+        Save the result of a query, and how long it took, to the archive.
+        """
+        with open(self._entry_path(self.key(cypher, parameters)), "wb") as f:
+            pickle.dump(
+                {
+                    "cypher": _QUERY_TOKEN.sub("", cypher),
+                    "parameters": parameters,
+                    "result": result,
+                    "elapsed": elapsed,
+                },
+                f,
+            )
+
+    def load(self, cypher: str, parameters: Optional[dict] = None) -> Dict[str, Any]:
+        """
+        Load a recorded query from the archive.
+
+        Raises:
+            KeyError: If the query was never recorded
+
+        """
+        path = self._entry_path(self.key(cypher, parameters))
+        if not os.path.exists(path):
+            raise KeyError(f"This query is not in the archive {self.path}: {cypher}")
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all of the recorded queries in the archive.
+        """
+        for name in sorted(os.listdir(self.path)):
+            if name.endswith(".pkl"):
+                with open(os.path.join(self.path, name), "rb") as f:
+                    yield pickle.load(f)
+
+
+def _archive(archive: Union[str, QueryArchive]) -> QueryArchive:
+    return archive if isinstance(archive, QueryArchive) else QueryArchive(archive)
+
+
+def _client_parameters(args: tuple, kwargs: dict) -> Optional[dict]:
+    """
+    Key the extra arguments to `fetch_custom` like query parameters.
+    """
+    return {"args": args, **kwargs} if args or kwargs else None
+
+
+def _wait(latency: Union[str, float], elapsed: float) -> None:
+    """
+    Sleep for the recorded time ("recorded") or for a fixed number of seconds.
+    """
+    delay = elapsed if latency == "recorded" else float(latency or 0)
+    if delay > 0:
+        time.sleep(delay)
+
+
+class RecordingClient:
+    """
+    A neuPrint client that saves every `fetch_custom` query to an archive.
+
+    All other attributes are read from the wrapped client.
+
+    """
+
+    def __init__(self, client, archive: Union[str, QueryArchive]) -> None:
+        """
+        Arguments:
+            client (neuprint.Client): The client to send queries to
+            archive (str | QueryArchive): Where to record the queries
+
+        """
+        self._client = client
+        self.archive = _archive(archive)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+    def fetch_custom(self, cypher: str, *args, **kwargs):
+        start = time.perf_counter()
+        result = self._client.fetch_custom(cypher, *args, **kwargs)
+        elapsed = time.perf_counter() - start
+        self.archive.save(cypher, _client_parameters(args, kwargs), result, elapsed)
+        return result
+
+
+class ReplayClient:
+    """
+    A stand-in for a neuPrint client that answers queries from an archive.
+    """
+
+    def __init__(
+        self,
+        archive: Union[str, QueryArchive],
+        latency: Union[str, float] = "recorded",
+        server: str = "replay",
+        dataset: str = "replay",
+    ) -> None:
+        """
+        Arguments:
+            archive (str | QueryArchive): The recorded queries
+            latency ("recorded" | float): Either "recorded", to wait as long
+                as the query took when it was recorded, or a fixed delay in
+                seconds (0 for none)
+            server (str: "replay"): The server name to report, which
+                NeuPrintExecutor uses for its cache keys
+            dataset (str: "replay"): The dataset name to report
+
+        """
+        self.archive = _archive(archive)
+        self.latency = latency
+        self.server = server
+        self.dataset = dataset
+
+    def fetch_custom(self, cypher: str, *args, **kwargs):
+        entry = self.archive.load(cypher, _client_parameters(args, kwargs))
+        _wait(self.latency, entry["elapsed"])
+        return entry["result"].copy()
+
+
+def _detached(value: Any) -> Any:
+    """
+    Copy py2neo nodes and relationships so they can be pickled without their
+    connection to the database.
+
+    Relationship classes are created on the fly by py2neo, and so cannot be
+    pickled; relationships are stored as tuples and rebuilt by `_attached`.
+
+    """
+    if isinstance(value, Relationship):
+        return (
+            _RELATIONSHIP,
+            type(value).__name__,
+            _detached(value.start_node),
+            _detached(value.end_node),
+            dict(value),
+            value.identity,
+        )
+    if isinstance(value, Node):
+        copy = Node(*value.labels, **dict(value))
+        copy.identity = value.identity
+        return copy
+    if isinstance(value, list):
+        return [_detached(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _detached(v) for k, v in value.items()}
+    return value
+
+
+def _attached(value: Any) -> Any:
+    """
+    Rebuild the relationships in a value stored by `_detached`.
+    """
+    if isinstance(value, tuple) and value and value[0] == _RELATIONSHIP:
+        _, kind, start, end, properties, identity = value
+        relationship = Relationship(start, kind, end, **properties)
+        relationship.identity = identity
+        return relationship
+    if isinstance(value, list):
+        return [_attached(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _attached(v) for k, v in value.items()}
+    return value
+
+
+class _ReplayCursor:
+    """
+    A fully-read query result that behaves like a py2neo Cursor.
+    """
+
+    def __init__(self, keys: List[str], rows: List[Tuple], plan: Any = None) -> None:
+        self._keys = keys
+        self._records = [
+            Record(keys, [_attached(value) for value in row]) for row in rows
+        ]
+        self._plan = plan
+
+    def keys(self) -> List[str]:
+        return list(self._keys)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def plan(self):
+        return self._plan
+
+    def evaluate(self, field=0):
+        return self._records[0][field] if self._records else None
+
+    def data(self) -> List[dict]:
+        return [record.data() for record in self._records]
+
+    def to_table(self):
+        return Table(self._records, keys=self._keys)
+
+    def to_data_frame(self):
+        return pd.DataFrame([tuple(r) for r in self._records], columns=self._keys)
+
+
+class RecordingGraph(Graph):
+    """
+    A py2neo Graph that saves every query, and its full result, to an archive.
+
+    Results are read in full before they are returned, so queries are not
+    streamed while recording.
+
+    """
+
+    def __init__(self, graph, archive: Union[str, QueryArchive]) -> None:
+        """
+        Arguments:
+            graph (py2neo.Graph): The graph to send queries to
+            archive (str | QueryArchive): Where to record the queries
+
+        """
+        self._graph = graph
+        self.archive = _archive(archive)
+
+    def __getattr__(self, name: str):
+        return getattr(self._graph, name)
+
+    def run(self, cypher: str, parameters: dict = None, **kwparameters):
+        parameters = {**(parameters or {}), **kwparameters} or None
+        start = time.perf_counter()
+        cursor = self._graph.run(cypher, parameters)
+        rows = [tuple(_detached(v) for v in record) for record in cursor]
+        elapsed = time.perf_counter() - start
+        result = {"keys": list(cursor.keys()), "rows": rows, "plan": cursor.plan()}
+        self.archive.save(cypher, parameters, result, elapsed)
+        return _ReplayCursor(**result)
+
+
+class ReplayGraph(Graph):
+    """
+    A stand-in for a py2neo Graph that answers queries from an archive.
+    """
+
+    def __init__(
+        self,
+        archive: Union[str, QueryArchive],
+        latency: Union[str, float] = "recorded",
+    ) -> None:
+        """
+        Arguments:
+            archive (str | QueryArchive): The recorded queries
+            latency ("recorded" | float): Either "recorded", to wait as long
+                as the query took when it was recorded, or a fixed delay in
+                seconds (0 for none)
+
+        """
+        self.archive = _archive(archive)
+        self.latency = latency
+
+    def run(self, cypher: str, parameters: dict = None, **kwparameters):
+        parameters = {**(parameters or {}), **kwparameters} or None
+        entry = self.archive.load(cypher, parameters)
+        _wait(self.latency, entry["elapsed"])
+        return _ReplayCursor(**entry["result"])
+
+
+__all__ = [
+    "QueryArchive",
+    "RecordingClient",
+    "ReplayClient",
+    "RecordingGraph",
+    "ReplayGraph",
+]
@@ -0,0 +1,43 @@
+import unittest
+from unittest import mock
+
+import networkx as nx
+import numpy as np
+
+from dotmotif.executors import BitsetExecutor
+from dotmotif.executors._testing import ExecutorTestCase, host
+from dotmotif.executors.BitsetExecutor import _pack, _popcount, _unpack
+
+
+class TestBitsets(unittest.TestCase):
+    def test_pack_and_unpack(self):
+        dense = np.zeros(128, dtype=bool)
+        dense[[0, 5, 63, 64, 127]] = True
+        words = _pack(dense)
+        self.assertEqual(words.dtype, np.uint64)
+        self.assertEqual(len(words), 2)
+        self.assertEqual(list(_unpack(words)), [0, 5, 63, 64, 127])
+        self.assertEqual(_popcount(words), 5)
+
+    def test_popcount_without_bitwise_count(self):
+        words = _pack(np.arange(128) % 3 == 0)
+        with mock.patch("dotmotif.executors.BitsetExecutor._HAS_BITWISE_COUNT", False):
+            self.assertEqual(_popcount(words), 43)
+
+
+class TestBitsetExecutor(ExecutorTestCase, unittest.TestCase):
+    def setUp(self):
+        # A small, dense graph (about 25% connection density):
+        self.graph = host(nx.gnp_random_graph(40, 0.25, seed=3, directed=True))
+        self.executor = BitsetExecutor(graph=self.graph)
+
+    def test_adjacency_bitsets(self):
+        adjacency = self.executor._edges(True)
+        rows = self.executor._rows(adjacency)
+        self.assertEqual(rows.shape, (40, 1))
+        for u in self.graph.nodes():
+            self.assertEqual(list(_unpack(rows[u])), sorted(self.graph.successors(u)))
+
+        self.executor.clear_cache()
+        self.assertIsNot(self.executor._rows(adjacency), rows)
+        self.assertTrue((self.executor._rows(adjacency) == rows).all())
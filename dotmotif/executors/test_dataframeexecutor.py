@@ -0,0 +1,52 @@
+import unittest
+
+import networkx as nx
+import pandas as pd
+
+from dotmotif import Motif
+from dotmotif.executors import DataFrameExecutor, NetworkXExecutor
+from dotmotif.executors._testing import ExecutorTestCase, host, matches
+
+
+class TestDataFrameExecutor(ExecutorTestCase, unittest.TestCase):
+    def setUp(self):
+        self.graph = host()
+        self.executor = DataFrameExecutor(graph=self.graph)
+
+    def test_self_loops(self):
+        self.assertEqual(
+            DataFrameExecutor(graph=nx.DiGraph([(0, 0), (0, 1)])).find(Motif("A -> B")),
+            [{"A": 0, "B": 1}],
+        )
+        graph = self.graph.copy()
+        graph.add_edges_from([(n, n, {"weight": n % 11}) for n in range(0, 30, 4)])
+        executor = DataFrameExecutor(graph=graph)
+        for text in [
+            *self.motifs[:4],
+            "A -> A\nA -> B",
+            "A -> A [weight > 3]\nB -> B\nA -> B",
+            "A -> B\nA !> A",
+        ]:
+            motif = Motif(text)
+            expected = NetworkXExecutor(graph=graph).find(motif)
+            self.assertEqual(matches(executor.find(motif)), matches(expected), text)
+
+    def test_join_order_starts_with_the_most_selective_edge(self):
+        motif = Motif("A -> B\nB -> C [weight = 3]\nC -> D")
+        relations = self.executor._edge_relations(motif, self.executor.edges)
+        order = DataFrameExecutor._join_order(relations)
+        self.assertEqual(order[0], ("B", "C"))
+        self.assertEqual(set(order[1:]), {("A", "B"), ("C", "D")})
+
+    def test_edge_and_node_tables(self):
+        edges = pd.DataFrame(
+            {"pre": [1, 2, 3, 1], "post": [2, 3, 1, 3], "weight": [5, 1, 8, 2]}
+        )
+        nodes = pd.DataFrame({"type": ["KC", "KC", "PN"]}, index=[1, 2, 3])
+        E = DataFrameExecutor(edges=edges, nodes=nodes, source="pre", target="post")
+        self.assertEqual(E.count(Motif("A -> B [weight > 2]")), 2)
+        self.assertEqual(
+            E.find(Motif('A -> B\nB.type = "PN"\nA !> C\nB -> C')),
+            [{"A": 2, "B": 3, "C": 1}],
+        )
+        self.assertEqual(len(E.find(Motif("A -> B"), limit=3)), 3)
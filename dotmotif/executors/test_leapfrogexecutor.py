@@ -0,0 +1,59 @@
+import importlib.util
+import tempfile
+import unittest
+
+import numpy as np
+
+from dotmotif import Motif
+from dotmotif.executors import BitsetExecutor, LeapfrogExecutor, NetworkXExecutor
+from dotmotif.executors._testing import ExecutorTestCase, host, matches
+from dotmotif.executors.LeapfrogExecutor import _leapfrog_intersect
+from dotmotif.snapshot import write_snapshot
+
+
+class TestLeapfrogExecutor(ExecutorTestCase, unittest.TestCase):
+    def setUp(self):
+        self.graph = host()
+        self.executor = LeapfrogExecutor(graph=self.graph)
+
+    def test_intersection(self):
+        arrays = [
+            np.array([1, 3, 5, 7, 9]),
+            np.array([3, 4, 5, 9]),
+            np.array([0, 5, 9]),
+        ]
+        self.assertEqual(list(_leapfrog_intersect(arrays[:2])), [3, 5, 9])
+        self.assertEqual(list(_leapfrog_intersect(arrays)), [5, 9])
+        self.assertEqual(list(_leapfrog_intersect([arrays[0], np.array([])])), [])
+
+    def test_self_loops(self):
+        graph = self.graph.copy()
+        graph.add_edges_from([(n, n, {"weight": n % 11}) for n in range(0, 30, 4)])
+        for text in [
+            "A -> A\nA -> B",
+            "A -> A [weight > 3]\nB -> B\nA -> B",
+            "A -> B\nB -> C\nA !> A",
+            "A -> B\nB -> C\nC -> A",
+        ]:
+            motif = Motif(text)
+            expected = NetworkXExecutor(graph=graph).find(motif)
+            for executor in (
+                LeapfrogExecutor(graph=graph),
+                BitsetExecutor(graph=graph),
+            ):
+                self.assertEqual(matches(executor.find(motif)), matches(expected), text)
+                self.assertEqual(executor.count(motif), len(expected), text)
+
+    def test_limit(self):
+        motif = Motif("A -> B\nB -> C\nC -> A")
+        self.assertEqual(len(self.executor.find(motif, limit=4)), 4)
+        self.assertEqual(self.executor.count(motif, limit=4), 4)
+
+    @unittest.skipUnless(
+        importlib.util.find_spec("pyarrow"), "pyarrow is not installed"
+    )
+    def test_snapshot(self):
+        motif = Motif('A -> B [weight > 4]\nB -> C\nC -> A\nA.type = "KC"')
+        with tempfile.TemporaryDirectory() as directory:
+            E = LeapfrogExecutor(snapshot=write_snapshot(self.graph, directory))
+            self.assertEqual(matches(E.find(motif)), matches(self.executor.find(motif)))
@@ -1,7 +1,13 @@
 import dotmotif
+from dotmotif.executors import QueryCancelledError, QueryTimeoutError
 from dotmotif.executors.Neo4jExecutor import Neo4jExecutor, _quoted_if_necessary
+import threading
 import unittest
 
+import networkx as nx
+from py2neo import Graph
+from py2neo.errors import ClientError
+
 
 class TestNeo4jExecutor_Automorphisms(unittest.TestCase):
     def test_basic_node_attr(self):
@@ -33,3 +39,619 @@ class TestQuotingIfNecessary(unittest.TestCase):
         self.assertEqual(_quoted_if_necessary("""don't break"""), '''"don't break"'''),
         self.assertEqual(_quoted_if_necessary("foo bar"), '"foo bar"')
         self.assertEqual(_quoted_if_necessary("foo"), '"foo"')
+
+
+class _FakeCursor:
+    def __init__(self, rows, plan=None):
+        self._rows = rows
+        self._plan = plan
+
+    def plan(self):
+        return self._plan
+
+    def evaluate(self):
+        return next(iter(self._rows))[0]
+
+    def to_table(self):
+        return self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class _FakeGraph(Graph):
+    """
+    A stand-in for a py2neo.Graph that records queries instead of running them.
+    """
+
+    def __init__(self, rows=None, plan=None):
+        self.queries = []
+        self._rows = rows if rows is not None else [[0]]
+        self._plan = plan
+
+    def run(self, cypher, parameters=None, **kwparameters):
+        self.queries.append((cypher, parameters))
+        if callable(self._rows):
+            return _FakeCursor(self._rows(cypher, parameters), self._plan)
+        return _FakeCursor(self._rows, self._plan)
+
+
+class TestParameterizedCypher(unittest.TestCase):
+    def test_values_become_parameters(self):
+        dm = dotmotif.Motif(
+            """
+            A -> B [weight >= 4]
+            A.type = "KC"
+            B.name contains "x"
+            A.size > B.size
+            """
+        )
+        cypher, parameters = Neo4jExecutor.motif_to_parameterized_cypher(dm)
+        self.assertIn("A_B.`weight` >= $", cypher)
+        self.assertIn("A.`type` = $", cypher)
+        self.assertIn("A.`size` > B.`size`", cypher)
+        self.assertNotIn('"KC"', cypher)
+        self.assertEqual(
+            sorted(parameters.values(), key=str), sorted([4, "KC", "x"], key=str)
+        )
+
+    def test_query_text_is_stable_across_values(self):
+        a = dotmotif.Motif('A -> B\nA.type = "x"\nA.size > 3')
+        b = dotmotif.Motif('A -> B\nA.type = "y"\nA.size > 7')
+        cypher_a, parameters_a = Neo4jExecutor.motif_to_parameterized_cypher(a)
+        cypher_b, parameters_b = Neo4jExecutor.motif_to_parameterized_cypher(b)
+        self.assertEqual(cypher_a, cypher_b)
+        self.assertNotEqual(parameters_a, parameters_b)
+
+    def test_awkward_keys_are_escaped(self):
+        dm = dotmotif.Motif(
+            """
+            A -> B
+            A["it's a `key`"] = "don't"
+            """
+        )
+        cypher, parameters = Neo4jExecutor.motif_to_parameterized_cypher(dm)
+        self.assertIn("A.`it's a ``key```", cypher)
+        self.assertEqual(len(parameters), 1)
+
+    def test_find_and_count_send_parameters(self):
+        graph = _FakeGraph(rows=[[3]])
+        E = Neo4jExecutor(graph=graph)
+        dm = dotmotif.Motif('A -> B\nA.type = "x"')
+        self.assertEqual(E.count(dm), 3)
+        E.find(dm, limit=5)
+        (count_query, count_parameters), (find_query, find_parameters) = graph.queries
+        self.assertIn("$p0", count_query)
+        self.assertEqual(count_parameters, {"p0": "x"})
+        self.assertTrue(find_query.endswith("LIMIT $limit"))
+        self.assertEqual(find_parameters, {"p0": "x", "limit": 5})
+
+
+class TestCount(unittest.TestCase):
+    def _executor(self, version="5.20.0", **kwargs):
+        def _rows(cypher, parameters):
+            if cypher.startswith("CALL dbms.components()"):
+                return [[version]]
+            return [[7]]
+
+        graph = _FakeGraph(rows=_rows)
+        return graph, Neo4jExecutor(graph=graph, **kwargs)
+
+    def test_limit_is_pushed_into_the_match(self):
+        graph, E = self._executor()
+        self.assertEqual(E.count(dotmotif.Motif("A -> B\nB -> C"), limit=10), 7)
+        query, parameters = graph.queries[-1]
+        self.assertTrue(query.startswith("CALL {"))
+        self.assertIn("RETURN DISTINCT A,B,C\nLIMIT $p0\n}\nRETURN count(*)", query)
+        self.assertEqual(parameters, {"p0": 10})
+
+    def test_unique_relationships_skip_distinct(self):
+        graph, E = self._executor(unique_relationships=True)
+        E.count(dotmotif.Motif("A -> B\nB -> C\nC -> A"))
+        query = graph.queries[-1][0]
+        self.assertNotIn("DISTINCT", query)
+        self.assertTrue(query.endswith("RETURN count(*) AS count"))
+        # Undirected matches can still repeat, so they are deduplicated:
+        E.count(dotmotif.Motif("A -> B\nB -> C\nC -> A", ignore_direction=True))
+        self.assertIn("WITH DISTINCT", graph.queries[-1][0])
+
+    def test_leaves_are_counted_with_subqueries(self):
+        graph, E = self._executor(unique_relationships=True)
+        dm = dotmotif.Motif('A -> B\nA -> C [weight > 2]\nC.type = "KC"\nA.size > 1')
+        E.count(dm)
+        query, parameters = graph.queries[-1]
+        self.assertEqual(
+            " ".join(query.split("\n")),
+            "MATCH (A:Neuron) WHERE A.`size` > $p2 RETURN sum("
+            "COUNT { (A)-[A_B:SYN]->(B:Neuron) } * "
+            "COUNT { (A)-[A_C:SYN]->(C:Neuron) "
+            "WHERE C.`type` = $p1 AND A_C.`weight` > $p0 }"
+            ") AS count",
+        )
+        self.assertEqual(parameters, {"p0": 2, "p1": "KC", "p2": 1})
+
+    def test_pattern_comprehension_on_older_servers(self):
+        graph, E = self._executor(version="4.4.12", unique_relationships=True)
+        E.count(dotmotif.Motif("A -> B\nB -> C"))
+        self.assertEqual(
+            graph.queries[-1][0],
+            "MATCH (B:Neuron)\nRETURN sum(size([(A:Neuron)-[A_B:SYN]->(B) | 1]) * "
+            "size([(B)-[B_C:SYN]->(C:Neuron) | 1])) AS count",
+        )
+
+
+class TestManyMotifs(unittest.TestCase):
+    def test_count_many_in_one_query(self):
+        graph = _FakeGraph(rows=[(1, 5), (0, 3)])
+        E = Neo4jExecutor(graph=graph)
+        motifs = [
+            dotmotif.Motif('A -> B\nA.type = "x"', pretty_print=False),
+            dotmotif.Motif('A -> B\nB -> C\nC.type = "y"', pretty_print=False),
+            dotmotif.Motif("A -> A", pretty_print=False),
+        ]
+        self.assertEqual(E.count_many(motifs), [3, 5, 0])
+        ((query, parameters),) = graph.queries
+        self.assertEqual(query.count("UNION ALL"), 2)
+        self.assertIn("} RETURN 1 AS motif, count", query)
+        self.assertIn("A.`type` = $m0_p0", query)
+        self.assertIn("C.`type` = $m1_p0", query)
+        self.assertEqual(parameters, {"m0_p0": "x", "m1_p0": "y"})
+
+    def test_find_many_splits_results_per_motif(self):
+        graph = _FakeGraph(rows=[(0, [1, 2]), (1, [3, 4, 5]), (0, [6, 7])])
+        E = Neo4jExecutor(graph=graph)
+        first, second = E.find_many(
+            [dotmotif.Motif("A -> B"), dotmotif.Motif("X -> Y\nY -> Z")], limit=4
+        )
+        self.assertEqual(first.to_dict("list"), {"A": [1, 6], "B": [2, 7]})
+        self.assertEqual(second.to_dict("list"), {"X": [3], "Y": [4], "Z": [5]})
+        query, parameters = graph.queries[-1]
+        self.assertIn("RETURN DISTINCT 0 AS motif, [id(A), id(B)] AS ids", query)
+        self.assertEqual(query.count("LIMIT $limit"), 2)
+        self.assertEqual(parameters, {"limit": 4})
+
+
+class TestQueryPlans(unittest.TestCase):
+    _PLAN = {
+        "operatorType": "ProduceResults@neo4j",
+        "identifiers": ["A", "B"],
+        "args": {"EstimatedRows": 12.0},
+        "rows": 3,
+        "dbHits": 0,
+        "children": [
+            {
+                "operatorType": "CartesianProduct@neo4j",
+                "identifiers": ["A", "B"],
+                "args": {"EstimatedRows": 12.0},
+                "children": [
+                    {
+                        "operatorType": "NodeByLabelScan@neo4j",
+                        "identifiers": ["A"],
+                        "args": {"EstimatedRows": 4.0, "Details": "A:Neuron"},
+                        "rows": 4,
+                        "dbHits": 5,
+                        "children": [],
+                    },
+                    {
+                        "operatorType": "NodeIndexSeek@neo4j",
+                        "identifiers": ["B"],
+                        "args": {"EstimatedRows": 3.0, "Details": "B:Neuron(type)"},
+                        "children": [],
+                    },
+                ],
+            }
+        ],
+    }
+
+    def test_explain_returns_plan_tree(self):
+        graph = _FakeGraph(plan=self._PLAN)
+        E = Neo4jExecutor(graph=graph)
+        plan = E.explain(dotmotif.Motif('A -> B\nB.type = "x"'), count_only=True)
+        query, parameters = graph.queries[-1]
+        self.assertTrue(query.startswith("EXPLAIN MATCH"))
+        self.assertEqual(parameters, {"p0": "x"})
+        self.assertEqual(plan["operator"], "ProduceResults")
+        self.assertEqual(plan["rows"], 3)
+        scan = plan["children"][0]["children"][0]
+        self.assertEqual(scan["operator"], "NodeByLabelScan")
+        self.assertEqual((scan["estimated_rows"], scan["db_hits"]), (4.0, 5))
+        self.assertEqual(scan["details"], "A:Neuron")
+        self.assertEqual(
+            [w.split(" ")[0] for w in Neo4jExecutor.plan_warnings(plan)],
+            ["CartesianProduct", "NodeByLabelScan"],
+        )
+
+    def test_profile_runs_the_query(self):
+        graph = _FakeGraph(rows=[(1, 2)], plan=self._PLAN)
+        E = Neo4jExecutor(graph=graph)
+        E.profile(dotmotif.Motif("A -> B"), limit=2)
+        query, parameters = graph.queries[-1]
+        self.assertTrue(query.startswith("PROFILE MATCH"))
+        self.assertEqual(parameters, {"limit": 2})
+
+    def test_missing_plan(self):
+        E = Neo4jExecutor(graph=_FakeGraph())
+        with self.assertRaises(RuntimeError):
+            E.explain(dotmotif.Motif("A -> B"))
+
+
+class TestOptimizedPatterns(unittest.TestCase):
+    def test_single_match_of_paths(self):
+        dm = dotmotif.Motif(
+            """
+            A -> B [weight > 3]
+            B -> C [weight = 2]
+            C -> A
+            A !> D
+            A.type = "KC"
+            A.size > 4
+            """,
+            pretty_print=False,
+        )
+        self.assertEqual(
+            Neo4jExecutor.motif_to_cypher(dm, optimize=True),
+            'MATCH (A:Neuron {`type`: "KC"})-[A_B:SYN]->(B:Neuron)'
+            "-[B_C:SYN {`weight`: 2}]->(C:Neuron)-[C_A:SYN]->(A), (D:Neuron) "
+            'WHERE A["size"] > 4 AND A_B["weight"] > 3 '
+            "AND NOT EXISTS { MATCH (A)-[:SYN]->(D) } "
+            "RETURN DISTINCT A,B,C,D",
+        )
+
+    def test_most_constrained_node_first(self):
+        dm = dotmotif.Motif('A -> B\nB -> C\nC.type = "KC"')
+        cypher, parameters = Neo4jExecutor.motif_to_parameterized_cypher(
+            dm, optimize=True
+        )
+        self.assertTrue(
+            cypher.startswith("MATCH (C:Neuron {`type`: $p0})<-[B_C:SYN]-(B:Neuron)")
+        )
+        self.assertEqual(parameters, {"p0": "KC"})
+
+    def test_implied_inequalities_are_skipped(self):
+        dm = dotmotif.Motif(
+            'A -> B\nA -> C\nB -> C\nA.type = "x"\nB.type = "y"',
+            enforce_inequality=True,
+        )
+        query = Neo4jExecutor._build_query(dm, optimize=True)
+        self.assertEqual(
+            [c for c in query.conditions if "<>" in c], ["A <> C", "B <> C"]
+        )
+        # B and C are both reached from A by a SYN edge, so B <> C is implied
+        # when each ordered pair has at most one SYN relationship:
+        query = Neo4jExecutor._build_query(dm, optimize=True, unique_relationships=True)
+        self.assertEqual([c for c in query.conditions if "<>" in c], ["A <> C"])
+
+    def test_executor_option(self):
+        graph = _FakeGraph(rows=[[1]])
+        E = Neo4jExecutor(graph=graph, optimize_patterns=True)
+        E.count(dotmotif.Motif('A -> B\nB -> C\nA.type = "x"', pretty_print=False))
+        self.assertTrue(
+            graph.queries[-1][0].startswith(
+                "MATCH (A:Neuron {`type`: $p0})-[A_B:SYN]->(B:Neuron)"
+                "-[B_C:SYN]->(C:Neuron) WITH DISTINCT"
+            )
+        )
+
+
+class TestCountBy(unittest.TestCase):
+    def test_grouping_runs_on_the_server(self):
+        graph = _FakeGraph(rows=[("KC", "PN", 12), ("KC", "KC", 3)])
+        E = Neo4jExecutor(graph=graph)
+        dm = dotmotif.Motif('A -> B\nB -> C\nC.type = "x"', pretty_print=False)
+        counts = E.count_by(dm, ["A.type", "B.type"])
+        self.assertEqual(list(counts.columns), ["A.type", "B.type", "count"])
+        self.assertEqual(counts["count"].tolist(), [12, 3])
+        query, parameters = graph.queries[-1]
+        self.assertTrue(
+            query.endswith(
+                "WITH DISTINCT A,B,C RETURN A.`type` AS `A.type`, "
+                "B.`type` AS `B.type`, count(*) AS count ORDER BY count DESC"
+            )
+        )
+        self.assertEqual(parameters, {"p0": "x"})
+
+    def test_ungrouped_leaves_are_counted(self):
+        def _rows(cypher, parameters):
+            if cypher.startswith("CALL dbms.components()"):
+                return [["5.20.0"]]
+            return []
+
+        graph = _FakeGraph(rows=_rows)
+        E = Neo4jExecutor(graph=graph, unique_relationships=True)
+        dm = dotmotif.Motif("A -> B\nB -> C", pretty_print=False)
+        E.count_by(dm, ["A.type"])
+        self.assertEqual(
+            graph.queries[-1][0],
+            "MATCH (A:Neuron)-[A_B:SYN]->(B:Neuron) "
+            "RETURN A.`type` AS `A.type`, "
+            "sum(COUNT { (B)-[B_C:SYN]->(C:Neuron) }) AS count ORDER BY count DESC",
+        )
+
+    def test_invalid_key(self):
+        E = Neo4jExecutor(graph=_FakeGraph())
+        with self.assertRaises(ValueError):
+            E.count_by(dotmotif.Motif("A -> B"), ["Z.type"])
+
+
+class TestLoadGraph(unittest.TestCase):
+    def _graph(self):
+        G = nx.DiGraph()
+        G.add_nodes_from([(f"n{i}", {"type": "KC"}) for i in range(5)])
+        G.add_edges_from([(f"n{i}", f"n{i + 1}", {"weight": i}) for i in range(4)])
+        return G
+
+    def test_constraint_then_batched_writes(self):
+        graph = _FakeGraph()
+        E = Neo4jExecutor(graph=graph)
+        created = E.load_graph(self._graph(), batch_size=2)
+        self.assertEqual(created, {"nodes": 5, "relationships": 4})
+        queries = [q for q, _ in graph.queries]
+        self.assertIn("CREATE CONSTRAINT `dotmotif_Neuron_neuronId`", queries[0])
+        self.assertIn("REQUIRE n.`neuronId` IS UNIQUE", queries[0])
+        # 3 node batches, then 2 edge batches:
+        self.assertEqual(sum("CREATE (n:`Neuron`" in q for q in queries[1:4]), 3)
+        self.assertEqual(sum("CREATE (u)-[r:`SYN`]->(v)" in q for q in queries[4:]), 2)
+        self.assertEqual(
+            graph.queries[4][1]["rows"][0],
+            {"u": "n0", "v": "n1", "properties": {"weight": 0}},
+        )
+
+    def test_parallel_writers_retry_failed_batches(self):
+        failures = []
+
+        def _rows(cypher, parameters):
+            if "CREATE (u)" in cypher and not failures:
+                failures.append(cypher)
+                raise RuntimeError("deadlock")
+            return [[0]]
+
+        graph = _FakeGraph(rows=_rows)
+        E = Neo4jExecutor(graph=graph)
+        created = E.load_graph(self._graph(), batch_size=1, workers=3)
+        self.assertEqual(created, {"nodes": 5, "relationships": 4})
+        self.assertEqual(len(failures), 1)
+
+
+class TestTimeouts(unittest.TestCase):
+    def _executor(self, **kwargs):
+        terminated = threading.Event()
+
+        def _slow_rows(rows):
+            yield from rows
+            terminated.wait(5)
+            raise RuntimeError("Transaction terminated")
+
+        def _rows(cypher, parameters):
+            if cypher.startswith("SHOW TRANSACTIONS"):
+                return [["neo4j-transaction-7"]]
+            if cypher.startswith("TERMINATE"):
+                terminated.set()
+                return []
+            if cypher.startswith("/* dotmotif:"):
+                return _slow_rows([] if "count(*)" in cypher else [(1, 2), (3, 4)])
+            return [[0]]
+
+        graph = _FakeGraph(rows=_rows)
+        return graph, Neo4jExecutor(graph=graph, **kwargs)
+
+    def test_timeout_terminates_on_server(self):
+        graph, E = self._executor()
+        with self.assertRaises(QueryTimeoutError) as error:
+            E.find(dotmotif.Motif("A -> B"), timeout=0.1)
+        self.assertEqual(error.exception.partial, [(1, 2), (3, 4)])
+        queries = dict(graph.queries)
+        (token,) = [q.split(" ")[1] for q in queries if q.startswith("/*")]
+        self.assertEqual(
+            [p for q, p in graph.queries if q.startswith("SHOW TRANSACTIONS")],
+            [{"token": token}],
+        )
+        self.assertEqual(
+            queries["TERMINATE TRANSACTIONS $ids"], {"ids": ["neo4j-transaction-7"]}
+        )
+
+    def test_timeout_keeps_partial_tables(self):
+        graph, E = self._executor()
+        with self.assertRaises(QueryTimeoutError) as error:
+            E.find(dotmotif.Motif("A -> B"), cursor=False, timeout=0.1)
+        self.assertEqual(error.exception.partial, [(1, 2), (3, 4)])
+
+        E = Neo4jExecutor(graph=_FakeGraph(rows=[(1, 2), (3, 4)]))
+        table = E.find(dotmotif.Motif("A -> B"), cursor=False, timeout=5)
+        self.assertEqual(table.keys(), ["A", "B"])
+        self.assertEqual([tuple(row) for row in table], [(1, 2), (3, 4)])
+
+    def test_executor_default_timeout(self):
+        graph, E = self._executor(timeout=0.1)
+        with self.assertRaises(QueryTimeoutError):
+            E.count(dotmotif.Motif("A -> B"))
+
+    def test_cancel_handle(self):
+        graph, E = self._executor()
+        handle = E.submit("MATCH (n) RETURN n")
+        self.assertTrue(handle.cancel())
+        with self.assertRaises(QueryCancelledError):
+            handle.result(timeout=5)
+        self.assertFalse(handle.cancel())
+
+    def test_terminate_falls_back_on_old_servers(self):
+        def _rows(cypher, parameters):
+            if cypher.startswith("SHOW TRANSACTIONS"):
+                raise ClientError.hydrate(
+                    {"code": "Neo.ClientError.Statement.SyntaxError", "message": ""}
+                )
+            return [["query-3"]]
+
+        graph = _FakeGraph(rows=_rows)
+        self.assertEqual(Neo4jExecutor(graph=graph)._terminate("dotmotif:1"), 1)
+        self.assertIn("dbms.killQuery", graph.queries[-1][0])
+
+    def test_terminate_raises_other_errors(self):
+        def _rows(cypher, parameters):
+            raise ClientError.hydrate(
+                {"code": "Neo.ClientError.Security.Forbidden", "message": "denied"}
+            )
+
+        graph = _FakeGraph(rows=_rows)
+        with self.assertRaises(ClientError):
+            Neo4jExecutor(graph=graph)._terminate("dotmotif:1")
+        self.assertEqual(len(graph.queries), 1)
+
+    def test_no_timeout_returns_a_cursor(self):
+        graph, E = self._executor()
+        self.assertEqual(list(E.run("RETURN 1")), [[0]])
+        self.assertEqual(graph.queries, [("RETURN 1", None)])
+
+
+class TestFindBatches(unittest.TestCase):
+    def test_batches_are_columnar(self):
+        graph = _FakeGraph(rows=[(i, i + 100) for i in range(5)])
+        E = Neo4jExecutor(graph=graph)
+        dm = dotmotif.Motif("A -> B")
+        batches = list(E.find_batches(dm, batch_size=2))
+        self.assertEqual([len(b) for b in batches], [2, 2, 1])
+        self.assertEqual(list(batches[0].columns), ["A", "B"])
+        self.assertEqual(list(batches[2]["B"]), [104])
+        ((query, _),) = graph.queries
+        self.assertIn("RETURN DISTINCT id(A) AS A, id(B) AS B", query)
+
+    def test_batch_formats_and_id_property(self):
+        graph = _FakeGraph(rows=[(1, 2), (3, 4)])
+        E = Neo4jExecutor(graph=graph)
+        dm = dotmotif.Motif("A -> B")
+        (batch,) = E.find_batches(dm, id_property="bodyId", format="numpy", limit=9)
+        self.assertEqual(list(batch["A"]), [1, 3])
+        (batch,) = E.find_batches(dm, format="arrow")
+        self.assertEqual(batch.column("B").to_pylist(), [2, 4])
+        query, parameters = graph.queries[0]
+        self.assertIn("A.`bodyId` AS A", query)
+        self.assertEqual(parameters, {"limit": 9})
+
+
+class TestAnchoredFind(unittest.TestCase):
+    def test_anchors_are_unwound_and_tagged(self):
+        graph = _FakeGraph(rows=[(10, 10, 20, 30), (11, 11, 21, 31), (10, 10, 22, 30)])
+        E = Neo4jExecutor(graph=graph, planner_hints=True)
+        dm = dotmotif.Motif("A -> B\nB -> C\nA -> C", pretty_print=False)
+        batches = list(
+            E.find_anchored(dm, "A", [10, 11], batch_size=2, id_property="bodyId")
+        )
+        self.assertEqual([len(b) for b in batches], [2, 1])
+        self.assertEqual(list(batches[0].columns), ["anchor", "A", "B", "C"])
+        self.assertEqual(batches[1].iloc[0].tolist(), [10, 10, 22, 30])
+        ((query, parameters),) = graph.queries
+        self.assertTrue(
+            query.startswith(
+                "UNWIND $anchors AS __anchor "
+                "MATCH (A:Neuron) WHERE A.`bodyId` = __anchor MATCH"
+            )
+        )
+        self.assertNotIn("USING", query)
+        self.assertEqual(parameters, {"anchors": [10, 11]})
+
+    def test_anchor_must_be_in_motif(self):
+        E = Neo4jExecutor(graph=_FakeGraph())
+        with self.assertRaises(ValueError):
+            next(E.find_anchored(dotmotif.Motif("A -> B"), "Z", [1]))
+
+
+class TestShardedQueries(unittest.TestCase):
+    def test_count_sharded_by_hash(self):
+        graph = _FakeGraph(rows=[[3]])
+        E = Neo4jExecutor(graph=graph)
+        dm = dotmotif.Motif('A -> B\nB.type = "x"')
+        self.assertEqual(E.count_sharded(dm, shards=4), 12)
+        self.assertEqual(len(graph.queries), 4)
+        self.assertTrue(
+            all("id(B) % $shard_count = $shard_index" in q for q, _ in graph.queries)
+        )
+        self.assertEqual(
+            sorted(p["shard_index"] for _, p in graph.queries), [0, 1, 2, 3]
+        )
+        self.assertTrue(all(p["p0"] == "x" for _, p in graph.queries))
+
+    def test_find_sharded_by_range(self):
+        def _rows(cypher, parameters):
+            if "min(" in cypher:
+                return [(0, 99)]
+            return [(parameters["shard_start"], parameters["shard_start"] + 1)]
+
+        graph = _FakeGraph(rows=_rows)
+        E = Neo4jExecutor(graph=graph)
+        dm = dotmotif.Motif("A -> B")
+        results = E.find_sharded(dm, shards=2, anchor="A", partition="range")
+        self.assertEqual(list(results.columns), ["A", "B"])
+        self.assertEqual(sorted(results["A"]), [0, 50])
+        self.assertIn(
+            "id(A) >= $shard_start AND id(A) < $shard_stop", graph.queries[-1][0]
+        )
+
+    def test_failed_shards_are_retried(self):
+        failures = []
+
+        def _rows(cypher, parameters):
+            if parameters["shard_index"] == 1 and not failures:
+                failures.append(parameters)
+                raise ConnectionError("transient")
+            return [[1]]
+
+        E = Neo4jExecutor(graph=_FakeGraph(rows=_rows))
+        dm = dotmotif.Motif("A -> B")
+        self.assertEqual(E.count_sharded(dm, shards=2, retries=1), 2)
+        with self.assertRaises(RuntimeError):
+            failures.clear()
+            E.count_sharded(dm, shards=2, retries=0)
+
+    def test_sharded_results_respect_the_motif_limit(self):
+        E = Neo4jExecutor(graph=_FakeGraph(rows=[[3]]))
+        dm = dotmotif.Motif("A -> B", limit=5)
+        self.assertEqual(E.count_sharded(dm, shards=4), 5)
+
+        graph = _FakeGraph(rows=[(1, 2), (3, 4), (5, 6)])
+        E = Neo4jExecutor(graph=graph)
+        self.assertEqual(len(E.find_sharded(dm, shards=4)), 5)
+        self.assertEqual(len(E.find_sharded(dm, shards=4, limit=2)), 2)
+        self.assertTrue(all(q.count("LIMIT") == 1 for q, _ in graph.queries))
+
+
+class TestIndexAdvisor(unittest.TestCase):
+    def _executor(self, indexes=()):
+        def _rows(cypher, parameters):
+            if cypher.startswith("SHOW INDEXES"):
+                return [(["Neuron"], [p]) for p in indexes]
+            return [[0]]
+
+        graph = _FakeGraph(rows=_rows)
+        return graph, Neo4jExecutor(graph=graph, planner_hints=True)
+
+    def test_recommend_and_create_missing_indexes(self):
+        graph, E = self._executor(indexes=["type"])
+        dm = dotmotif.Motif('A -> B\nA.type = "KC"\nB.size > 10\nB.name contains "x"')
+        self.assertEqual(E.recommend_indexes(dm), ["size", "type"])
+        self.assertEqual(E.ensure_indexes(dm, create=True), ["size"])
+        create_query = graph.queries[-1][0]
+        self.assertIn("CREATE INDEX `dotmotif_Neuron_size` IF NOT EXISTS", create_query)
+        self.assertIn("ON (n.`size`)", create_query)
+
+    def test_index_hint_on_most_selective_node(self):
+        graph, E = self._executor(indexes=["type"])
+        dm = dotmotif.Motif('A -> B\nB -> C\nB.size > 10\nC.type = "KC"')
+        E.find(dm)
+        query = graph.queries[-1][0]
+        self.assertTrue(
+            query.startswith(
+                "MATCH (C:`Neuron`) USING INDEX C:`Neuron`(`type`) WHERE C.`type` = $"
+            )
+        )
+        # The hinted node's predicates are not repeated in the main WHERE:
+        self.assertEqual(query.count("C.`type`"), 1)
+        self.assertIn("B.`size` > $", query)
+
+    def test_scan_hint_without_indexes(self):
+        graph, E = self._executor()
+        dm = dotmotif.Motif("A -> B\nB -> C\nB.size > 10")
+        E.count(dm)
+        self.assertTrue(
+            graph.queries[-1][0].startswith(
+                "MATCH (B:`Neuron`) USING SCAN B:`Neuron` WHERE B.`size` > $"
+            )
+        )
@@ -1,14 +1,230 @@
 import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from .. import Motif
+from .NeuPrintExecutor import NeuPrintExecutor
 
 HOST = "neuprint.janelia.org"
 DATASET = "hemibrain:v1.1"
 TOKEN = os.getenv("NEUPRINT_TOKEN")
-if TOKEN:
 
-    import unittest
 
-    from .. import Motif
-    from .NeuPrintExecutor import NeuPrintExecutor
+class _FakeClient:
+    server = "https://neuprint.example.org"
+    dataset = "hemibrain:v1.2.1"
+
+    def __init__(self):
+        self.queries = []
+
+    def fetch_custom(self, cypher):
+        self.queries.append(cypher)
+        return pd.DataFrame({"count": [len(self.queries)]})
+
+
+class TestNeuPrintCaching(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+
+    def test_rois_are_fetched_lazily_and_cached_on_disk(self):
+        motif = Motif('A -> B [weight > 10, "CA(R).post" > 5]')
+        with mock.patch(
+            "dotmotif.executors.NeuPrintExecutor.fetch_all_rois",
+            return_value=["CA(R)", "PB"],
+        ) as fetch_all_rois:
+            E = NeuPrintExecutor(client=_FakeClient(), cache_dir=self.cache_dir)
+            E.count(Motif("A -> B"))
+            fetch_all_rois.assert_not_called()
+            E.count(motif)
+            self.assertEqual(fetch_all_rois.call_count, 1)
+            self.assertIn("apoc.convert.fromJsonMap", E.client.queries[-1])
+
+            other = NeuPrintExecutor(client=_FakeClient(), cache_dir=self.cache_dir)
+            self.assertEqual(other.rois, ["CA(R)", "PB"])
+            self.assertEqual(fetch_all_rois.call_count, 1)
+
+    def test_result_cache(self):
+        motif = Motif("A -> B")
+        E = NeuPrintExecutor(
+            client=_FakeClient(), cache_dir=self.cache_dir, cache_results=True
+        )
+        self.assertEqual(E.count(motif), 1)
+        self.assertEqual(E.count(motif), 1)
+        self.assertEqual(len(E.client.queries), 1)
+
+        # A new executor (e.g. after a notebook restart) reads from disk:
+        F = NeuPrintExecutor(
+            client=_FakeClient(), cache_dir=self.cache_dir, cache_results=True
+        )
+        self.assertEqual(F.count(motif), 1)
+        self.assertEqual(F.client.queries, [])
+        F.clear_cache()
+        self.assertEqual(F.count(motif), 1)
+        self.assertEqual(len(F.client.queries), 1)
+
+    def test_result_cache_is_per_host_and_dataset(self):
+        motif = Motif("A -> B")
+        clients = [_FakeClient(), _FakeClient(), _FakeClient()]
+        clients[1].server = "https://neuprint-test.example.org"
+        clients[2].dataset = "manc:v1.0"
+        executors = [
+            NeuPrintExecutor(client=c, cache_dir=self.cache_dir, cache_results=True)
+            for c in clients
+        ]
+        for E in executors:
+            E.count(motif)
+            self.assertEqual(len(E.client.queries), 1)
+
+        # Clearing one dataset's cache leaves the others' results on disk:
+        executors[0].clear_cache()
+        for c in clients:
+            c.queries = []
+            NeuPrintExecutor(
+                client=c, cache_dir=self.cache_dir, cache_results=True
+            ).count(motif)
+        self.assertEqual([len(c.queries) for c in clients], [1, 0, 0])
+
+
+class TestNeuPrintUnsupported(unittest.TestCase):
+    def test_graph_only_methods_raise(self):
+        E = NeuPrintExecutor(client=_FakeClient())
+        motif = Motif("A -> B")
+        for call in (
+            lambda: E.explain(motif),
+            lambda: E.profile(motif),
+            lambda: E.count_by(motif, "A", "type"),
+            lambda: list(E.find_batches(motif)),
+            lambda: E.find_anchored(motif, "A", [1, 2]),
+            lambda: E.count_many([motif]),
+            lambda: E.find_many([motif]),
+            lambda: E.load_graph(None),
+            lambda: E.submit("MATCH (n) RETURN n"),
+            lambda: E.ensure_indexes(motif),
+        ):
+            with self.assertRaisesRegex(NotImplementedError, "neuPrint"):
+                call()
+
+
+class TestNeuPrintCypher(unittest.TestCase):
+    def test_roi_constraints_use_neuron_roi_properties(self):
+        motif = Motif('A -> B [weight > 10, "CA(R).post" > 5, "PB.pre" < 5]')
+        cypher = NeuPrintExecutor.motif_to_cypher(
+            motif, json_attributes=["CA(R)", "PB"], roi_properties=["CA(R)", "PB"]
+        )
+        self.assertIn("B.`CA(R)` = true", cypher)
+        self.assertIn('apoc.convert.fromJsonMap(A_B.roiInfo)["CA(R)"].post > 5', cypher)
+        # "PB.pre < 5" also holds for connections with no synapses in PB:
+        self.assertNotIn("A.`PB`", cypher)
+        self.assertIn('apoc.convert.fromJsonMap(A_B.roiInfo)["PB"].pre < 5', cypher)
+        self.assertNotIn('A_B["CA(R).post"]', cypher)
+
+    def test_roi_constraints_without_indexed_properties(self):
+        motif = Motif('A -> B ["CA(R).pre" > 5]')
+        cypher = NeuPrintExecutor.motif_to_cypher(motif, json_attributes=["CA(R)"])
+        self.assertNotIn("`CA(R)`", cypher)
+        self.assertIn('fromJsonMap(A_B.roiInfo)["CA(R)"].pre > 5', cypher)
+
+
+class _ShardedClient(_FakeClient):
+    """
+    A fake client that times out on any shard coarser than `% 8`.
+    """
+
+    def fetch_custom(self, cypher):
+        self.queries.append(cypher)
+        if "min(n.bodyId)" in cypher:
+            return pd.DataFrame({"min": [0], "max": [99]})
+        if "% 2 " in cypher or "% 4 " in cypher:
+            raise RuntimeError("Query timed out")
+        if "COUNT(" in cypher.upper():
+            return pd.DataFrame({"count": [1]})
+        return pd.DataFrame({"A": [len(self.queries)], "B": [0]})
+
+
+class TestNeuPrintSharding(unittest.TestCase):
+    def test_timed_out_shards_are_split(self):
+        E = NeuPrintExecutor(client=_ShardedClient())
+        self.assertEqual(E.count_sharded(Motif("A -> B"), shards=2, workers=2), 8)
+        self.assertTrue(any("A.bodyId % 8 = 7" in q for q in E.client.queries))
+
+    def test_find_sharded_merges_results(self):
+        E = NeuPrintExecutor(client=_ShardedClient())
+        results = E.find_sharded(Motif("A -> B"), shards=8, anchor="B", limit=5)
+        self.assertEqual(list(results.columns), ["A", "B"])
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all("B.bodyId % 8" in q for q in E.client.queries))
+
+    def test_motif_limit_applies_across_shards(self):
+        motif = Motif("A -> B", limit=5)
+        E = NeuPrintExecutor(client=_ShardedClient())
+        self.assertEqual(E.count_sharded(motif, shards=8), 5)
+        self.assertEqual(len(E.find_sharded(motif, shards=8)), 5)
+        self.assertEqual(len(E.find_sharded(motif, shards=8, limit=3)), 3)
+        self.assertFalse(any(q.count("LIMIT") > 1 for q in E.client.queries))
+
+    def test_range_partition(self):
+        E = NeuPrintExecutor(client=_ShardedClient())
+        self.assertEqual(
+            E.count_sharded(Motif("A -> B"), shards=4, partition="range"), 4
+        )
+        self.assertIn("A.bodyId >= 0 AND A.bodyId < 25", E.client.queries[1])
+
+    def test_gives_up_after_max_splits(self):
+        E = NeuPrintExecutor(client=_ShardedClient())
+        with self.assertRaises(RuntimeError):
+            E.count_sharded(Motif("A -> B"), shards=2, max_splits=1)
+
+
+class _NeuronClient(_FakeClient):
+    neurons = {
+        1: {"bodyId": 1, "type": "KCab", "instance": "KCab_R", "size": 10},
+        2: {"bodyId": 2, "type": "MBON01", "instance": "MBON01_R", "size": 20},
+        3: {"bodyId": 3, "size": 30},
+    }
+
+    def fetch_custom(self, cypher):
+        self.queries.append(cypher)
+        if "bodyId IN" in cypher:
+            ids = [int(i) for i in cypher.split("[")[1].split("]")[0].split(",")]
+            return pd.DataFrame(
+                [
+                    [i, self.neurons[i].get("type"), self.neurons[i].get("size")]
+                    for i in ids
+                ],
+                columns=["bodyId", "type", "size"],
+            )
+        n = self.neurons
+        return pd.DataFrame({"A": [n[1], n[1], n[3]], "B": [n[2], n[3], n[2]]})
+
+
+class TestNeuPrintEnrichment(unittest.TestCase):
+    def test_find_enriches_in_one_batch(self):
+        E = NeuPrintExecutor(client=_NeuronClient())
+        results = E.find(Motif("A -> B"), enrich=["type", "size"])
+        self.assertEqual(list(results["A.type"][:2]), ["KCab", "KCab"])
+        self.assertTrue(pd.isna(results["A.type"][2]))
+        self.assertEqual(list(results["B.size"]), [20, 30, 20])
+        self.assertEqual(len(E.client.queries), 2)
+        self.assertIn("WHERE n.bodyId IN [1, 3, 2]", E.client.queries[1])
+
+    def test_neuron_properties_are_remembered(self):
+        E = NeuPrintExecutor(client=_NeuronClient())
+        E.neuron_properties([1, 2], ["type"], batch_size=1)
+        self.assertEqual(len(E.client.queries), 2)
+        table = E.neuron_properties([2, 3, 2], ["type"])
+        self.assertEqual(len(E.client.queries), 3)
+        self.assertIn("IN [3]", E.client.queries[-1])
+        self.assertEqual(list(table.index), [2, 3])
+        self.assertEqual(table["type"][2], "MBON01")
+        self.assertTrue(pd.isna(table["type"][3]))
+
+
+if TOKEN:
 
     class TestNeuPrintConnection(unittest.TestCase):
         def test_can_get_version(self):
@@ -72,4 +288,4 @@ if TOKEN:
             )
             E = NeuPrintExecutor(HOST, DATASET, TOKEN)
             print(E.motif_to_cypher(motif))
-            self.assertTrue(len(E.find(motif=motif, limit=5)) == 5)
\ No newline at end of file
+            self.assertTrue(len(E.find(motif=motif, limit=5)) == 5)
@@ -0,0 +1,117 @@
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from .. import Motif
+from .Neo4jExecutor import Neo4jExecutor
+from .NeuPrintExecutor import NeuPrintExecutor
+from .replay import (
+    QueryArchive,
+    RecordingClient,
+    RecordingGraph,
+    ReplayClient,
+    ReplayGraph,
+)
+
+
+class _SlowClient:
+    server = "https://neuprint.example.org"
+    dataset = "hemibrain:v1.2.1"
+
+    def __init__(self):
+        self.queries = []
+
+    def fetch_custom(self, cypher):
+        self.queries.append(cypher)
+        time.sleep(0.01)
+        return pd.DataFrame({"count": [42]})
+
+
+class _Cursor:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def keys(self):
+        return ["count"]
+
+    def plan(self):
+        return None
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class _Graph:
+    def __init__(self):
+        self.queries = []
+
+    def run(self, cypher, parameters=None):
+        self.queries.append(cypher)
+        return _Cursor([(7,)])
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        archive = tempfile.TemporaryDirectory()
+        self.addCleanup(archive.cleanup)
+        self.archive = archive.name
+
+    def test_neuprint_record_and_replay(self):
+        motif = Motif("A -> B")
+        client = RecordingClient(_SlowClient(), self.archive)
+        self.assertEqual(NeuPrintExecutor(client=client).count(motif), 42)
+        self.assertEqual(len(QueryArchive(self.archive)), 1)
+        (entry,) = QueryArchive(self.archive).entries()
+        self.assertEqual(entry["cypher"], client._client.queries[0])
+        self.assertGreaterEqual(entry["elapsed"], 0.01)
+
+        E = NeuPrintExecutor(client=ReplayClient(self.archive, latency=0))
+        self.assertEqual(E.count(motif), 42)
+        with self.assertRaises(KeyError):
+            E.count(Motif("A -> B\nB -> A"))
+
+    def test_archive_contains_queries_with_parameters(self):
+        archive = QueryArchive(self.archive)
+        graph = RecordingGraph(_Graph(), archive)
+        graph.run("MATCH (n) WHERE n.type = $type RETURN n", {"type": "x"})
+        RecordingClient(_SlowClient(), archive).fetch_custom("RETURN 1")
+        self.assertIn(
+            ("MATCH (n) WHERE n.type = $type RETURN n", {"type": "x"}), archive
+        )
+        self.assertNotIn(
+            ("MATCH (n) WHERE n.type = $type RETURN n", {"type": "y"}), archive
+        )
+        self.assertNotIn("MATCH (n) WHERE n.type = $type RETURN n", archive)
+        self.assertIn("RETURN 1", archive)
+
+    def test_replay_latency(self):
+        client = RecordingClient(_SlowClient(), self.archive)
+        client.fetch_custom("MATCH (n) RETURN count(n)")
+        with mock.patch("dotmotif.executors.replay.time.sleep") as sleep:
+            ReplayClient(self.archive).fetch_custom("MATCH (n) RETURN count(n)")
+            self.assertGreaterEqual(sleep.call_args[0][0], 0.01)
+            sleep.reset_mock()
+            ReplayClient(self.archive, latency=0).fetch_custom(
+                "MATCH (n) RETURN count(n)"
+            )
+            sleep.assert_not_called()
+
+    def test_neo4j_record_and_replay(self):
+        motif = Motif("A -> B")
+        graph = _Graph()
+        E = Neo4jExecutor(graph=RecordingGraph(graph, self.archive))
+        self.assertEqual(E.count(motif), 7)
+        # Queries run under a timeout are tagged, but replay all the same:
+        self.assertEqual(E.count(motif, timeout=5), 7)
+        table = E.run("MATCH (n) RETURN count(n)", cursor=False)
+
+        E = Neo4jExecutor(graph=ReplayGraph(self.archive, latency=0))
+        self.assertEqual(E.count(motif), 7)
+        self.assertEqual(E.count(motif, timeout=5), 7)
+        replayed = E.run("MATCH (n) RETURN count(n)", cursor=False)
+        self.assertEqual(list(replayed), list(table))
+        self.assertEqual(replayed.keys(), ["count"])
+        self.assertEqual(len(graph.queries), 3)
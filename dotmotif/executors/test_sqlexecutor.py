@@ -0,0 +1,55 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from dotmotif import Motif
+from dotmotif.executors import NetworkXExecutor, SQLExecutor
+from dotmotif.executors._testing import ExecutorTestCase, host, matches
+
+
+class TestSQLExecutor(ExecutorTestCase, unittest.TestCase):
+    def setUp(self):
+        self.graph = host()
+        self.executor = SQLExecutor(graph=self.graph)
+
+    def test_undirected_host(self):
+        undirected = self.graph.to_undirected()
+        expected = NetworkXExecutor(graph=undirected).find(
+            Motif("A -> B\nB -> C\nA !> C", ignore_direction=True)
+        )
+        E = SQLExecutor(graph=undirected)
+        self.assertEqual(
+            matches(E.find(Motif("A -> B\nB -> C\nA !> C"))), matches(expected)
+        )
+
+    def test_limit(self):
+        self.assertEqual(len(self.executor.find(Motif("A -> B"), limit=5)), 5)
+        self.assertEqual(self.executor.count(Motif("A -> B"), limit=5), 5)
+
+    def test_existing_database_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "connectome.db")
+            connection = sqlite3.connect(path)
+            connection.execute("CREATE TABLE synapses (src, dst, weight)")
+            connection.executemany(
+                "INSERT INTO synapses VALUES (?, ?, ?)",
+                [(1, 2, 5), (2, 3, 1), (3, 1, 8)],
+            )
+            connection.commit()
+            connection.close()
+
+            E = SQLExecutor(
+                path=path,
+                edge_table="synapses",
+                source_column="src",
+                target_column="dst",
+            )
+            self.assertEqual(E.count(Motif("A -> B [weight > 2]")), 2)
+            indexes = E.connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            ).fetchall()
+            self.assertEqual(len(indexes), 2)
+            with self.assertRaises(ValueError):
+                E.find(Motif("A -> B\nA.size > 2"))
+            E.connection.close()
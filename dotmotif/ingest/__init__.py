@@ -1,15 +1,21 @@
 # Standard installs:
 import abc
+import csv
+import itertools
 import os
+import warnings
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 import numpy as np
 
 # Non-standard installs:
 import pandas as pd
 
 # Types only:
-from typing import Iterable, List, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 import networkx as nx
 
+from ..utils import _referenced_attributes
+
 
 class NetworkXConverter(abc.ABC):
     """
@@ -70,6 +76,383 @@ class EdgelistConverter(NetworkXConverter):
 CSVEdgelistConverter = EdgelistConverter
 
 
+_STREAMING_AGGREGATIONS = ("sum", "mean", "max", "min")
+# The number of chunk aggregates to collect before merging them:
+_STREAMING_REDUCE_BATCH = 16
+
+
+class StreamingEdgelistConverter(NetworkXConverter):
+    """
+    Convert a large one-row-per-synapse edgelist to a graph in chunks.
+
+    Unlike the EdgelistConverter, the file is never held in memory all at
+    once: rows are read `chunksize` at a time, and rows that share a (u, v)
+    pair are reduced into a single edge with a count of rows and, for each
+    of the chosen `columns`, the sum/mean/max/min of that column. Memory use
+    is bounded by the number of distinct neuron pairs rather than by the
+    number of synapses.
+
+    If `multigraph=True`, no aggregation is performed, and each row becomes
+    its own edge in a nx.MultiDiGraph (or nx.MultiGraph if undirected).
+
+    """
+
+    def __init__(
+        self,
+        filepath_or_chunks: Union[str, Iterable[pd.DataFrame]],
+        u_id_column: str,
+        v_id_column: str,
+        directed: bool = True,
+        columns: Optional[Iterable[str]] = None,
+        aggregations: Iterable[str] = ("sum", "mean", "max"),
+        count_attribute: str = "count",
+        multigraph: bool = False,
+        chunksize: int = 100_000,
+        file_reader_kwargs: dict = None,
+    ):
+        """
+        Create a new streaming converter.
+
+        Arguments:
+            filepath_or_chunks (str | Iterable[pd.DataFrame]): A path or
+                file-like to a delimited file, or an iterable of dataframes
+                that have already been chunked (e.g. from a database cursor).
+            u_id_column (str): The column holding the source neuron ID
+            v_id_column (str): The column holding the target neuron ID
+            directed (bool: True): Whether to produce a directed graph
+            columns (Iterable[str]: None): The columns to carry onto edges.
+                When aggregating, each is reduced with every aggregation in
+                `aggregations` to an attribute named `{column}_{aggregation}`.
+                In multigraph mode, these are copied verbatim onto each edge
+                (and all columns are kept if this is None).
+            aggregations (Iterable[str]): Any of "sum", "mean", "max", "min"
+            count_attribute (str: "count"): The edge attribute that holds the
+                number of rows aggregated into each edge
+            multigraph (bool: False): Keep one edge per row instead of
+                aggregating rows into one edge per pair
+            chunksize (int: 100000): The number of rows to read at a time
+            file_reader_kwargs (dict: None): Extra arguments to pd.read_table
+
+        """
+        self._u = u_id_column
+        self._v = v_id_column
+        self._directed = directed
+        self._columns = list(columns) if columns is not None else None
+        self._aggregations = list(aggregations)
+        self._count_attribute = count_attribute
+        for aggregation in self._aggregations:
+            if aggregation not in _STREAMING_AGGREGATIONS:
+                raise ValueError(
+                    f"Unknown aggregation {aggregation}. "
+                    f"Must be one of {_STREAMING_AGGREGATIONS}."
+                )
+
+        if multigraph:
+            self._graph = nx.MultiDiGraph() if directed else nx.MultiGraph()
+        else:
+            self._graph = nx.DiGraph() if directed else nx.Graph()
+
+        chunks = self._read_chunks(filepath_or_chunks, chunksize, file_reader_kwargs)
+        if multigraph:
+            for chunk in chunks:
+                self._add_rows(chunk)
+        else:
+            # Partials are merged in batches, so that the running table is
+            # regrouped once per batch rather than once per chunk:
+            partials: List[pd.DataFrame] = []
+            for chunk in chunks:
+                partials.append(self._partial_aggregate(chunk))
+                if len(partials) >= _STREAMING_REDUCE_BATCH:
+                    partials = [self._reduce(partials)]
+            if partials:
+                self._add_aggregated(self._reduce(partials))
+
+    def _read_chunks(
+        self,
+        filepath_or_chunks: Union[str, Iterable[pd.DataFrame]],
+        chunksize: int,
+        file_reader_kwargs: Optional[dict],
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yield validated chunks with string IDs (and undirected pairs sorted).
+        """
+        if isinstance(filepath_or_chunks, pd.DataFrame):
+            chunks: Iterable[pd.DataFrame] = [filepath_or_chunks]
+        elif isinstance(filepath_or_chunks, (str, os.PathLike)) or hasattr(
+            filepath_or_chunks, "read"
+        ):
+            wanted = (
+                None if self._columns is None else {self._u, self._v, *self._columns}
+            )
+            reader_kwargs = dict(file_reader_kwargs or {"sep": ","})
+            dtype = reader_kwargs.pop("dtype", None)
+            if dtype is None or isinstance(dtype, dict):
+                dtype = {**(dtype or {}), self._u: str, self._v: str}
+            chunks = pd.read_table(
+                filepath_or_chunks,
+                dtype=dtype,
+                chunksize=chunksize,
+                usecols=(lambda c: c in wanted) if wanted is not None else None,
+                **reader_kwargs,
+            )
+        else:
+            chunks = filepath_or_chunks
+
+        for chunk in chunks:
+            for column in [self._u, self._v, *(self._columns or [])]:
+                if column not in chunk.columns:
+                    raise KeyError(f"Dataframe does not contain column {column}.")
+            u = chunk[self._u].astype(str)
+            v = chunk[self._v].astype(str)
+            if not self._directed:
+                # Undirected pairs are keyed by their sorted endpoints so
+                # that (a, b) and (b, a) rows land in the same edge:
+                u, v = u.where(u <= v, v), v.where(u <= v, u)
+            yield chunk.assign(**{self._u: u, self._v: v})
+
+    def _partial_aggregate(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reduce one chunk to one row per pair, holding mergeable partials.
+
+        Means are not mergeable across chunks, so they are carried as a sum
+        and a count of non-missing values, and finalized once all chunks have
+        been seen.
+        """
+        grouped = chunk.groupby([self._u, self._v], sort=False)
+        partial = grouped.size().to_frame(self._count_attribute)
+        for column in self._columns or []:
+            if {"sum", "mean"} & set(self._aggregations):
+                partial[f"{column}_sum"] = grouped[column].sum()
+            if "mean" in self._aggregations:
+                partial[f"{column}_nonnull"] = grouped[column].count()
+            if "max" in self._aggregations:
+                partial[f"{column}_max"] = grouped[column].max()
+            if "min" in self._aggregations:
+                partial[f"{column}_min"] = grouped[column].min()
+        return partial
+
+    def _reduce(self, partials: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Merge partial aggregates into one row per pair.
+        """
+        if len(partials) == 1:
+            return partials[0]
+        # Maxima and minima merge by max and min; counts and sums add up:
+        how = {
+            column: (
+                column.rsplit("_", 1)[-1]
+                if column.rsplit("_", 1)[-1] in ("max", "min")
+                else "sum"
+            )
+            for column in partials[0].columns
+        }
+        how[self._count_attribute] = "sum"
+        return pd.concat(partials).groupby(level=[0, 1], sort=False).agg(how)
+
+    def _add_aggregated(self, aggregated: pd.DataFrame):
+        for column in self._columns or []:
+            if "mean" in self._aggregations:
+                # Missing values are skipped by the sum, so they must not be
+                # counted either:
+                nonnull = aggregated.pop(f"{column}_nonnull")
+                aggregated[f"{column}_mean"] = aggregated[f"{column}_sum"] / nonnull
+            if "sum" not in self._aggregations and f"{column}_sum" in aggregated:
+                del aggregated[f"{column}_sum"]
+        self._graph.add_edges_from(
+            (u, v, attrs)
+            for (u, v), attrs in zip(
+                aggregated.index, aggregated.to_dict(orient="records")
+            )
+        )
+
+    def _add_rows(self, chunk: pd.DataFrame):
+        attributes = (
+            chunk.drop(columns=[self._u, self._v])
+            if self._columns is None
+            else chunk[self._columns]
+        )
+        self._graph.add_edges_from(
+            zip(chunk[self._u], chunk[self._v], attributes.to_dict(orient="records"))
+        )
+
+    def to_graph(self):
+        return self._graph
+
+
+_ARROW_FORMATS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "ipc",
+    ".feather": "ipc",
+    ".ipc": "ipc",
+}
+
+
+def _read_arrow_table(
+    path: str, columns: Optional[List[str]], format: str, memory_map: bool
+):
+    """
+    Read a Parquet or Arrow IPC file, projecting down to `columns`.
+
+    Arrow IPC files are memory-mapped and read without copying, so selecting
+    a few columns from a large table only touches those columns' pages.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "Reading Parquet or Arrow files requires the `pyarrow` package. "
+            "You can use `dotmotif[arrow]` or install it with `pip install pyarrow`."
+        )
+
+    if format == "parquet":
+        return pq.read_table(path, columns=columns, memory_map=memory_map)
+    if format == "ipc":
+        # Closing a memory map leaves the mapped buffers of the table valid:
+        with pa.memory_map(path, "r") if memory_map else pa.OSFile(path, "rb") as f:
+            table = pa.ipc.open_file(f).read_all()
+        return table.select(columns) if columns is not None else table
+    raise ValueError(f"Unknown format {format}; must be 'parquet' or 'ipc'.")
+
+
+def _arrow_schema_names(path: str, format: str) -> List[str]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if format == "parquet":
+        return pq.read_schema(path).names
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).schema.names
+
+
+class ArrowEdgelistConverter(NetworkXConverter):
+    """
+    Convert a Parquet or Arrow IPC (Feather) edge table to a graph.
+
+    Only the ID columns and the attribute columns that will actually be used
+    are read from disk. Pass the motifs you plan to run as `motifs` and the
+    columns they constrain are selected automatically; pass `columns` to add
+    others. Arrow IPC files are memory-mapped, so very large tables load
+    without a full copy into memory.
+
+    Node attributes can be read from a second table with `nodes_path`.
+
+    """
+
+    def __init__(
+        self,
+        path: str,
+        u_id_column: str,
+        v_id_column: str,
+        directed: bool = True,
+        columns: Optional[Iterable[str]] = None,
+        motifs: Optional[Iterable] = None,
+        nodes_path: Optional[str] = None,
+        node_id_column: Optional[str] = None,
+        node_columns: Optional[Iterable[str]] = None,
+        format: Optional[str] = None,
+        memory_map: bool = True,
+        batch_size: int = 100_000,
+    ):
+        """
+        Create a new Arrow/Parquet converter.
+
+        Arguments:
+            path (str): The path to the edge table
+            u_id_column (str): The column holding the source node ID
+            v_id_column (str): The column holding the target node ID
+            directed (bool: True): Whether to produce a directed graph
+            columns (Iterable[str]: None): Edge attribute columns to read. If
+                neither this nor `motifs` is set, all columns are read.
+            motifs (Iterable[dotmotif.Motif]: None): Motifs whose constrained
+                attributes should be read from the edge and node tables
+            nodes_path (str: None): An optional path to a node table
+            node_id_column (str: None): The ID column of the node table
+            node_columns (Iterable[str]: None): Node attribute columns to read
+            format (str: None): "parquet" or "ipc". Inferred from the file
+                extension if not provided.
+            memory_map (bool: True): Whether to memory-map the files
+            batch_size (int: 100000): Rows converted to Python at a time
+
+        """
+        node_attributes, edge_attributes = _referenced_attributes(motifs or [])
+        project = columns is not None or motifs is not None
+        self._graph = nx.DiGraph() if directed else nx.Graph()
+
+        edge_format = format or self._infer_format(path)
+        edge_names = _arrow_schema_names(path, edge_format)
+        for column in (u_id_column, v_id_column):
+            if column not in edge_names:
+                raise KeyError(f"Table does not contain column {column}.")
+        if project:
+            wanted = edge_attributes | set(columns or [])
+            attribute_columns = [
+                c
+                for c in edge_names
+                if c in wanted and c not in (u_id_column, v_id_column)
+            ]
+            read_columns = [u_id_column, v_id_column, *attribute_columns]
+        else:
+            attribute_columns = [
+                c for c in edge_names if c not in (u_id_column, v_id_column)
+            ]
+            read_columns = None
+        edges = _read_arrow_table(path, read_columns, edge_format, memory_map)
+        for batch in edges.to_batches(max_chunksize=batch_size):
+            self._graph.add_edges_from(
+                zip(
+                    self._stringified_ids(batch.column(u_id_column)),
+                    self._stringified_ids(batch.column(v_id_column)),
+                    batch.select(attribute_columns).to_pylist(),
+                )
+            )
+
+        if nodes_path is not None:
+            if node_id_column is None:
+                raise ValueError("A node_id_column is required with nodes_path.")
+            node_format = format or self._infer_format(nodes_path)
+            node_names = _arrow_schema_names(nodes_path, node_format)
+            if node_id_column not in node_names:
+                raise KeyError(f"Table does not contain column {node_id_column}.")
+            if node_columns is not None or motifs is not None:
+                wanted = node_attributes | set(node_columns or [])
+                node_attribute_columns = [
+                    c for c in node_names if c in wanted and c != node_id_column
+                ]
+                read_columns = [node_id_column, *node_attribute_columns]
+            else:
+                node_attribute_columns = [c for c in node_names if c != node_id_column]
+                read_columns = None
+            nodes = _read_arrow_table(nodes_path, read_columns, node_format, memory_map)
+            for batch in nodes.to_batches(max_chunksize=batch_size):
+                self._graph.add_nodes_from(
+                    zip(
+                        self._stringified_ids(batch.column(node_id_column)),
+                        batch.select(node_attribute_columns).to_pylist(),
+                    )
+                )
+
+    @staticmethod
+    def _infer_format(path: str) -> str:
+        extension = os.path.splitext(str(path))[1].lower()
+        if extension not in _ARROW_FORMATS:
+            raise ValueError(
+                f"Cannot infer the format of {path}; pass format='parquet' or 'ipc'."
+            )
+        return _ARROW_FORMATS[extension]
+
+    @staticmethod
+    def _stringified_ids(column) -> List[str]:
+        # Match the other converters, which always produce string node IDs:
+        import pyarrow as pa
+
+        return column.cast(pa.string()).to_pylist()
+
+    def to_graph(self):
+        return self._graph
+
+
 class Ingester:
     """
     Base ingester class
@@ -103,6 +486,84 @@ class FileIngester(Ingester):
             os.makedirs(self.export_dir)
 
 
+def _pd_cypher_dtype_map(dtype):
+    _valid_cypher_dtypes = [
+        # https://neo4j.com/docs/operations-manual/current/tools/import/file-header-format/
+        "int",
+        "long",
+        "float",
+        "double",
+        "boolean",
+        "byte",
+        "short",
+        # "char", "string",
+        # "point", "date", "localtime", "time", "localdatetime", "datetime", "duration"
+    ]
+    # https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.api.types.infer_dtype.html
+    return {
+        "object": "string",
+        "string": "string",
+        "bytes": "string",
+        "mixed-integer-float": "float",
+        "floating": "float",
+        "integer": "int",
+        "mixed-integer": "int",
+    }.get(pd.api.types.infer_dtype(dtype, skipna=True), "string")
+
+
+# The default array delimiter of neo4j-admin import:
+_NEO4J_ARRAY_DELIMITER = ";"
+
+
+def _neo4j_csv_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and np.isnan(value):
+        return ""
+    if isinstance(value, (list, tuple)):
+        items = []
+        for item in value:
+            if isinstance(item, (list, tuple, dict)):
+                raise ValueError(f"Neo4j arrays cannot contain nested values: {value}")
+            item = _neo4j_csv_value(item)
+            if _NEO4J_ARRAY_DELIMITER in item:
+                raise ValueError(
+                    f"Array values cannot contain '{_NEO4J_ARRAY_DELIMITER}': {value}"
+                )
+            items.append(item)
+        return _NEO4J_ARRAY_DELIMITER.join(items)
+    return str(value)
+
+
+def _sharded_column_type(column: pd.Series) -> str:
+    """
+    Infer the neo4j-admin header type of a column, such as "int" or "int[]".
+    """
+    values = column.dropna()
+    if not len(values):
+        return "string"
+    arrays = values.map(lambda value: isinstance(value, (list, tuple)))
+    if arrays.all():
+        items = pd.Series([item for value in values for item in value], dtype=object)
+        return (_pd_cypher_dtype_map(items) if len(items) else "string") + "[]"
+    return _pd_cypher_dtype_map(values)
+
+
+def _write_neo4j_csv_chunk(path: str, rows: List[list]) -> str:
+    """
+    Write one headerless chunk of a neo4j-admin import file.
+
+    This runs in a worker process, so it must be a module-level function.
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        for row in rows:
+            writer.writerow([_neo4j_csv_value(value) for value in row])
+    return path
+
+
 class NetworkXIngester:
     """
     An ingester that converts an in-memory networkx graph into two files:
@@ -110,6 +571,9 @@ class NetworkXIngester:
     One file contains the node IDs and their attrs, and the other contains
     the edges and the edge attrs. Each column must contain a type annotation
     in order for Neo4j to be able to interpret the attributes as variables.
+
+    For large graphs, `ingest_sharded` writes the same data as a header file
+    plus many fixed-size headerless CSV shards, in parallel.
     """
 
     def __init__(self, graph: nx.Graph, export_dir: str) -> None:
@@ -124,31 +588,7 @@ class NetworkXIngester:
         self.export_dir = export_dir.rstrip("/") + "/"
         self.graph = graph
 
-    def ingest(self) -> List[str]:
-        def _pd_cypher_dtype_map(dtype):
-            _valid_cypher_dtypes = [
-                # https://neo4j.com/docs/operations-manual/current/tools/import/file-header-format/
-                "int",
-                "long",
-                "float",
-                "double",
-                "boolean",
-                "byte",
-                "short",
-                # "char", "string",
-                # "point", "date", "localtime", "time", "localdatetime", "datetime", "duration"
-            ]
-            # https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.api.types.infer_dtype.html
-            return {
-                "object": "string",
-                "string": "string",
-                "bytes": "string",
-                "mixed-integer-float": "float",
-                "floating": "float",
-                "integer": "int",
-                "mixed-integer": "int",
-            }.get(pd.api.types.infer_dtype(dtype, skipna=True), "string")
-
+    def _check_ids_are_not_numeric(self):
         # First make sure that none of the IDs are numbers:
         for n in self.graph.nodes():
             if isinstance(n, (int, float)):
@@ -159,6 +599,9 @@ class NetworkXIngester:
                     + "Learn more at https://github.com/aplbrain/dotmotif/issues/26"
                 )
 
+    def ingest(self) -> List[str]:
+        self._check_ids_are_not_numeric()
+
         # Now create a node-attribute dataframe:
         nodes_df = pd.DataFrame(
             {"neuronId:ID(Neuron)": u, **attrs}
@@ -193,3 +636,150 @@ class NetworkXIngester:
             f"{self.export_dir}/export-neurons-0.csv",
             f"{self.export_dir}/export-synapses-zdata.csv",
         ]
+
+    def ingest_sharded(
+        self,
+        chunk_size: int = 100_000,
+        workers: Optional[int] = None,
+        node_schema: Optional[Dict[str, str]] = None,
+        edge_schema: Optional[Dict[str, str]] = None,
+        sample_size: int = 10_000,
+    ) -> List[str]:
+        """
+        Export the graph as sharded CSVs in `neo4j-admin import` format.
+
+        Unlike `ingest`, the graph is never copied into a dataframe. Rows are
+        cut into shards of `chunk_size` and written by a pool of worker
+        processes, with only a few shards in flight at a time. Each entity
+        type gets one header file and many headerless data files, which can
+        be passed to neo4j-admin together, for example:
+
+            --nodes=Neuron=export-neurons-header.csv,export-neurons-part-.*
+
+        Column types are taken from `node_schema`/`edge_schema` if provided
+        (a mapping of attribute name to Neo4j type, e.g. {"weight": "int"}),
+        and otherwise inferred from the first `sample_size` rows. Attributes
+        that do not appear in the sample are exported as strings.
+
+        Arguments:
+            chunk_size (int: 100000): The number of rows per CSV shard
+            workers (int: None): The number of writer processes. Defaults to
+                the number of CPUs; use 1 to write in this process.
+            node_schema (dict: None): Declared node attribute types
+            edge_schema (dict: None): Declared edge attribute types
+            sample_size (int: 10000): Rows used to infer undeclared types
+
+        Returns:
+            List[str]: The node header and shards, then the edge header and
+                shards
+
+        """
+        self._check_ids_are_not_numeric()
+        os.makedirs(f"{self.export_dir}", exist_ok=True)
+
+        node_columns = self._sharded_schema(
+            (attrs for _, attrs in self.graph.nodes(data=True)),
+            node_schema,
+            sample_size,
+        )
+        edge_columns = self._sharded_schema(
+            (attrs for _, _, attrs in self.graph.edges(data=True)),
+            edge_schema,
+            sample_size,
+        )
+
+        node_rows = (
+            [u, *[attrs.get(c) for c in node_columns]]
+            for u, attrs in self.graph.nodes(data=True)
+        )
+        edge_rows = (
+            [u, v, *[attrs.get(c) for c in edge_columns]]
+            for u, v, attrs in self.graph.edges(data=True)
+        )
+
+        workers = workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            node_files = self._write_sharded(
+                "export-neurons",
+                ["neuronId:ID(Neuron)"] + [f"{c}:{t}" for c, t in node_columns.items()],
+                node_rows,
+                chunk_size,
+                pool,
+                workers,
+            )
+            edge_files = self._write_sharded(
+                "export-synapses",
+                [":START_ID(Neuron)", ":END_ID(Neuron)"]
+                + [f"{c}:{t}" for c, t in edge_columns.items()],
+                edge_rows,
+                chunk_size,
+                pool,
+                workers,
+            )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return node_files + edge_files
+
+    @staticmethod
+    def _sharded_schema(
+        attributes: Iterable[dict], schema: Optional[Dict[str, str]], sample_size: int
+    ) -> Dict[str, str]:
+        """
+        Get an ordered {attribute: neo4j type} mapping for a set of entities.
+        """
+        # Collecting the key set is a cheap streaming pass; only the sample
+        # is ever held in a dataframe for type inference.
+        keys: Dict[str, None] = {}
+        sample = []
+        for attrs in attributes:
+            keys.update(dict.fromkeys(attrs))
+            if schema is None and len(sample) < sample_size:
+                sample.append(attrs)
+        if schema is not None:
+            undeclared = [key for key in keys if key not in schema]
+            if undeclared:
+                warnings.warn(
+                    f"The attributes {undeclared} are not in the declared schema, "
+                    "and will not be exported."
+                )
+            return dict(schema)
+        sample_df = pd.DataFrame(sample, columns=list(keys))
+        return {key: _sharded_column_type(sample_df[key]) for key in keys}
+
+    def _write_sharded(
+        self,
+        prefix: str,
+        header: List[str],
+        rows: Iterable[list],
+        chunk_size: int,
+        pool: Optional[ProcessPoolExecutor],
+        workers: int,
+    ) -> List[str]:
+        header_path = f"{self.export_dir}{prefix}-header.csv"
+        with open(header_path, "w", newline="") as f:
+            csv.writer(f).writerow(header)
+
+        files = [header_path]
+        in_flight: List[Future] = []
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            path = f"{self.export_dir}{prefix}-part-{len(files) - 1:05d}.csv"
+            files.append(path)
+            if pool is None:
+                _write_neo4j_csv_chunk(path, chunk)
+                continue
+            in_flight.append(pool.submit(_write_neo4j_csv_chunk, path, chunk))
+            # Bound the number of shards held in memory at once:
+            if len(in_flight) >= 2 * workers:
+                wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in [f for f in in_flight if f.done()]:
+                    future.result()
+                    in_flight.remove(future)
+        for future in in_flight:
+            future.result()
+        return files
@@ -1,6 +1,17 @@
+import importlib.util
+import os
+import tempfile
 import unittest
+from unittest import mock
+import networkx as nx
 import pandas as pd
-from . import EdgelistConverter
+from .. import Motif
+from . import (
+    ArrowEdgelistConverter,
+    EdgelistConverter,
+    NetworkXIngester,
+    StreamingEdgelistConverter,
+)
 import io
 
 
@@ -59,3 +70,261 @@ class TestEdgelistIngest(unittest.TestCase):
         converter = EdgelistConverter(df, "source", "target")
         graph = converter.to_graph()
         self.assertEqual(graph.number_of_nodes(), 3)
+
+
+class TestStreamingEdgelistIngest(unittest.TestCase):
+    _SYNAPSES = "pre,post,size\nA,B,1\nA,B,3\nB,C,2\nA,B,8\nB,C,4\n"
+
+    def test_aggregates_rows_into_one_edge_per_pair(self):
+        converter = StreamingEdgelistConverter(
+            io.StringIO(self._SYNAPSES), "pre", "post", columns=["size"], chunksize=2
+        )
+        graph = converter.to_graph()
+        self.assertEqual(graph.number_of_edges(), 2)
+        self.assertEqual(graph.edges["A", "B"]["count"], 3)
+        self.assertEqual(graph.edges["A", "B"]["size_sum"], 12)
+        self.assertEqual(graph.edges["A", "B"]["size_mean"], 4)
+        self.assertEqual(graph.edges["A", "B"]["size_max"], 8)
+        self.assertEqual(graph.edges["B", "C"]["count"], 2)
+
+    def test_mean_skips_missing_values(self):
+        converter = StreamingEdgelistConverter(
+            io.StringIO("pre,post,size\nA,B,2\nA,B,\nA,B,4\nA,B,\n"),
+            "pre",
+            "post",
+            columns=["size"],
+            chunksize=2,
+        )
+        graph = converter.to_graph()
+        self.assertEqual(graph.edges["A", "B"]["count"], 4)
+        self.assertEqual(graph.edges["A", "B"]["size_sum"], 6)
+        self.assertEqual(graph.edges["A", "B"]["size_mean"], 3)
+        self.assertNotIn("size_nonnull", graph.edges["A", "B"])
+
+    def test_merges_many_chunks(self):
+        rows = "".join(f"A,B,{i}\nB,C,1\n" for i in range(100))
+        converter = StreamingEdgelistConverter(
+            io.StringIO("pre,post,size\n" + rows),
+            "pre",
+            "post",
+            columns=["size"],
+            chunksize=3,
+        )
+        graph = converter.to_graph()
+        self.assertEqual(graph.edges["A", "B"]["count"], 100)
+        self.assertEqual(graph.edges["A", "B"]["size_sum"], sum(range(100)))
+        self.assertEqual(graph.edges["A", "B"]["size_max"], 99)
+        self.assertEqual(graph.edges["B", "C"]["count"], 100)
+
+    def test_user_dtypes_are_merged(self):
+        converter = StreamingEdgelistConverter(
+            io.StringIO(self._SYNAPSES),
+            "pre",
+            "post",
+            columns=["size"],
+            file_reader_kwargs={"sep": ",", "dtype": {"size": float}},
+        )
+        graph = converter.to_graph()
+        self.assertEqual(graph.edges["A", "B"]["size_sum"], 12.0)
+        self.assertIsInstance(graph.edges["A", "B"]["size_max"], float)
+
+    def test_undirected_pairs_are_merged(self):
+        converter = StreamingEdgelistConverter(
+            [
+                pd.DataFrame([{"pre": "A", "post": "B"}]),
+                pd.DataFrame([{"pre": "B", "post": "A"}]),
+            ],
+            "pre",
+            "post",
+            directed=False,
+        )
+        graph = converter.to_graph()
+        self.assertEqual(graph.number_of_edges(), 1)
+        self.assertEqual(graph.edges["A", "B"]["count"], 2)
+
+    def test_multigraph_keeps_every_row(self):
+        converter = StreamingEdgelistConverter(
+            io.StringIO(self._SYNAPSES),
+            "pre",
+            "post",
+            columns=["size"],
+            multigraph=True,
+            chunksize=2,
+        )
+        graph = converter.to_graph()
+        self.assertTrue(graph.is_multigraph())
+        self.assertEqual(graph.number_of_edges("A", "B"), 3)
+        self.assertEqual(
+            sorted(e["size"] for e in graph.get_edge_data("A", "B").values()),
+            [1, 3, 8],
+        )
+
+    def test_multigraph_does_not_copy_ids_onto_edges(self):
+        converter = StreamingEdgelistConverter(
+            io.StringIO(self._SYNAPSES), "pre", "post", multigraph=True
+        )
+        for _, _, attrs in converter.to_graph().edges(data=True):
+            self.assertEqual(set(attrs), {"size"})
+
+    def test_fails_on_invalid_columns(self):
+        with self.assertRaises(KeyError):
+            StreamingEdgelistConverter(
+                io.StringIO(self._SYNAPSES), "pre", "post", columns=["weight"]
+            )
+        with self.assertRaises(ValueError):
+            StreamingEdgelistConverter(
+                io.StringIO(self._SYNAPSES), "pre", "post", aggregations=["median"]
+            )
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+class TestArrowEdgelistIngest(unittest.TestCase):
+    def setUp(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._dir = tempfile.TemporaryDirectory()
+        edges = pa.table(
+            {
+                "pre": [1, 1, 2],
+                "post": [2, 3, 3],
+                "weight": [4, 5, 6],
+                "unused": ["x", "y", "z"],
+            }
+        )
+        nodes = pa.table({"id": [1, 2, 3], "type": ["a", "b", "c"], "size": [1, 2, 3]})
+        self.parquet_path = os.path.join(self._dir.name, "edges.parquet")
+        self.arrow_path = os.path.join(self._dir.name, "edges.arrow")
+        self.nodes_path = os.path.join(self._dir.name, "nodes.parquet")
+        pq.write_table(edges, self.parquet_path)
+        pq.write_table(nodes, self.nodes_path)
+        with pa.OSFile(self.arrow_path, "wb") as sink:
+            with pa.ipc.new_file(sink, edges.schema) as writer:
+                writer.write_table(edges)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_reads_parquet(self):
+        graph = ArrowEdgelistConverter(self.parquet_path, "pre", "post").to_graph()
+        self.assertEqual(graph.number_of_edges(), 3)
+        self.assertEqual(graph.edges["1", "2"], {"weight": 4, "unused": "x"})
+
+    def test_reads_memory_mapped_ipc(self):
+        graph = ArrowEdgelistConverter(self.arrow_path, "pre", "post").to_graph()
+        self.assertEqual(graph.number_of_edges(), 3)
+        self.assertEqual(graph.edges["2", "3"]["weight"], 6)
+
+    def test_closes_memory_maps(self):
+        import pyarrow as pa
+
+        memory_map = pa.memory_map
+        opened = []
+
+        def _memory_map(*args, **kwargs):
+            opened.append(memory_map(*args, **kwargs))
+            return opened[-1]
+
+        with mock.patch("pyarrow.memory_map", _memory_map):
+            ArrowEdgelistConverter(
+                self.arrow_path, "pre", "post", columns=["weight"]
+            ).to_graph()
+        self.assertTrue(opened)
+        self.assertTrue(all(f.closed for f in opened))
+
+    def test_projects_to_motif_columns(self):
+        motif = Motif('A -> B [weight > 4]\nA.type = "a"')
+        graph = ArrowEdgelistConverter(
+            self.arrow_path,
+            "pre",
+            "post",
+            motifs=[motif],
+            nodes_path=self.nodes_path,
+            node_id_column="id",
+        ).to_graph()
+        self.assertEqual(graph.edges["1", "2"], {"weight": 4})
+        self.assertEqual(graph.nodes["1"], {"type": "a"})
+
+    def test_fails_on_invalid_columns(self):
+        with self.assertRaises(KeyError):
+            ArrowEdgelistConverter(self.parquet_path, "pre", "MISSING_COLUMN_NAME")
+
+
+class TestNetworkXIngesterSharded(unittest.TestCase):
+    def _graph(self):
+        G = nx.DiGraph()
+        for i in range(5):
+            G.add_node(f"n{i}", size=i, kind="x")
+        for i in range(4):
+            G.add_edge(f"n{i}", f"n{i + 1}", weight=i * 1.5)
+        return G
+
+    def _read(self, files):
+        with open(files[0]) as f:
+            header = f.read().strip().split(",")
+        rows = []
+        for path in files[1:]:
+            with open(path) as f:
+                rows.extend(f.read().splitlines())
+        return header, rows
+
+    def test_writes_headers_and_shards(self):
+        for workers in (1, 2):
+            with tempfile.TemporaryDirectory() as d:
+                files = NetworkXIngester(self._graph(), d).ingest_sharded(
+                    chunk_size=2, workers=workers
+                )
+                node_files = [f for f in files if "neurons" in f]
+                edge_files = [f for f in files if "synapses" in f]
+                self.assertEqual(len(node_files), 1 + 3)
+                self.assertEqual(len(edge_files), 1 + 2)
+
+                header, rows = self._read(node_files)
+                self.assertEqual(
+                    header, ["neuronId:ID(Neuron)", "size:int", "kind:string"]
+                )
+                self.assertEqual(rows[0], "n0,0,x")
+                self.assertEqual(len(rows), 5)
+
+                header, rows = self._read(edge_files)
+                self.assertEqual(
+                    header, [":START_ID(Neuron)", ":END_ID(Neuron)", "weight:float"]
+                )
+                self.assertEqual(len(rows), 4)
+
+    def test_declared_schema(self):
+        with tempfile.TemporaryDirectory() as d:
+            with self.assertWarnsRegex(UserWarning, "kind"):
+                files = NetworkXIngester(self._graph(), d).ingest_sharded(
+                    workers=1,
+                    node_schema={"size": "long"},
+                    edge_schema={"weight": "float"},
+                )
+            header, rows = self._read([f for f in files if "neurons" in f])
+            self.assertEqual(header, ["neuronId:ID(Neuron)", "size:long"])
+            self.assertEqual(rows[1], "n1,1")
+
+    def test_fails_on_numeric_ids(self):
+        with tempfile.TemporaryDirectory() as d:
+            with self.assertRaises(ValueError):
+                NetworkXIngester(nx.DiGraph([(1, 2)]), d).ingest_sharded(workers=1)
+
+    def test_writes_list_attributes_as_arrays(self):
+        G = nx.DiGraph()
+        G.add_node("a", sizes=[1, 2], tags=("x", "y"))
+        G.add_node("b", sizes=[3], tags=())
+        with tempfile.TemporaryDirectory() as d:
+            files = NetworkXIngester(G, d).ingest_sharded(workers=1)
+            header, rows = self._read([f for f in files if "neurons" in f])
+            self.assertEqual(
+                header, ["neuronId:ID(Neuron)", "sizes:int[]", "tags:string[]"]
+            )
+            self.assertEqual(rows, ["a,1;2,x;y", "b,3,"])
+
+    def test_fails_on_unrepresentable_arrays(self):
+        for value in ([[1, 2]], ["a;b"]):
+            with tempfile.TemporaryDirectory() as d:
+                with self.assertRaises(ValueError):
+                    NetworkXIngester(
+                        nx.DiGraph([("a", "b", {"value": value})]), d
+                    ).ingest_sharded(workers=1)
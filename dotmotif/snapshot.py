@@ -0,0 +1,355 @@
+"""
+A memory-mappable binary snapshot format for host graphs.
+
+A snapshot is a directory that holds the host graph's adjacency as CSR
+arrays in `.npy` files, and its node IDs and node/edge attribute columns in
+Arrow IPC files. Everything is opened with memory-mapping, so opening a
+snapshot is nearly free regardless of graph size, and many worker processes
+that open the same snapshot share the same pages in the OS page cache.
+
+    write_snapshot(graph, "connectome.dmsnap")
+    snapshot = GraphSnapshot("connectome.dmsnap")
+
+"""
+
+from typing import Any, Dict, Hashable, List, Optional
+import json
+import os
+
+import networkx as nx
+import numpy as np
+
+_SNAPSHOT_FORMAT = "dotmotif-snapshot"
+_SNAPSHOT_VERSION = 1
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError(
+            "Graph snapshots require the `pyarrow` package. "
+            "You can use `dotmotif[arrow]` or install it with `pip install pyarrow`."
+        )
+    return pa
+
+
+def _index_dtype(count: int):
+    return np.int32 if count < np.iinfo(np.int32).max else np.int64
+
+
+def _csr(sources: np.ndarray, targets: np.ndarray, edge_ids: np.ndarray, n: int):
+    """
+    Build CSR arrays (indptr, indices, edge ids) with sorted neighbor lists.
+    """
+    order = np.lexsort((targets, sources))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return indptr, targets[order], edge_ids[order]
+
+
+def _attribute_table(pa, records: List[dict], kind: str):
+    keys: Dict[Hashable, None] = {}
+    for record in records:
+        keys.update(dict.fromkeys(record))
+    columns = {}
+    for key in keys:
+        try:
+            columns[str(key)] = pa.array([record.get(key) for record in records])
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ValueError(
+                f"The {kind} attribute {key} has values of mixed types, "
+                "and cannot be stored in a snapshot."
+            ) from e
+    return pa.table(columns) if columns else pa.table({})
+
+
+def _write_table(pa, table, path: str):
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def write_snapshot(graph: nx.Graph, path: str) -> "GraphSnapshot":
+    """
+    Write a host graph to a snapshot directory.
+
+    Arguments:
+        graph (nx.Graph): The host graph. May be directed or undirected, and
+            may be a multigraph.
+        path (str): The directory to write the snapshot into
+
+    Returns:
+        GraphSnapshot: The freshly-written snapshot, opened for reading
+
+    """
+    pa = _require_pyarrow()
+    os.makedirs(path, exist_ok=True)
+
+    nodes = list(graph.nodes())
+    n = len(nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = list(graph.edges(data=True))
+    m = len(edges)
+
+    dtype = _index_dtype(max(n, m))
+    sources = np.fromiter((index[u] for u, _, _ in edges), dtype=dtype, count=m)
+    targets = np.fromiter((index[v] for _, v, _ in edges), dtype=dtype, count=m)
+    edge_ids = np.arange(m, dtype=dtype)
+
+    arrays = {"edge_sources": sources, "edge_targets": targets}
+    if graph.is_directed():
+        (
+            arrays["out_indptr"],
+            arrays["out_indices"],
+            arrays["out_edge_ids"],
+        ) = _csr(sources, targets, edge_ids, n)
+        (
+            arrays["in_indptr"],
+            arrays["in_indices"],
+            arrays["in_edge_ids"],
+        ) = _csr(targets, sources, edge_ids, n)
+    else:
+        # Undirected edges are stored in both directions (self-loops once):
+        mirrored = sources != targets
+        (
+            arrays["out_indptr"],
+            arrays["out_indices"],
+            arrays["out_edge_ids"],
+        ) = _csr(
+            np.concatenate([sources, targets[mirrored]]),
+            np.concatenate([targets, sources[mirrored]]),
+            np.concatenate([edge_ids, edge_ids[mirrored]]),
+            n,
+        )
+
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+
+    try:
+        ids = pa.table({"id": pa.array(nodes)})
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise ValueError(
+            "Snapshot node IDs must all be of the same type (e.g. all strings)."
+        ) from e
+    _write_table(pa, ids, os.path.join(path, "ids.arrow"))
+    _write_table(
+        pa,
+        _attribute_table(pa, [attrs for _, attrs in graph.nodes(data=True)], "node"),
+        os.path.join(path, "nodes.arrow"),
+    )
+    _write_table(
+        pa,
+        _attribute_table(pa, [attrs for _, _, attrs in edges], "edge"),
+        os.path.join(path, "edges.arrow"),
+    )
+
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(
+            {
+                "format": _SNAPSHOT_FORMAT,
+                "version": _SNAPSHOT_VERSION,
+                "directed": graph.is_directed(),
+                "multigraph": graph.is_multigraph(),
+                "number_of_nodes": n,
+                "number_of_edges": m,
+            },
+            f,
+        )
+
+    return GraphSnapshot(path)
+
+
+class GraphSnapshot:
+    """
+    A read-only, memory-mapped view of a host graph written by write_snapshot.
+
+    Nodes are addressed by their integer index (0..n-1); use `index_of` and
+    `ids` to translate to and from the original node IDs. Edges are
+    addressed by their integer edge ID, which indexes the edge attributes.
+
+    """
+
+    def __init__(self, path: str, mmap_mode: Optional[str] = "r") -> None:
+        """
+        Open an existing snapshot.
+
+        Arguments:
+            path (str): The snapshot directory
+            mmap_mode (str: "r"): The mode passed to np.load. Use None to read
+                the arrays fully into memory instead of memory-mapping them.
+
+        """
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), "r") as f:
+            self._manifest = json.load(f)
+        if self._manifest.get("format") != _SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is not a dotmotif snapshot.")
+        if self._manifest.get("version") != _SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Unsupported snapshot version {self._manifest.get('version')}."
+            )
+
+        def _load(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+        self.edge_sources = _load("edge_sources")
+        self.edge_targets = _load("edge_targets")
+        self.out_indptr = _load("out_indptr")
+        self.out_indices = _load("out_indices")
+        self.out_edge_ids = _load("out_edge_ids")
+        if self.directed:
+            self.in_indptr = _load("in_indptr")
+            self.in_indices = _load("in_indices")
+            self.in_edge_ids = _load("in_edge_ids")
+        else:
+            self.in_indptr = self.out_indptr
+            self.in_indices = self.out_indices
+            self.in_edge_ids = self.out_edge_ids
+
+        self._tables: Dict[str, Any] = {}
+        self._ids: Optional[List[Hashable]] = None
+        self._index: Optional[Dict[Hashable, int]] = None
+
+    @property
+    def directed(self) -> bool:
+        return self._manifest["directed"]
+
+    @property
+    def multigraph(self) -> bool:
+        return self._manifest["multigraph"]
+
+    def number_of_nodes(self) -> int:
+        return self._manifest["number_of_nodes"]
+
+    def number_of_edges(self) -> int:
+        return self._manifest["number_of_edges"]
+
+    def _table(self, name: str):
+        if name not in self._tables:
+            pa = _require_pyarrow()
+            source = pa.memory_map(os.path.join(self.path, f"{name}.arrow"), "r")
+            self._tables[name] = pa.ipc.open_file(source).read_all()
+        return self._tables[name]
+
+    @property
+    def ids(self) -> List[Hashable]:
+        """
+        The original node IDs, in node-index order.
+        """
+        if self._ids is None:
+            self._ids = self._table("ids").column("id").to_pylist()
+        return self._ids
+
+    def index_of(self, node_id: Hashable) -> int:
+        """
+        Get the integer index of a node from its original ID.
+
+        The ID-to-index map is built the first time this is called.
+        """
+        if self._index is None:
+            self._index = {node: i for i, node in enumerate(self.ids)}
+        return self._index[node_id]
+
+    def successors(self, i: int) -> np.ndarray:
+        """
+        Get the sorted node indices of the out-neighbors of node `i`.
+        """
+        return self.out_indices[self.out_indptr[i] : self.out_indptr[i + 1]]
+
+    def predecessors(self, i: int) -> np.ndarray:
+        """
+        Get the sorted node indices of the in-neighbors of node `i`.
+        """
+        return self.in_indices[self.in_indptr[i] : self.in_indptr[i + 1]]
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.out_indptr)
+
+    def in_degree(self) -> np.ndarray:
+        return np.diff(self.in_indptr)
+
+    def edge_ids(self, i: int, j: int) -> np.ndarray:
+        """
+        Get the IDs of all edges from node `i` to node `j` (binary search).
+        """
+        start, stop = self.out_indptr[i], self.out_indptr[i + 1]
+        neighbors = self.out_indices[start:stop]
+        lo = np.searchsorted(neighbors, j, side="left")
+        hi = np.searchsorted(neighbors, j, side="right")
+        return self.out_edge_ids[start + lo : start + hi]
+
+    def has_edge(self, i: int, j: int) -> bool:
+        return len(self.edge_ids(i, j)) > 0
+
+    def node_attribute_names(self) -> List[str]:
+        return self._table("nodes").column_names
+
+    def edge_attribute_names(self) -> List[str]:
+        return self._table("edges").column_names
+
+    def node_attribute(self, name: str) -> np.ndarray:
+        """
+        Get a node attribute column as an array, in node-index order.
+        """
+        return self._table("nodes").column(name).to_numpy(zero_copy_only=False)
+
+    def edge_attribute(self, name: str) -> np.ndarray:
+        """
+        Get an edge attribute column as an array, in edge-ID order.
+        """
+        return self._table("edges").column(name).to_numpy(zero_copy_only=False)
+
+    def node_attributes(self, i: int) -> dict:
+        """
+        Get all attributes of node `i`, omitting missing values.
+        """
+        return _row(self._table("nodes"), i)
+
+    def edge_attributes(self, edge_id: int) -> dict:
+        """
+        Get all attributes of edge `edge_id`, omitting missing values.
+        """
+        return _row(self._table("edges"), edge_id)
+
+    def to_graph(self) -> nx.Graph:
+        """
+        Materialize the snapshot as an in-memory networkx graph.
+
+        This is useful for executors that operate on networkx graphs. It
+        is much faster than re-reading the original CSVs, but it does copy
+        the whole graph into memory.
+
+        """
+        if self.multigraph:
+            graph = nx.MultiDiGraph() if self.directed else nx.MultiGraph()
+        else:
+            graph = nx.DiGraph() if self.directed else nx.Graph()
+        ids = self.ids
+        graph.add_nodes_from(zip(ids, _records(self._table("nodes"), len(ids))))
+        graph.add_edges_from(
+            zip(
+                (ids[u] for u in self.edge_sources),
+                (ids[v] for v in self.edge_targets),
+                _records(self._table("edges"), self.number_of_edges()),
+            )
+        )
+        return graph
+
+
+def _row(table, i: int) -> dict:
+    if table.num_columns == 0:
+        return {}
+    return {k: v for k, v in table.slice(i, 1).to_pylist()[0].items() if v is not None}
+
+
+def _records(table, count: int) -> List[dict]:
+    if table.num_columns == 0:
+        return [{} for _ in range(count)]
+    return [
+        {k: v for k, v in record.items() if v is not None}
+        for record in table.to_pylist()
+    ]
+
+
+__all__ = ["GraphSnapshot", "write_snapshot"]
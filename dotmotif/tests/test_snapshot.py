@@ -0,0 +1,68 @@
+import importlib.util
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from .. import Motif, GrandIsoExecutor
+from ..snapshot import GraphSnapshot, write_snapshot
+
+
+def _host():
+    G = nx.DiGraph()
+    G.add_node("a", type="x", size=1)
+    G.add_node("b", type="y")
+    G.add_node("c", type="x", size=3)
+    G.add_edge("a", "b", weight=4)
+    G.add_edge("b", "c", weight=5)
+    G.add_edge("c", "a", weight=6)
+    G.add_edge("a", "c")
+    return G
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+class TestGraphSnapshot(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        write_snapshot(_host(), self._dir.name)
+        self.snapshot = GraphSnapshot(self._dir.name)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_arrays_are_memory_mapped(self):
+        self.assertIsInstance(self.snapshot.out_indices, np.memmap)
+        self.assertEqual(self.snapshot.number_of_nodes(), 3)
+        self.assertEqual(self.snapshot.number_of_edges(), 4)
+
+    def test_adjacency(self):
+        s = self.snapshot
+        a, b, c = s.index_of("a"), s.index_of("b"), s.index_of("c")
+        self.assertEqual(sorted(s.successors(a)), sorted([b, c]))
+        self.assertEqual(sorted(s.predecessors(a)), [c])
+        self.assertTrue(s.has_edge(b, c))
+        self.assertFalse(s.has_edge(c, b))
+        (edge_id,) = s.edge_ids(b, c)
+        self.assertEqual(s.edge_attributes(edge_id), {"weight": 5})
+
+    def test_attributes(self):
+        s = self.snapshot
+        self.assertEqual(s.node_attributes(s.index_of("b")), {"type": "y"})
+        self.assertEqual(list(s.node_attribute("type")), ["x", "y", "x"])
+
+    def test_roundtrip_to_graph(self):
+        G = self.snapshot.to_graph()
+        self.assertEqual(sorted(G.edges(data=True)), sorted(_host().edges(data=True)))
+        self.assertEqual(dict(G.nodes(data=True)), dict(_host().nodes(data=True)))
+        motif = Motif("A -> B\nB -> C\nC -> A")
+        self.assertEqual(len(GrandIsoExecutor(graph=G).find(motif)), 3)
+
+    def test_undirected(self):
+        with tempfile.TemporaryDirectory() as d:
+            s = write_snapshot(nx.Graph([("a", "b"), ("b", "b")]), d)
+            a, b = s.index_of("a"), s.index_of("b")
+            self.assertTrue(s.has_edge(a, b))
+            self.assertTrue(s.has_edge(b, a))
+            self.assertEqual(sorted(s.successors(b)), sorted([a, b]))
+            self.assertEqual(s.to_graph().number_of_edges(), 2)
@@ -1,6 +1,11 @@
 from unittest import TestCase
 import networkx as nx
-from ..utils import _deep_merge_constraint_dicts, untype_string, _hashed_dict
+from ..utils import (
+    _deep_merge_constraint_dicts,
+    _hashed_dict,
+    _referenced_attributes,
+    untype_string,
+)
 from .. import Motif
 from tempfile import NamedTemporaryFile
 
@@ -63,3 +68,20 @@ class TestMergeConstraints(TestCase):
         ) == {
             "a": {"b": [1, 3], "c": [2], "d": [4]},
         }
+
+
+class TestReferencedAttributes(TestCase):
+    def test_referenced_attributes(self):
+        m = Motif(
+            """
+        A -> B [weight > 4]
+        A -> C as AC
+        B -> C as BC
+        AC.area >= BC.length
+        A.type = "x"
+        A.radius > B.size
+        """
+        )
+        nodes, edges = _referenced_attributes([m])
+        self.assertEqual(nodes, {"type", "radius", "size"})
+        self.assertEqual(edges, {"weight", "area", "length"})
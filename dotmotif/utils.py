@@ -8,6 +8,7 @@ Requires nx>=2.0
 
 import hashlib
 import json
+from typing import Iterable, Set, Tuple
 import networkx as nx
 
 
@@ -128,3 +129,36 @@ def _deep_merge_constraint_dicts(d1, d2):
         else:
             d1[k] = v
     return d1
+
+
+def _referenced_attributes(motifs: Iterable) -> Tuple[Set[str], Set[str]]:
+    """
+    Collect the node and edge attribute names that a set of motifs constrain.
+
+    This is useful to project a host table down to only the columns that a
+    search will actually read.
+
+    Arguments:
+        motifs (Iterable[dotmotif.Motif]): The motifs to inspect
+
+    Returns:
+        Tuple[Set[str], Set[str]]: The node attributes and edge attributes
+
+    """
+    node_attributes: Set[str] = set()
+    edge_attributes: Set[str] = set()
+    for motif in motifs:
+        for constraints in motif.list_node_constraints().values():
+            node_attributes.update(constraints.keys())
+        for constraints in motif.list_dynamic_node_constraints().values():
+            for key, operators in constraints.items():
+                node_attributes.add(key)
+                for values in operators.values():
+                    node_attributes.update(that_key for _, that_key in values)
+        for constraints in motif.list_edge_constraints().values():
+            edge_attributes.update(constraints.keys())
+        for constraints in motif.list_dynamic_edge_constraints().values():
+            for key, operators in constraints.items():
+                edge_attributes.add(key)
+                edge_attributes.update(that[2] for that in operators.values())
+    return node_attributes, edge_attributes
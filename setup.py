@@ -45,6 +45,9 @@ setup(
             "py2neo",
             "neuprint-python",
         ],
+        "arrow": [
+            "pyarrow",
+        ],
     },
     include_package_data=True,
 )